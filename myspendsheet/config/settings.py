@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 import os
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -24,6 +25,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 env = environ.Env()
 env.read_env(os.path.join(BASE_DIR, ".env"))
 OPENAI_API_KEY = env("OPENAI_API_KEY")
+OPENAI_BASE_URL = env("OPENAI_BASE_URL", default=None)
 SECRET_KEY = env("SECRET_KEY")
 DOCKERIZED = os.getenv("DOCKERIZED", "false").lower() == "true"
 
@@ -54,6 +56,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",  # First so it times the whole request
+    "core.middleware.ProfilingMiddleware",
+    "core.middleware.ReplicaStickinessMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -85,7 +90,7 @@ TEMPLATES = [
 REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "core.api.authentication.CachedJWTAuthentication",
     ),
 }
 
@@ -97,16 +102,58 @@ WSGI_APPLICATION = "config.wsgi.application"
 POSTGRES_DB = env("POSTGRES_DB")
 POSTGRES_USER = env("POSTGRES_USER")
 POSTGRES_PW = env("POSTGRES_PW")
+POSTGRES_POOL_SIZE = env.int("POSTGRES_POOL_SIZE", default=0)  # 0 disables the pool
+# Behind a transaction level pooler (e.g. PgBouncer) each transaction may run on a
+# different server session, so nothing can rely on session state
+POSTGRES_TXN_POOLER = env.bool("POSTGRES_TXN_POOLER", default=False)
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "core.db",  # Postgres with optional connection pool
         "NAME": POSTGRES_DB,
         "USER": POSTGRES_USER,
         "PASSWORD": POSTGRES_PW,
         "HOST": "db" if DOCKERIZED else "localhost",
         "PORT": "5432",
+        # Keep connections between requests, pooled connections return to the pool
+        "CONN_MAX_AGE": (
+            0 if POSTGRES_POOL_SIZE else env.int("POSTGRES_CONN_MAX_AGE", default=60)
+        ),
+        "CONN_HEALTH_CHECKS": True,
+        "DISABLE_SERVER_SIDE_CURSORS": POSTGRES_TXN_POOLER,
+        # Set time zone at startup instead of with a SET on each connection
+        "OPTIONS": {"options": "-c timezone=UTC"} if POSTGRES_TXN_POOLER else {},
+        "POOL": {
+            "MAX_SIZE": POSTGRES_POOL_SIZE,
+            "TIMEOUT": env.float("POSTGRES_POOL_TIMEOUT", default=10.0),
+            "MAX_IDLE": 300,  # Seconds an idle connection is kept open
+            "CHECK_AFTER": 30,  # Seconds idle before a connection is checked on reuse
+        },
+    }
+}
+
+# Read replicas as host or host:port, txn lists and summary calculations are read from
+# them, see core/db/router.py
+DATABASE_REPLICAS = []
+for index, replica in enumerate(env.list("POSTGRES_REPLICAS", default=[])):
+    host, _, port = replica.partition(":")
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or "5432",
+        # Fall back to default quickly when a replica is down
+        "OPTIONS": {**DATABASES["default"]["OPTIONS"], "connect_timeout": 2},
+        "POOL": dict(DATABASES["default"]["POOL"]),
+        # Tests read replicas' data from the test database
+        "TEST": {"MIRROR": "default"},
     }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ["core.db.router.ReplicaRouter"]
+DATABASE_REPLICA_ROUTING = {
+    "STICKY_SECONDS": env.int("POSTGRES_REPLICA_STICKY_SECONDS", default=5),
+    "MAX_LAG_SECONDS": env.float("POSTGRES_REPLICA_MAX_LAG_SECONDS", default=1.0),
+    "LAG_CHECK_SECONDS": 1.0,
 }
 
 
@@ -158,12 +205,74 @@ CACHES = {
         "BACKEND": "django_redis.cache.RedisCache",
         "LOCATION": f"redis://{HOST}:6379/0",  # A unique identifier for the cache
         "TIMEOUT": 1800,  # Cache timeout in seconds (30 minutes)
+        "VERSION": 2,  # Bump when cache encoding changes so old values are not read
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "SERIALIZER": "core.cache.MsgpackSerializer",
+            "COMPRESSOR": "core.cache.ThresholdZlibCompressor",
+            "COMPRESS_MIN_LENGTH": 256,  # Bytes, smaller values are not compressed
+            # Counts Redis round trips on request metrics
+            "CONNECTION_POOL_CLASS": "core.cache.InstrumentedConnectionPool",
         },
     }
 }
 
+# Txn ingest stream (see core.api.services.TxnIngestStream). Apart from the cache so
+# clearing or evicting it never drops queued txn
+TXN_INGEST = {
+    "LOCATION": env(
+        "TXN_INGEST_REDIS_URL",
+        default=(
+            "redis://ingest_redis:6379/0" if DOCKERIZED else "redis://localhost:6379/1"
+        ),
+    ),
+    "MAX_DELIVERIES": 5,  # Deliveries of an entry before it's dead lettered
+}
+
+# OpenAI client shared by the process (see core.api.clients)
+OPENAI_CLIENT = {
+    "TIMEOUT": env.float(
+        "OPENAI_TIMEOUT", default=120.0
+    ),  # Parsing can take 30+ seconds
+    "CONNECT_TIMEOUT": 5.0,
+    "MAX_CONNECTIONS": 20,
+    "MAX_RETRIES": 3,
+    "RATE_LIMIT": env.float("OPENAI_RATE_LIMIT", default=5.0),  # Calls per second
+    "BURST": 10,
+    "RATE_LIMIT_WAIT": 5.0,  # Max seconds to wait for the rate limiter
+    "FAILURE_THRESHOLD": 5,  # Consecutive failures before failing fast
+    "RESET_TIMEOUT": 30.0,  # Seconds to fail fast before trying provider again
+}
+
+# Token bucket rate limits by view throttle scope and kind (see core.api.throttling). RATE
+# is the refill rate and BURST the bucket size. COSTS are tokens taken by a file format
+THROTTLE_BUCKETS = {
+    "user_create": {"IP": {"RATE": "20/hour", "BURST": 10}},
+    "txnfile": {
+        "USER": {"RATE": "100/hour", "BURST": 30},
+        "IP": {"RATE": "300/hour", "BURST": 60},
+        "COSTS": {"pdf": 10},  # Parsed by AI
+    },
+}
+
+# Bearer token Prometheus scrapes /metrics with, without one /metrics is DEBUG only
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+
+# Request profiles (see core.middleware.ProfilingMiddleware), list them with
+# `python manage.py profiles`. Off unless enabled, staff can then ask for a profile of a
+# request with an X-Profile header
+PROFILING = {
+    "ENABLED": env.bool("PROFILING_ENABLED", default=False),
+    "SAMPLE_RATE": env.float("PROFILING_SAMPLE_RATE", default=0.0),  # Fraction sampled
+    "INTERVAL": 0.001,  # Seconds between stack samples
+    "FORMAT": "speedscope",  # or pstats
+    "DIR": env(
+        "PROFILING_DIR",
+        default=os.path.join(tempfile.gettempdir(), "myspendsheet-profiles"),
+    ),
+    "MAX_PROFILES": 500,  # Oldest are removed past this
+}
+
 # CORS
 
 CORS_ALLOWED_ORIGINS = [
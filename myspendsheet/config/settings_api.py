@@ -0,0 +1,37 @@
+"""
+API only production settings for config project.
+
+Extends config.settings_prod without the session, message, CSRF, clickjacking and template
+machinery, none of which applies to JWT authenticated JSON requests. Admin is not served,
+run a separate management process with config.settings_prod for it. Selected by
+gunicorn.conf.py, or by setting DJANGO_SETTINGS_MODULE=config.settings_api.
+"""
+
+from config.settings_prod import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    "core",
+    "rest_framework",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "corsheaders",
+]
+
+MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
+    "core.middleware.ProfilingMiddleware",
+    "core.middleware.ReplicaStickinessMiddleware",
+    "corsheaders.middleware.CorsMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "django.middleware.common.CommonMiddleware",
+]
+
+ROOT_URLCONF = "config.urls_api"
+
+TEMPLATES = []
+
+# Browsable API needs templates and sessions
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,  # noqa: F405
+    "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"],
+}
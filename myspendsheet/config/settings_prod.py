@@ -0,0 +1,20 @@
+"""
+Production settings for config project.
+
+Extends the development settings in config.settings. Serves the full stack including
+admin, API processes use config.settings_api. Selected by setting
+DJANGO_SETTINGS_MODULE=config.settings_prod.
+"""
+
+from config.settings import *  # noqa: F401,F403
+
+# Debug keeps every executed SQL query in memory and returns tracebacks to clients
+DEBUG = False
+
+# Under ASGI each request runs the ORM in its own thread, so connections are only reused
+# through the pool. Each replica has a pool of its own
+for database in DATABASES.values():  # noqa: F405
+    database["POOL"]["MAX_SIZE"] = env.int(  # noqa: F405
+        "POSTGRES_POOL_SIZE", default=10
+    )
+    database["CONN_MAX_AGE"] = 0
@@ -0,0 +1,11 @@
+"""
+URL configuration for API only processes (see config.settings_api).
+
+Admin is left out, it is served by a separate management process using config.urls.
+"""
+
+from django.urls import include, path
+
+urlpatterns = [
+    path("", include("core.api.urls")),
+]
@@ -0,0 +1,109 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import AuthUser, JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def user_cache_key(user_id: int) -> str:
+    """Generate cache key of authenticated user"""
+    return f"auth:user:{user_id}"
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that skips repeated token verification and user lookups
+
+    Verified tokens are kept in a process wide LRU keyed by token hash until they expire.
+    Users are kept in the cache for a short time and invalidated when they change (see
+    core.signals), so an authenticated request doesn't have to query the database.
+
+    Attribute:
+        TOKEN_CACHE_SIZE (int): Max verified tokens kept per process
+        USER_CACHE_TIMEOUT (int): Seconds a user is cached
+        USER_CACHE_FIELDS (list[str]): User fields cached, others are deferred
+    """
+
+    TOKEN_CACHE_SIZE = 10000
+    USER_CACHE_TIMEOUT = 300
+    USER_CACHE_FIELDS = ["id", "username", "is_active", "is_staff", "is_superuser"]
+
+    # DRF creates authenticators per request so tokens are shared at class level
+    _tokens = OrderedDict()
+    _tokens_lock = threading.Lock()
+
+    def get_validated_token(self, raw_token: bytes) -> Token:
+        """
+        Return verified token from LRU, verify and add it on miss
+        """
+        token_hash = hashlib.sha256(raw_token).digest()
+        with self._tokens_lock:
+            cached = self._tokens.get(token_hash)
+            if cached is not None:
+                validated_token, expires = cached
+                if expires > time.time():
+                    self._tokens.move_to_end(token_hash)
+                    return validated_token
+                del self._tokens[token_hash]
+
+        validated_token = super().get_validated_token(raw_token)
+        with self._tokens_lock:
+            self._tokens[token_hash] = (validated_token, validated_token.get("exp", 0))
+            if len(self._tokens) > self.TOKEN_CACHE_SIZE:
+                self._tokens.popitem(last=False)
+        return validated_token
+
+    def _cache_fields(self) -> list[str]:
+        """Return user fields to cache, password is needed to check revoked tokens"""
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return self.USER_CACHE_FIELDS + ["password"]
+        return self.USER_CACHE_FIELDS
+
+    def get_user(self, validated_token: Token) -> AuthUser:
+        """
+        Return user from cache, look up and cache user on miss
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        cache_key = user_cache_key(user_id)
+        user_fields = cache.get(cache_key)
+        if user_fields is None:
+            user = super().get_user(validated_token)
+            cache.set(
+                cache_key,
+                {field: getattr(user, field) for field in self._cache_fields()},
+                timeout=self.USER_CACHE_TIMEOUT,
+            )
+            return user
+
+        # Fields that are not cached are loaded from database if accessed
+        field_names = [
+            field.attname
+            for field in self.user_model._meta.concrete_fields
+            if field.attname in user_fields
+        ]
+        user = self.user_model.from_db(
+            DEFAULT_DB_ALIAS, field_names, [user_fields[name] for name in field_names]
+        )
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+        return user
@@ -0,0 +1,257 @@
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+import httpx
+import openai
+from core.metrics import timed
+from django.conf import settings
+from openai import OpenAI
+from openai.types.chat import ChatCompletion
+
+
+class ProviderUnavailableError(Exception):
+    """
+    Raised when a call to the AI provider is rejected or failed after retries
+
+    Attribute:
+        retry_after (float): Seconds until the client is expected to accept calls again
+    """
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """
+    Token bucket limiting the rate of calls made by this process
+
+    Attribute:
+        rate (float): Tokens added per second
+        burst (int): Max tokens in the bucket
+    """
+
+    def __init__(self, rate: float, burst: int):
+        """
+        Initialize RateLimiter with a full bucket
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _wait_time(self) -> float:
+        """Take a token if available and return 0, otherwise return seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, max_wait: float) -> None:
+        """Block until a token is taken, raise if it would take longer than max wait"""
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self._wait_time()
+            if wait == 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise ProviderUnavailableError("AI provider rate limit reached", wait)
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Fail fast once the provider has failed too many times in a row
+
+    The circuit opens after failure threshold consecutive failures. Once reset timeout has
+    passed, a single trial call is let through (half open). Success closes the circuit and
+    failure opens it again. A trial ended by any other error is released, so the next call
+    is the trial.
+
+    Attribute:
+        failure_threshold (int): Consecutive failures before the circuit opens
+        reset_timeout (float): Seconds the circuit stays open before a trial call
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        """
+        Initialize closed CircuitBreaker
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Raise if the circuit is open, let a single trial call through after timeout"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if self.state == self.OPEN and remaining <= 0:
+                self.state = self.HALF_OPEN
+                return
+            raise ProviderUnavailableError(
+                "AI provider circuit is open", max(remaining, 1.0)
+            )
+
+    def record_success(self) -> None:
+        """Close the circuit"""
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        """Count failure and open the circuit at threshold or after a failed trial"""
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release_trial(self) -> None:
+        """Reopen the circuit after a trial call ended without success or failure"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                # Reset timeout has passed, so the next call is the trial
+                self.state = self.OPEN
+
+
+class ResilientOpenAIClient:
+    """
+    OpenAI client meant to be shared by every request in the process
+
+    Keeps a pool of keep-alive connections and wraps calls with explicit timeouts, bounded
+    retries with full jitter backoff, a client side rate limiter and a circuit breaker.
+
+    Attribute:
+        RETRYABLE_ERRORS (tuple): Errors that mean the provider is degraded
+    """
+
+    RETRYABLE_ERRORS = (
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        timeout: float = 120.0,
+        connect_timeout: float = 5.0,
+        max_connections: int = 20,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        rate_limit: float = 5.0,
+        burst: int = 10,
+        rate_limit_wait: float = 5.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        """
+        Initialize ResilientOpenAIClient with its own connection pool
+        """
+        http_client = httpx.Client(
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        # Retries are done here so they are bounded by the circuit breaker
+        self.client = OpenAI(
+            api_key=api_key, base_url=base_url, max_retries=0, http_client=http_client
+        )
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limit_wait = rate_limit_wait
+        self.rate_limiter = RateLimiter(rate_limit, burst)
+        self.circuit_breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+    def _backoff(self, attempt: int) -> float:
+        """Return seconds to sleep before retry attempt using full jitter"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def chat_completion(self, **kwargs) -> ChatCompletion:
+        """Create chat completion, raise ProviderUnavailableError if provider is degraded"""
+        with timed("openai_chat_completion"):
+            return self._chat_completion(**kwargs)
+
+    def _chat_completion(self, **kwargs) -> ChatCompletion:
+        """Create chat completion with retries"""
+        for attempt in range(self.max_retries + 1):
+            # Rate limited calls never start the circuit's trial
+            self.rate_limiter.acquire(self.rate_limit_wait)
+            self.circuit_breaker.before_call()
+            try:
+                response = self.client.chat.completions.create(**kwargs)
+            except self.RETRYABLE_ERRORS as e:
+                self.circuit_breaker.record_failure()
+                if attempt == self.max_retries:
+                    raise ProviderUnavailableError(
+                        f"AI provider failed after {attempt + 1} attempts: {e}",
+                        self.circuit_breaker.reset_timeout,
+                    ) from e
+                time.sleep(self._backoff(attempt))
+            except BaseException:
+                # Not a sign the provider is degraded, e.g. a bad request
+                self.circuit_breaker.release_trial()
+                raise
+            else:
+                self.circuit_breaker.record_success()
+                return response
+
+    def close(self) -> None:
+        """Close pooled connections"""
+        self.client.close()
+
+
+_client: Optional[ResilientOpenAIClient] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def get_openai_client() -> ResilientOpenAIClient:
+    """
+    Return the process wide OpenAI client, created on first use
+
+    Created lazily and per pid so forked workers never share sockets with their parent.
+    """
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            options = settings.OPENAI_CLIENT
+            _client = ResilientOpenAIClient(
+                api_key=settings.OPENAI_API_KEY,
+                base_url=settings.OPENAI_BASE_URL,
+                timeout=options["TIMEOUT"],
+                connect_timeout=options["CONNECT_TIMEOUT"],
+                max_connections=options["MAX_CONNECTIONS"],
+                max_retries=options["MAX_RETRIES"],
+                rate_limit=options["RATE_LIMIT"],
+                burst=options["BURST"],
+                rate_limit_wait=options["RATE_LIMIT_WAIT"],
+                failure_threshold=options["FAILURE_THRESHOLD"],
+                reset_timeout=options["RESET_TIMEOUT"],
+            )
+            _client_pid = os.getpid()
+        return _client
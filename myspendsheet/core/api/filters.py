@@ -0,0 +1,32 @@
+from core.models import Txn
+from django_filters import rest_framework as filters
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    """
+    Filter by comma separated numbers
+    """
+
+
+def parse_tag_ids(value: str) -> list[int]:
+    """Parse comma separated tag ids, raise ValueError if an id isn't an integer"""
+    return [int(tag_id) for tag_id in value.split(",") if tag_id]
+
+
+class TxnFilter(filters.FilterSet):
+    """
+    Filter txn by date, amount and tags
+
+    tags matches txn with any of the comma separated tag ids and tags_all txn with all of
+    them. Both are answered by the GIN index on tags.
+    """
+
+    tags = NumberInFilter(field_name="tags", lookup_expr="overlap")
+    tags_all = NumberInFilter(field_name="tags", lookup_expr="contains")
+
+    class Meta:
+        model = Txn
+        fields = {
+            "amount": ["exact", "gte", "lte"],
+            "date": ["exact", "gte", "lte"],
+        }
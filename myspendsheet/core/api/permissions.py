@@ -0,0 +1,23 @@
+import hmac
+
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+
+class HasMetricsToken(BasePermission):
+    """
+    Allow requests with the METRICS_TOKEN setting as bearer token
+
+    Meant for Prometheus scrapers, which can't refresh JWTs. When no token is configured
+    access is only allowed in DEBUG.
+    """
+
+    def has_permission(self, request: Request, view: APIView) -> bool:
+        """Return if request has metrics token"""
+        token = settings.METRICS_TOKEN
+        if not token:
+            return settings.DEBUG
+        header = request.META.get("HTTP_AUTHORIZATION", "")
+        return hmac.compare_digest(header.encode(), f"Bearer {token}".encode())
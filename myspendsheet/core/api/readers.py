@@ -0,0 +1,262 @@
+import csv
+import html
+import re
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Iterator, Optional, TextIO
+
+
+class TxnFileFormatError(ValueError):
+    """
+    Raised when a txn file is not a supported format or has an invalid txn
+    """
+
+
+class TxnReader(ABC):
+    """
+    Base for readers that stream txn out of a bank export one row at a time
+
+    Readers yield txn dict with the same fields and types as validated TxnSerializer data.
+    Bank exports use negative amounts for spending, so amounts are negated to match txn
+    where spending is positive.
+
+    Attribute:
+        DATE_FORMATS (list[str]): Date formats tried in order
+        DEFAULT_CATEGORY (str): Category of txn when export has none
+        MAX_AMOUNT (Decimal): Amount must be below to fit txn amount field
+        MAX_CACHED_DATES (int): Max parsed dates kept by reader
+    """
+
+    DATE_FORMATS = [
+        "%Y-%m-%d",
+        "%m/%d/%Y",
+        "%m/%d/%y",
+        "%Y%m%d",
+        "%d-%b-%Y",
+        "%b %d, %Y",
+    ]
+    DEFAULT_CATEGORY = "Uncategorized"
+    MAX_AMOUNT = Decimal("10000000")
+    MAX_CACHED_DATES = 10000
+
+    def __init__(self):
+        """
+        Initialize TxnReader
+        """
+        # Exports use one date format so remember the last one that worked
+        self._date_format = self.DATE_FORMATS[0]
+        # Many txn share a date and strptime is slow, so cache parsed dates
+        self._dates = {}
+
+    def _parse_date(self, value: str, position: int) -> date:
+        """Parse txn date trying the last matched format first"""
+        value = value.strip()
+        if value in self._dates:
+            return self._dates[value]
+        for date_format in [self._date_format] + self.DATE_FORMATS:
+            try:
+                txn_date = datetime.strptime(value, date_format).date()
+            except ValueError:
+                continue
+            self._date_format = date_format
+            if len(self._dates) < self.MAX_CACHED_DATES:
+                self._dates[value] = txn_date
+            return txn_date
+        raise TxnFileFormatError(f"Invalid date {value!r} at txn {position}")
+
+    def _parse_amount(self, value: str, position: int) -> Decimal:
+        """Parse amount such as '-1,234.56', '$12.00' or '(12.00)'"""
+        value = value.strip().replace(",", "").replace("$", "")
+        negative = value.startswith("(") and value.endswith(")")
+        try:
+            amount = Decimal(value.strip("()") or "0").quantize(Decimal("0.01"))
+        except InvalidOperation:
+            raise TxnFileFormatError(f"Invalid amount {value!r} at txn {position}")
+        if abs(amount) >= self.MAX_AMOUNT:
+            raise TxnFileFormatError(f"Amount {value!r} too large at txn {position}")
+        return -amount if negative else amount
+
+    def _txn(
+        self,
+        txn_date: date,
+        description: str,
+        amount: Decimal,
+        category: Optional[str] = None,
+    ) -> dict:
+        """Build txn dict from parsed fields"""
+        return {
+            "date": txn_date,
+            "description": " ".join(description.split())[:100],
+            "amount": amount,
+            "category": (category or "").strip()[:100] or self.DEFAULT_CATEGORY,
+        }
+
+    @abstractmethod
+    def read(self, text: TextIO) -> Iterator[dict]:
+        """Yield txn from text stream"""
+
+
+class CsvTxnReader(TxnReader):
+    """
+    Read txn from CSV export with a header row
+
+    Amount is read from a single signed amount column, or from separate debit and credit
+    columns.
+
+    Attribute:
+        COLUMNS (dict[str, list[str]]): Header names accepted for each txn field
+    """
+
+    COLUMNS = {
+        "date": [
+            "date",
+            "transaction date",
+            "trans. date",
+            "posted date",
+            "posting date",
+        ],
+        "description": ["description", "payee", "name", "merchant", "details", "memo"],
+        "amount": ["amount", "transaction amount"],
+        "debit": ["debit", "withdrawal", "withdrawals"],
+        "credit": ["credit", "deposit", "deposits"],
+        "category": ["category"],
+    }
+
+    def _columns(self, header: list[str]) -> dict[str, int]:
+        """Map txn fields to their column index from the header row"""
+        names = [name.strip().lower() for name in header]
+        columns = {}
+        for field, aliases in self.COLUMNS.items():
+            for alias in aliases:
+                if alias in names:
+                    columns[field] = names.index(alias)
+                    break
+        if "date" not in columns or "description" not in columns:
+            raise TxnFileFormatError("CSV header needs date and description columns")
+        if "amount" not in columns and "debit" not in columns:
+            raise TxnFileFormatError("CSV header needs amount or debit/credit columns")
+        return columns
+
+    def read(self, text: TextIO) -> Iterator[dict]:
+        """Yield txn from CSV rows"""
+        rows = csv.reader(text)
+        header = next(rows, None)
+        if header is None:
+            raise TxnFileFormatError("CSV file is empty")
+        columns = self._columns(header)
+        for position, row in enumerate(rows, start=1):
+            if not any(row):
+                continue
+            try:
+                if "amount" in columns:
+                    spent = -self._parse_amount(row[columns["amount"]], position)
+                else:
+                    spent = self._parse_amount(row[columns["debit"]], position)
+                    if "credit" in columns:
+                        spent -= self._parse_amount(row[columns["credit"]], position)
+                category = row[columns["category"]] if "category" in columns else None
+                yield self._txn(
+                    self._parse_date(row[columns["date"]], position),
+                    row[columns["description"]],
+                    spent,
+                    category,
+                )
+            except IndexError:
+                raise TxnFileFormatError(f"Missing column at txn {position}")
+
+
+class OfxTxnReader(TxnReader):
+    """
+    Read STMTTRN txn from OFX export
+
+    Handles both SGML (OFX 1.x, closing tags optional) and XML (OFX 2.x). Text is read in
+    chunks and tokenized by tag, as some banks put the whole file on a single line.
+
+    Attribute:
+        CHUNK_SIZE (int): Characters read at a time
+    """
+
+    CHUNK_SIZE = 64 * 1024
+    TAG_RE = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+    def _tags(self, text: TextIO) -> Iterator[tuple[bool, str, str]]:
+        """Yield (is closing, tag name, value) for each tag in text"""
+        buffer = ""
+        for chunk in iter(lambda: text.read(self.CHUNK_SIZE), ""):
+            buffer += chunk
+            # Keep text after last "<" as its tag or value may continue in next chunk
+            split = max(buffer.rfind("<"), 0)
+            complete, buffer = buffer[:split], buffer[split:]
+            yield from self._match_tags(complete)
+        yield from self._match_tags(buffer)
+
+    def _match_tags(self, text: str) -> Iterator[tuple[bool, str, str]]:
+        """Yield (is closing, tag name, value) for each complete tag in text"""
+        for match in self.TAG_RE.finditer(text):
+            closing, tag, value = match.groups()
+            yield closing == "/", tag.upper(), value.strip()
+
+    def _stmttrn_to_txn(self, fields: dict[str, str], position: int) -> dict:
+        """Build txn from STMTTRN fields"""
+        if "DTPOSTED" not in fields or "TRNAMT" not in fields:
+            raise TxnFileFormatError(f"Missing DTPOSTED or TRNAMT at txn {position}")
+        return self._txn(
+            self._parse_date(fields["DTPOSTED"][:8], position),
+            fields.get("NAME") or fields.get("MEMO") or fields.get("PAYEE", ""),
+            -self._parse_amount(fields["TRNAMT"], position),
+        )
+
+    def read(self, text: TextIO) -> Iterator[dict]:
+        """Yield txn from STMTTRN elements"""
+        fields = None
+        position = 0
+        for closing, tag, value in self._tags(text):
+            if tag == "STMTTRN":
+                if fields is not None:
+                    position += 1
+                    yield self._stmttrn_to_txn(fields, position)
+                fields = None if closing else {}
+            elif fields is not None and not closing and value:
+                fields[tag] = html.unescape(value)
+
+
+class QifTxnReader(TxnReader):
+    """
+    Read txn records from QIF export
+
+    Each record is a set of lines starting with a field code and ends with "^".
+    """
+
+    DATE_FORMATS = ["%m/%d/%Y", "%m/%d/%y", "%d/%m/%Y", "%Y-%m-%d"]
+
+    def _record_to_txn(self, fields: dict[str, str], position: int) -> dict:
+        """Build txn from QIF record fields"""
+        if "D" not in fields or ("T" not in fields and "U" not in fields):
+            raise TxnFileFormatError(f"Missing date or amount at txn {position}")
+        # Quicken writes years after 1999 as MM/DD'YY
+        txn_date = fields["D"].replace("'", "/").replace(" ", "")
+        return self._txn(
+            self._parse_date(txn_date, position),
+            fields.get("P") or fields.get("M", ""),
+            -self._parse_amount(fields.get("T") or fields["U"], position),
+            fields.get("L"),
+        )
+
+    def read(self, text: TextIO) -> Iterator[dict]:
+        """Yield txn from QIF records"""
+        fields = {}
+        position = 0
+        for line in text:
+            line = line.rstrip("\r\n")
+            if not line or line.startswith("!"):
+                continue
+            if line.startswith("^"):
+                if fields:
+                    position += 1
+                    yield self._record_to_txn(fields, position)
+                fields = {}
+            else:
+                fields.setdefault(line[0], line[1:])
+        if fields:
+            yield self._record_to_txn(fields, position + 1)
@@ -1,4 +1,5 @@
-from core.models import Txn
+from core.api.services import CategoryMap, TagMap
+from core.models import Budget, BudgetAlert, Tag, Txn
 from django.contrib.auth.models import User
 from rest_framework import serializers
 
@@ -20,11 +21,132 @@ class UserSerializer(serializers.ModelSerializer):
 class TxnSerializer(serializers.ModelSerializer):
     """
     Serializer for Txn model.
+
+    Category is read and written by name. On save the name is resolved to the user's
+    category, created if the user doesn't have it, and stored with its id.
+
+    Tags are read and written as ids of the requesting user's tags.
     """
 
+    category_map = CategoryMap()
+    tag_map = TagMap()
+
     class Meta:
         model = Txn
-        exclude = ["user"]
+        exclude = ["user", "fingerprint", "category_ref"]
+
+    def validate_tags(self, tags: list[int]) -> list[int]:
+        """Validate tags are the user's, sorted without duplicates"""
+        tags = sorted(set(tags))
+        if tags:
+            user_id = self.context["request"].user.pk
+            unknown = set(tags) - self.tag_map.names(user_id, required=tags).keys()
+            if unknown:
+                raise serializers.ValidationError(
+                    f"Unknown tags: {', '.join(str(tag) for tag in sorted(unknown))}"
+                )
+        return tags
+
+    def _resolve_category(self, validated_data: dict) -> None:
+        """Replace category name with the stored name and set the category id"""
+        if "category" not in validated_data:
+            return
+        name = validated_data["category"]
+        category_id, validated_data["category"] = self.category_map.resolve(
+            validated_data["user"].pk, [name]
+        )[name]
+        validated_data["category_ref_id"] = category_id
+
+    def create(self, validated_data: dict) -> Txn:
+        self._resolve_category(validated_data)
+        return super().create(validated_data)
+
+    def update(self, instance: Txn, validated_data: dict) -> Txn:
+        self._resolve_category(validated_data)
+        return super().update(instance, validated_data)
+
+
+class TagSerializer(serializers.ModelSerializer):
+    """
+    Serializer for Tag model
+    """
+
+    class Meta:
+        model = Tag
+        fields = ["id", "name"]
+
+    def validate_name(self, name: str) -> str:
+        """Validate user doesn't have another tag with name"""
+        tags = self.context["request"].user.tags.filter(name=name)
+        if self.instance is not None:
+            tags = tags.exclude(pk=self.instance.pk)
+        if tags.exists():
+            raise serializers.ValidationError("Tag with this name already exists.")
+        return name
+
+
+class BudgetSerializer(serializers.ModelSerializer):
+    """
+    Serializer for Budget model
+
+    Category is written by name and resolved like txn categories. Spent and remaining are
+    of the month the budget was read for.
+    """
+
+    category = serializers.CharField(source="category.name", max_length=100)
+    spent = serializers.DecimalField(max_digits=11, decimal_places=2, read_only=True)
+    remaining = serializers.SerializerMethodField()
+
+    category_map = CategoryMap()
+
+    class Meta:
+        model = Budget
+        fields = ["id", "category", "amount", "alert_thresholds", "spent", "remaining"]
+
+    def get_remaining(self, budget: Budget) -> str:
+        return f"{budget.amount - budget.spent:.2f}"
+
+    def validate_alert_thresholds(self, thresholds: list[int]) -> list[int]:
+        """Validate thresholds are percents, sorted without duplicates"""
+        if any(threshold <= 0 for threshold in thresholds):
+            raise serializers.ValidationError("Thresholds are percents above 0.")
+        return sorted(set(thresholds))
+
+    def validate_category(self, name: str) -> str:
+        """Validate budget category isn't changed"""
+        normalized = self.category_map.normalize(name).lower()
+        if (
+            self.instance is not None
+            and normalized != self.instance.category.name.lower()
+        ):
+            raise serializers.ValidationError("Category of a budget can't be changed.")
+        return name
+
+    def create(self, validated_data: dict) -> Budget:
+        name = validated_data.pop("category")["name"]
+        user = validated_data["user"]
+        category_id, _ = self.category_map.resolve(user.pk, [name])[name]
+        if user.budgets.filter(category_id=category_id).exists():
+            raise serializers.ValidationError(
+                {"category": "Budget of this category already exists."}
+            )
+        return super().create({**validated_data, "category_id": category_id})
+
+    def update(self, instance: Budget, validated_data: dict) -> Budget:
+        validated_data.pop("category", None)
+        return super().update(instance, validated_data)
+
+
+class BudgetAlertSerializer(serializers.ModelSerializer):
+    """
+    Serializer for BudgetAlert model
+    """
+
+    category = serializers.CharField(source="budget.category.name")
+
+    class Meta:
+        model = BudgetAlert
+        fields = ["budget", "category", "month", "threshold", "spent", "created"]
 
 
 class SummarySerializer(serializers.Serializer):
@@ -37,3 +159,23 @@ class SummarySerializer(serializers.Serializer):
     total_by_cat = serializers.DictField(
         child=serializers.DecimalField(max_digits=9, decimal_places=2)
     )
+
+
+class ChangeSerializer(serializers.Serializer):
+    """
+    Serializer for change between two amounts
+    """
+
+    absolute = serializers.DecimalField(max_digits=10, decimal_places=2)
+    percent = serializers.DecimalField(max_digits=12, decimal_places=1, allow_null=True)
+
+
+class ComparisonSerializer(serializers.Serializer):
+    """
+    Serializer for Summary compared with the Summary of a previous period
+    """
+
+    current = SummarySerializer()
+    previous = SummarySerializer()
+    total_change = ChangeSerializer()
+    change_by_cat = serializers.DictField(child=ChangeSerializer())
@@ -1,16 +1,81 @@
+import calendar
+import codecs
+import csv
+import hashlib
+import io
 import json
-from datetime import date, datetime
+import os
+import re
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import Any
+from typing import Any, Iterable, Iterator, Optional
 
 import pymupdf
-from config.settings import OPENAI_API_KEY
-from core.models import Txn
+import redis
+from asgiref.sync import sync_to_async
+from core.api.clients import get_openai_client
+from core.api.readers import (
+    CsvTxnReader,
+    OfxTxnReader,
+    QifTxnReader,
+    TxnFileFormatError,
+)
+from core.cache import InstrumentedConnectionPool, async_cache, publish
+from core.db.router import areplica_reads, mark_written, replica_reads
+from core.metrics import SUMMARY_CACHE_HIT, SUMMARY_CACHE_MISS, timed
+from core.models import Budget, BudgetAlert, BudgetPeriod, Category, Tag, Txn
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.cache import cache
-from django.core.files.uploadedfile import InMemoryUploadedFile
-from django.db.models import Sum
-from openai import OpenAI
+from django.core.files.uploadedfile import InMemoryUploadedFile, UploadedFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, router, transaction
+from django.db.backends.utils import CursorWrapper
+from django.db.models import Q, QuerySet, Sum
+from django.db.models.functions import TruncMonth
+
+DEFAULT_CATEGORIES = [
+    "Income",
+    "Bills",
+    "Entertainment",
+    "Home",
+    "Hobbies",
+    "Transportation",
+    "Rent",
+    "Car",
+    "Groceries",
+    "Restaurants",
+    "Pet",
+    "Utilities",
+    "Clothing",
+    "Health",
+    "Household Items",
+    "Personal",
+    "Debt",
+    "Education",
+    "Work",
+    "Retirement",
+    "Investments",
+    "Savings",
+    "Gifts",
+    "Uncategorized",
+]
+# Misspellings of default categories stored before categories were normalized
+CATEGORY_ALIASES = {"restuarants": "Restaurants"}
+
+
+def create_default_categories(users: Iterable[User]) -> None:
+    """Create default categories of users, skipping ones they already have"""
+    Category.objects.bulk_create(
+        [
+            Category(user=user, name=name)
+            for user in users
+            for name in DEFAULT_CATEGORIES
+        ],
+        batch_size=5000,
+        ignore_conflicts=True,
+    )
 
 
 class OpenAIParser:
@@ -22,7 +87,7 @@ class OpenAIParser:
         """
         Initialize OpenAIParser
         """
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
+        self.client = get_openai_client()
         self.model = "gpt-4o-mini"
         self.role = "user"
 
@@ -47,12 +112,7 @@ class OpenAIParser:
         Return transaction categories
         """
         # Currently static, but plan to link to model in future hence @property
-        return (
-            "Income, Bills, Entertainment, Home, Hobbies, Transportation, "
-            "Rent, Car, Groceries, Restuarants, Pet, Utilities, Clothing, "
-            "Health, Household Items, Personal, Debt, Education, Work, "
-            "Retirement, Investments, Savings, Gifts"
-        )
+        return ", ".join(DEFAULT_CATEGORIES)
 
     @property
     def fields(self) -> str:
@@ -61,6 +121,9 @@ class OpenAIParser:
         """
         field_list = [field.name for field in Txn._meta.fields]
         field_list.remove("id")
+        field_list.remove("fingerprint")
+        field_list.remove("category_ref")
+        field_list.remove("tags")
         field_str = ", ".join(field_list)
         return field_str
 
@@ -70,7 +133,7 @@ class OpenAIParser:
         """
         # This can take 30 seconds to run. Future run async
         # Need to add token length check
-        ai_response = self.client.chat.completions.create(
+        ai_response = self.client.chat_completion(
             model=self.model,
             messages=[{"role": self.role, "content": self.prompt + "\n" + txn_text}],
         )
@@ -88,11 +151,12 @@ class TxnPdfParser:
         """
         Input file is converted and output as str
         """
-        pdf_stream = pdf.read()
-        pdf_doc = pymupdf.open(stream=pdf_stream, filetype="pdf")
-        pdf_text = ""
-        for page in pdf_doc:
-            pdf_text = f"{pdf_text} {page.get_text()}"
+        with timed("pdf_extract"):
+            pdf_stream = pdf.read()
+            pdf_doc = pymupdf.open(stream=pdf_stream, filetype="pdf")
+            pdf_text = ""
+            for page in pdf_doc:
+                pdf_text = f"{pdf_text} {page.get_text()}"
         return pdf_text
 
     def txn_file_to_dict(self, pdf: InMemoryUploadedFile) -> list[dict]:
@@ -105,12 +169,48 @@ class TxnPdfParser:
 
 
 class TxnFileParser:
+    """
+    Parse uploaded txn file based on its format
+
+    PDF statements are parsed by AI. CSV, OFX and QIF exports are parsed exactly and
+    streamed one txn at a time so large files are never fully in memory.
+
+    Attribute:
+        HEADER_SIZE (int): Bytes read from the start of the file to detect format
+    """
+
+    HEADER_SIZE = 1024
+
     def __init__(self):
         """
         Initalize Transaction File Parser
         """
-        # For now only do pdf file type, but add more in future
         self.pdf_parser = TxnPdfParser()
+        self.readers = {
+            "csv": CsvTxnReader,
+            "ofx": OfxTxnReader,
+            "qif": QifTxnReader,
+        }
+
+    def detect_format(self, txn_file: UploadedFile) -> str:
+        """
+        Return format of txn file from its content, falling back to file extension
+        """
+        if txn_file is None:
+            raise TxnFileFormatError("No file uploaded")
+        header = txn_file.read(self.HEADER_SIZE)
+        txn_file.seek(0)
+        header = header.lstrip(codecs.BOM_UTF8).lstrip().upper()
+        if header.startswith(b"%PDF"):
+            return "pdf"
+        if header.startswith(b"OFXHEADER") or b"<OFX>" in header:
+            return "ofx"
+        if header.startswith(b"!TYPE:") or header.startswith(b"!OPTION:"):
+            return "qif"
+        extension = os.path.splitext(txn_file.name or "")[1].lower().lstrip(".")
+        if extension in self.readers:
+            return extension
+        raise TxnFileFormatError("Unsupported file type. Use PDF, CSV, OFX or QIF.")
 
     def txn_file_to_dict(self, txn_file: InMemoryUploadedFile) -> list[dict]:
         """
@@ -118,6 +218,332 @@ class TxnFileParser:
         """
         return self.pdf_parser.txn_file_to_dict(txn_file)
 
+    def iter_txns(self, txn_file: UploadedFile, file_format: str) -> Iterator[dict]:
+        """
+        Stream validated txn from a CSV, OFX or QIF file
+        """
+        reader = self.readers[file_format]()
+        text = io.TextIOWrapper(
+            txn_file.file, encoding="utf-8-sig", errors="replace", newline=""
+        )
+        try:
+            yield from reader.read(text)
+        finally:
+            # Leave uploaded file open for django to clean up
+            text.detach()
+
+
+class UserNameMap:
+    """
+    Map ids of user's rows of MODEL to their names, cached per user
+
+    Method:
+        Public:
+            - get user's map of id to name, sync or async
+            - invalidate user's cached map
+        Private:
+            - generate cache key
+            - query user's ids and names
+
+    Attribute:
+        MODEL (type[Model]): Model with user and name fields
+        CACHE_NAME (str): Name in cache key of user's map
+    """
+
+    MODEL = None
+    CACHE_NAME = None
+
+    def _gen_cache_key(self, user_id: int) -> str:
+        """Generate cache key of user's map"""
+        return f"{user_id}:{self.CACHE_NAME}"
+
+    def _query_names(self, user_id: int) -> QuerySet:
+        """Query user's ids and names"""
+        return self.MODEL.objects.filter(user_id=user_id).values_list("id", "name")
+
+    def names(self, user_id: int, required: Iterable[int] = ()) -> dict[int, str]:
+        """Get user's map of id to name, reloaded if a required id is missing"""
+        cache_key = self._gen_cache_key(user_id)
+        names = cache.get(cache_key)
+        if names is None or not names.keys() >= set(required):
+            names = dict(self._query_names(user_id))
+            cache.set(cache_key, names, timeout=1800)
+        return names
+
+    async def anames(
+        self, user_id: int, required: Iterable[int] = ()
+    ) -> dict[int, str]:
+        """Get user's map of id to name asynchronously"""
+        cache_key = self._gen_cache_key(user_id)
+        names = await async_cache.get(cache_key)
+        if names is None or not names.keys() >= set(required):
+            names = {pk: name async for pk, name in self._query_names(user_id)}
+            await async_cache.set(cache_key, names, timeout=1800)
+        return names
+
+    def invalidate(self, user_id: int) -> None:
+        """Remove user's cached map"""
+        cache.delete(self._gen_cache_key(user_id))
+
+
+class CategoryMap(UserNameMap):
+    """
+    Map user's category ids to names, cached per user
+
+    Category names are normalized before they are looked up, so names differing only in
+    case, whitespace or a known misspelling resolve to the same category.
+
+    Method:
+        Public:
+            - normalize category name
+            - resolve category names to ids, creating missing categories
+        Private:
+            - map user's lowercased category names to id and name
+    """
+
+    MODEL = Category
+    CACHE_NAME = "categories"
+    DEFAULT_NAMES = {name.lower(): name for name in DEFAULT_CATEGORIES}
+
+    def normalize(self, name: str) -> str:
+        """Collapse whitespace and use spelling of default category the name matches"""
+        name = " ".join(name.split())
+        lowered = name.lower()
+        return CATEGORY_ALIASES.get(lowered) or self.DEFAULT_NAMES.get(lowered, name)
+
+    def _by_lower_name(self, user_id: int) -> dict[str, tuple[int, str]]:
+        """Map lowercased category names of user to their id and name"""
+        return {name.lower(): (pk, name) for pk, name in self.names(user_id).items()}
+
+    def resolve(self, user_id: int, names: Iterable[str]) -> dict[str, tuple[int, str]]:
+        """Return category id and stored name of each name, creating missing categories"""
+        normalized = {name: self.normalize(name) for name in set(names)}
+        categories = self._by_lower_name(user_id)
+        missing = {
+            name.lower(): name
+            for name in normalized.values()
+            if name.lower() not in categories
+        }
+        if missing:
+            Category.objects.bulk_create(
+                [Category(user_id=user_id, name=name) for name in missing.values()],
+                ignore_conflicts=True,
+            )
+            self.invalidate(user_id)
+            categories = self._by_lower_name(user_id)
+        return {name: categories[value.lower()] for name, value in normalized.items()}
+
+
+class TagMap(UserNameMap):
+    """
+    Map user's tag ids to names, cached per user
+    """
+
+    MODEL = Tag
+    CACHE_NAME = "tags"
+
+
+class TxnImporter:
+    """
+    Insert txn parsed from a statement, skipping txn that were already imported
+
+    Each txn gets a fingerprint of user, date, amount, normalized description and the
+    occurrence index of identical txn within the import. Fingerprint has a unique index so
+    duplicate checks are done by the database with INSERT ... ON CONFLICT DO NOTHING.
+
+    Txn are copied in batches into a temporary staging table as they are consumed, so a
+    streamed file is never fully in memory, then inserted with a single statement which
+    returns inserted amounts summed by date and category for the summary cache. Category
+    names are resolved to the user's categories a batch at a time. Occurrence counts are
+    kept for the whole import, so it holds a digest and count per distinct txn, which
+    grows with the file unlike the txn themselves.
+
+    Attribute:
+        BATCH_SIZE (int): Number of txn copied to staging table at a time
+        STAGING_TABLE (str): Name of temporary staging table
+        INSERT_FIELDS (list[str]): Txn fields set on insert, other than user
+        WORD_RE (Pattern): Matches words kept in normalized description
+        created (int): Number of txn inserted by this importer
+        skipped (int): Number of duplicate txn skipped by this importer
+    """
+
+    BATCH_SIZE = 5000
+    STAGING_TABLE = "txn_import"
+    INSERT_FIELDS = [
+        "date",
+        "description",
+        "amount",
+        "category",
+        "category_ref",
+        "tags",
+        "fingerprint",
+    ]
+    WORD_RE = re.compile(r"[a-z0-9]+")
+
+    def __init__(self, user: User):
+        """
+        Initialize TxnImporter for user
+        """
+        self.user = user
+        self.created = 0
+        self.skipped = 0
+        self._occurrences = Counter()
+        self._deltas = defaultdict(Decimal)
+        self.category_map = CategoryMap()
+
+    def _normalize_description(self, description: str) -> str:
+        """Lowercase description and strip punctuation and extra whitespace"""
+        return " ".join(self.WORD_RE.findall(description.lower()))
+
+    def _fingerprint(self, txn: dict) -> str:
+        """Generate txn fingerprint, counting identical txn seen by this importer"""
+        identity = hashlib.sha256(
+            f"{self.user.pk}|{txn['date'].isoformat()}|{Decimal(txn['amount']):.2f}|"
+            f"{self._normalize_description(txn['description'])}".encode()
+        ).digest()
+        occurrence = self._occurrences[identity]
+        self._occurrences[identity] += 1
+        return hashlib.sha256(identity + str(occurrence).encode()).hexdigest()
+
+    def _array_literal(self, values: Iterable[int]) -> str:
+        """Format integers as Postgres array literal for COPY"""
+        return "{" + ",".join(str(value) for value in values) + "}"
+
+    def _copy_batch(self, cursor: CursorWrapper, txns: list[dict]) -> None:
+        """Copy batch of txn into staging table with their category ids"""
+        categories = self.category_map.resolve(
+            self.user.pk, (txn["category"] for txn in txns)
+        )
+        for txn in txns:
+            txn["category_ref"], txn["category"] = categories[txn["category"]]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for txn in txns:
+            writer.writerow([txn[field] for field in self.INSERT_FIELDS])
+        buffer.seek(0)
+        cursor.copy_expert(
+            # Empty descriptions and categories would otherwise be loaded as NULL
+            f"COPY {self.STAGING_TABLE} FROM STDIN WITH "
+            "(FORMAT csv, FORCE_NOT_NULL (description, category))",
+            buffer,
+        )
+
+    def insert(self, txns: Iterable[dict]) -> None:
+        """Insert validated txn, skipping duplicates"""
+        quote_name = connection.ops.quote_name
+        columns = ", ".join(
+            quote_name(Txn._meta.get_field(field).column)
+            for field in self.INSERT_FIELDS
+        )
+        fingerprint_column = quote_name(Txn._meta.get_field("fingerprint").column)
+        staged = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {self.STAGING_TABLE} (date date, "
+                "description varchar(100), amount numeric(9, 2), category varchar(100), "
+                "category_ref_id integer, tags integer[], fingerprint varchar(64)) "
+                "ON COMMIT DROP"
+            )
+            batch = []
+            for txn in txns:
+                batch.append(
+                    {
+                        **txn,
+                        "tags": self._array_literal(txn.get("tags", [])),
+                        "fingerprint": self._fingerprint(txn),
+                    }
+                )
+                if len(batch) == self.BATCH_SIZE:
+                    self._copy_batch(cursor, batch)
+                    staged += len(batch)
+                    batch = []
+            if batch:
+                self._copy_batch(cursor, batch)
+                staged += len(batch)
+            cursor.execute(
+                "WITH inserted AS ("
+                f"INSERT INTO {quote_name(Txn._meta.db_table)} "
+                f"({quote_name(Txn._meta.get_field('user').column)}, {columns}) "
+                f"SELECT %s, {columns} FROM {self.STAGING_TABLE} "
+                f"ON CONFLICT ({fingerprint_column}) DO NOTHING "
+                "RETURNING date, category, amount) "
+                "SELECT date, category, SUM(amount), COUNT(*) FROM inserted "
+                "GROUP BY date, category",
+                [self.user.pk],
+            )
+            created = 0
+            for txn_date, category, amount, count in cursor.fetchall():
+                self._deltas[(txn_date, category)] += amount
+                created += count
+            cursor.execute(f"DROP TABLE {self.STAGING_TABLE}")
+        self.created += created
+        self.skipped += staged - created
+
+    def summary_deltas(self) -> list[tuple[date, Decimal, str]]:
+        """Return inserted amounts summed by date and category"""
+        return [
+            (txn_date, amount, category)
+            for (txn_date, category), amount in self._deltas.items()
+        ]
+
+
+class StreamTxnImporter(TxnImporter):
+    """
+    Insert txn read from the txn ingest stream
+
+    Txn are fingerprinted by their stream entry and index in it instead of their values,
+    so txn of a replayed entry are skipped while identical txn of other entries aren't.
+    """
+
+    def _fingerprint(self, txn: dict) -> str:
+        """Generate txn fingerprint from its stream entry id and index"""
+        return hashlib.sha256(
+            f"{self.user.pk}|{txn['entry_id']}|{txn['index']}".encode()
+        ).hexdigest()
+
+
+def previous_period(start_date: date, end_date: date) -> tuple[date, date]:
+    """
+    Return period of same length before date range
+
+    Ranges of whole calendar months are compared with the same number of months before,
+    other ranges with the same number of days before.
+    """
+    if (
+        start_date.day == 1
+        and end_date.day == calendar.monthrange(end_date.year, end_date.month)[1]
+    ):
+        months = (
+            (end_date.year - start_date.year) * 12 + end_date.month - start_date.month
+        )
+        previous_end = start_date - timedelta(days=1)
+        total_months = previous_end.year * 12 + previous_end.month - 1 - months
+        return date(total_months // 12, total_months % 12 + 1, 1), previous_end
+    days = (end_date - start_date).days + 1
+    return start_date - timedelta(days=days), start_date - timedelta(days=1)
+
+
+def previous_year_period(start_date: date, end_date: date) -> tuple[date, date]:
+    """Return same date range a year before, Feb 29 is Feb 28"""
+
+    def year_before(day: date) -> date:
+        last_day = calendar.monthrange(day.year - 1, day.month)[1]
+        return day.replace(year=day.year - 1, day=min(day.day, last_day))
+
+    return year_before(start_date), year_before(end_date)
+
+
+COMPARE_PERIODS = {"previous": previous_period, "year": previous_year_period}
+
+
+def change(current: Decimal, previous: Decimal) -> dict[str, Optional[Decimal]]:
+    """Return absolute and percent change, percent is None if previous is 0"""
+    absolute = round(current - previous, 2)
+    percent = None
+    if previous:
+        percent = (absolute * 100 / abs(previous)).quantize(Decimal("0.1"))
+    return {"absolute": absolute, "percent": percent}
+
 
 class SummaryCache:
     """
@@ -125,53 +551,117 @@ class SummaryCache:
 
     Method:
         Public:
-            - get txn summary for date range
+            - get txn summary for date range, sync or async
+            - get txn summaries of many date ranges, async
+            - get txn summary of date range compared with a previous period, async
+            - calculate txn summary of tagged txn for date range, async
             - update txn summaries with input txn
+            - invalidate user's cached txn summaries
+            - generate user's summary events channel
         Private:
             - generate summary cache key
+            - generate cache key of user's set of summary cache keys
+            - publish summary event
             - save data to cache
-            - save summary cache key to cache key set
+            - save summary cache key to user's cache key set
             - calculate summary from database
+            - calculate summaries of many date ranges from database in one query
 
-    Attribute:
-        SUMMARY_CACHE_KEY_LIST (str): Cache key for set of summary cache keys
+    Each user has their own set of summary cache keys, which expires with their summaries.
+    Keys of expired summaries are removed from the set on update.
+
+    Totals are grouped by category id and named with the user's cached category map. Txn
+    not yet backfilled with a category id are grouped by their normalized category name.
+    Summaries are calculated on a read replica unless the user wrote recently.
+
+    Every update publishes the txn deltas and the cached summaries they changed to the
+    user's summary events channel once the write commits, so clients don't have to poll
+    for summaries after each write.
 
     To Do:
-        - clean up cache key list if associated cache does not exist
-        - current update does not take in old data, therefore two cache access to update: remove
-        old txn details and add new txn details. Improve so only 1 cache access is required
         - error checking
         - add locks
 
     """
 
-    SUMMARY_CACHE_MAP = "filter"
+    def __init__(self):
+        """
+        Initialize SummaryCache
+        """
+        self.category_map = CategoryMap()
 
     def _gen_summary_cache_key(self, user: str, start_date: str, end_date: str) -> str:
         """Generate txn summary cache key"""
         return f"{user}:summary:{start_date}:{end_date}"
 
+    def _gen_summary_keys_cache_key(self, user: str) -> str:
+        """Generate cache key of user's set of txn summary cache keys"""
+        return f"{user}:summary_keys"
+
     def _save_to_cache(self, cache_key: str, data: Any) -> None:
         """Save to data to cache"""
         cache.set(cache_key, data, timeout=1800)
 
     def _save_summary_cache_key(self, user: str, cache_key: str) -> None:
-        """Add txn summary cache key to cache key set"""
-        summary_cache_map = cache.get(self.SUMMARY_CACHE_MAP) or {}
-        summary_cache_map.setdefault(user, set()).add(cache_key)
-        cache.set(self.SUMMARY_CACHE_MAP, summary_cache_map, timeout=1800)
+        """Add txn summary cache key to user's cache key set"""
+        keys_cache_key = self._gen_summary_keys_cache_key(user)
+        summary_cache_keys = cache.get(keys_cache_key) or set()
+        summary_cache_keys.add(cache_key)
+        cache.set(keys_cache_key, summary_cache_keys, timeout=1800)
 
-    def _calc_summary(
-        self, user: User, start_date: date, end_date: date
-    ) -> dict[str, Any]:
-        """Calculate the txn summary within date range from database"""
-        txns = user.txns.filter(date__gte=start_date, date__lte=end_date)
+    async def _asave_to_cache(self, cache_key: str, data: Any) -> None:
+        """Save to data to cache asynchronously"""
+        await async_cache.set(cache_key, data, timeout=1800)
 
-        total = round(txns.aggregate(total=Sum("amount"))["total"] or Decimal(0.00), 2)
-        total_by_cat = txns.values("category").annotate(total=Sum("amount"))
-        category_totals = {
-            item["category"]: round(item["total"], 2) for item in total_by_cat
-        }
+    async def _asave_summary_cache_key(self, user: str, cache_key: str) -> None:
+        """Add txn summary cache key to user's cache key set asynchronously"""
+        await self._asave_summary_cache_keys(user, [cache_key])
+
+    async def _asave_summary_cache_keys(
+        self, user: str, cache_keys: Iterable[str]
+    ) -> None:
+        """Add txn summary cache keys to user's cache key set asynchronously"""
+        keys_cache_key = self._gen_summary_keys_cache_key(user)
+        summary_cache_keys = await async_cache.get(keys_cache_key) or set()
+        summary_cache_keys.update(cache_keys)
+        await async_cache.set(keys_cache_key, summary_cache_keys, timeout=1800)
+
+    def _category_totals(
+        self, user: User, start_date: date, end_date: date, **filters
+    ) -> QuerySet:
+        """Query txn totals by category id within date range"""
+        txns = user.txns.filter(date__gte=start_date, date__lte=end_date, **filters)
+        return txns.values("category_ref").annotate(total=Sum("amount"))
+
+    def _unresolved_totals(
+        self, user: User, start_date: date, end_date: date, **filters
+    ) -> QuerySet:
+        """Query totals by category name of txn not yet backfilled with a category id"""
+        txns = user.txns.filter(
+            date__gte=start_date,
+            date__lte=end_date,
+            category_ref__isnull=True,
+            **filters,
+        )
+        return txns.values("category").annotate(total=Sum("amount"))
+
+    def _build_summary(
+        self,
+        start_date: date,
+        end_date: date,
+        total_by_cat: Iterable[dict],
+        names: dict[int, str],
+        unresolved_by_cat: Iterable[dict] = (),
+    ) -> dict[str, Any]:
+        """Build txn summary from category totals, total is the sum of categories"""
+        totals = defaultdict(Decimal)
+        for item in total_by_cat:
+            if item["category_ref"] is not None:
+                totals[names[item["category_ref"]]] += item["total"]
+        for item in unresolved_by_cat:
+            totals[self.category_map.normalize(item["category"])] += item["total"]
+        category_totals = {name: round(total, 2) for name, total in totals.items()}
+        total = round(sum(category_totals.values(), Decimal(0.00)), 2)
 
         return {
             "date_range": [start_date, end_date],
@@ -179,40 +669,656 @@ class SummaryCache:
             "total_by_cat": category_totals,
         }
 
+    def _calc_summary(
+        self, user: User, start_date: date, end_date: date, **filters
+    ) -> dict[str, Any]:
+        """Calculate the txn summary within date range from database"""
+        with timed("calc_summary"), replica_reads(user.pk):
+            total_by_cat = list(
+                self._category_totals(user, start_date, end_date, **filters)
+            )
+            ids = {item["category_ref"] for item in total_by_cat}
+            names = self.category_map.names(user.pk, required=ids - {None})
+            unresolved_by_cat = []
+            if None in ids:
+                unresolved_by_cat = self._unresolved_totals(
+                    user, start_date, end_date, **filters
+                )
+            return self._build_summary(
+                start_date, end_date, total_by_cat, names, unresolved_by_cat
+            )
+
+    async def _acalc_summary(
+        self, user: User, start_date: date, end_date: date, **filters
+    ) -> dict[str, Any]:
+        """Calculate the txn summary within date range from database asynchronously"""
+        async with areplica_reads(user.pk):
+            with timed("calc_summary"):
+                total_by_cat = [
+                    item
+                    async for item in self._category_totals(
+                        user, start_date, end_date, **filters
+                    )
+                ]
+                ids = {item["category_ref"] for item in total_by_cat}
+                names = await self.category_map.anames(user.pk, required=ids - {None})
+                unresolved_by_cat = []
+                if None in ids:
+                    unresolved_by_cat = [
+                        item
+                        async for item in self._unresolved_totals(
+                            user, start_date, end_date, **filters
+                        )
+                    ]
+                return self._build_summary(
+                    start_date, end_date, total_by_cat, names, unresolved_by_cat
+                )
+
+    def _range_totals(
+        self, user: User, ranges: list[tuple[date, date]]
+    ) -> list[tuple[int, Optional[int], Optional[str], Decimal]]:
+        """
+        Query txn totals by range and category of many date ranges in one query
+
+        Ranges are joined to txn as a VALUES list, so txn within the span of all ranges
+        are read once and summed per range they are in. Txn not yet backfilled with a
+        category id are grouped by category name, others only by category id.
+        """
+        quote_name = connection.ops.quote_name
+
+        def column(field: str) -> str:
+            return f"t.{quote_name(Txn._meta.get_field(field).column)}"
+
+        date_column = column("date")
+        category_ref = column("category_ref")
+        values = ", ".join(["(%s, %s::date, %s::date)"] * len(ranges))
+        params = [
+            value
+            for i, (start_date, end_date) in enumerate(ranges)
+            for value in (i, start_date, end_date)
+        ]
+        params += [
+            user.pk,
+            min(start_date for start_date, _ in ranges),
+            max(end_date for _, end_date in ranges),
+        ]
+        # Raw queries aren't routed, use the database reads of Txn are routed to
+        with connections[router.db_for_read(Txn)].cursor() as cursor:
+            cursor.execute(
+                f"SELECT r.i, {category_ref}, "
+                f"CASE WHEN {category_ref} IS NULL THEN {column('category')} END, "
+                f"SUM({column('amount')}) "
+                f"FROM {quote_name(Txn._meta.db_table)} t "
+                f"JOIN (VALUES {values}) AS r (i, start_date, end_date) "
+                f"ON {date_column} BETWEEN r.start_date AND r.end_date "
+                f"WHERE {column('user')} = %s AND {date_column} BETWEEN %s AND %s "
+                "GROUP BY 1, 2, 3",
+                params,
+            )
+            return cursor.fetchall()
+
+    def _calc_summaries(
+        self, user: User, ranges: list[tuple[date, date]]
+    ) -> list[dict[str, Any]]:
+        """Calculate txn summaries of many date ranges from database in one query"""
+        with timed("calc_summaries"), replica_reads(user.pk):
+            total_by_cat = [[] for _ in ranges]
+            unresolved_by_cat = [[] for _ in ranges]
+            for i, category_ref, category, total in self._range_totals(user, ranges):
+                if category_ref is None:
+                    unresolved_by_cat[i].append({"category": category, "total": total})
+                else:
+                    total_by_cat[i].append(
+                        {"category_ref": category_ref, "total": total}
+                    )
+            ids = {item["category_ref"] for items in total_by_cat for item in items}
+            names = self.category_map.names(user.pk, required=ids)
+            return [
+                self._build_summary(
+                    start_date, end_date, total_by_cat[i], names, unresolved_by_cat[i]
+                )
+                for i, (start_date, end_date) in enumerate(ranges)
+            ]
+
     def get(self, user: User, start_date: date, end_date: date) -> dict[str, Any]:
         """Get cached txn summary or calculate if not available"""
         cache_key = self._gen_summary_cache_key(user.username, start_date, end_date)
         summary = cache.get(cache_key)
 
-        if summary is None:
+        if summary is not None:
+            SUMMARY_CACHE_HIT.inc()
+        else:
+            SUMMARY_CACHE_MISS.inc()
             summary = self._calc_summary(user, start_date, end_date)
             self._save_to_cache(cache_key, summary)
             self._save_summary_cache_key(user.username, cache_key)
         return summary
 
+    async def aget(
+        self, user: User, start_date: date, end_date: date
+    ) -> dict[str, Any]:
+        """Get cached txn summary or calculate if not available asynchronously"""
+        cache_key = self._gen_summary_cache_key(user.username, start_date, end_date)
+        summary = await async_cache.get(cache_key)
+
+        if summary is not None:
+            SUMMARY_CACHE_HIT.inc()
+        else:
+            SUMMARY_CACHE_MISS.inc()
+            summary = await self._acalc_summary(user, start_date, end_date)
+            await self._asave_to_cache(cache_key, summary)
+            await self._asave_summary_cache_key(user.username, cache_key)
+        return summary
+
+    async def aget_many(
+        self, user: User, ranges: list[tuple[date, date]]
+    ) -> list[dict[str, Any]]:
+        """
+        Get txn summaries of many date ranges asynchronously, in order of ranges
+
+        Cached summaries are read with one get_many, the rest are calculated with one query
+        and cached with one pipelined set_many.
+        """
+        cache_keys = [
+            self._gen_summary_cache_key(user.username, start_date, end_date)
+            for start_date, end_date in ranges
+        ]
+        summaries = await async_cache.get_many(list(dict.fromkeys(cache_keys)))
+        missing = {
+            cache_key: date_range
+            for cache_key, date_range in zip(cache_keys, ranges)
+            if cache_key not in summaries
+        }
+        SUMMARY_CACHE_HIT.inc(len(cache_keys) - len(missing))
+        if missing:
+            SUMMARY_CACHE_MISS.inc(len(missing))
+            calculated = await sync_to_async(self._calc_summaries)(
+                user, list(missing.values())
+            )
+            calculated = dict(zip(missing, calculated))
+            await async_cache.set_many(calculated, timeout=1800)
+            await self._asave_summary_cache_keys(user.username, calculated)
+            summaries.update(calculated)
+        return [summaries[cache_key] for cache_key in cache_keys]
+
+    async def aget_comparison(
+        self, user: User, start_date: date, end_date: date, compare: str
+    ) -> dict[str, Any]:
+        """
+        Get txn summary of date range and of period to compare with, and their change
+
+        compare is a key of COMPARE_PERIODS. Both summaries are read and calculated
+        together by aget_many and cached like any summary, so they stay up to date as txn
+        change. Change is calculated per category from the two summaries.
+        """
+        previous_range = COMPARE_PERIODS[compare](start_date, end_date)
+        current, previous = await self.aget_many(
+            user, [(start_date, end_date), previous_range]
+        )
+        categories = list(
+            dict.fromkeys([*current["total_by_cat"], *previous["total_by_cat"]])
+        )
+        return {
+            "current": current,
+            "previous": previous,
+            "total_change": change(current["total"], previous["total"]),
+            "change_by_cat": {
+                category: change(
+                    current["total_by_cat"].get(category, Decimal("0.00")),
+                    previous["total_by_cat"].get(category, Decimal("0.00")),
+                )
+                for category in categories
+            },
+        }
+
+    async def aget_tagged(
+        self,
+        user: User,
+        start_date: date,
+        end_date: date,
+        any_tags: Optional[list[int]] = None,
+        all_tags: Optional[list[int]] = None,
+    ) -> dict[str, Any]:
+        """
+        Calculate txn summary of txn with any of any_tags and all of all_tags asynchronously
+
+        Not cached, cached summaries are only updated by txn date. Tag filters are answered
+        by the GIN index on tags.
+        """
+        filters = {}
+        if any_tags:
+            filters["tags__overlap"] = any_tags
+        if all_tags:
+            filters["tags__contains"] = all_tags
+        return await self._acalc_summary(user, start_date, end_date, **filters)
+
+    def _apply_txn(
+        self, summary: dict[str, Any], amount: Decimal, category_name: str
+    ) -> None:
+        """Apply txn amount to summary totals"""
+        summary["total"] = round(summary["total"] + amount, 2)
+        if category_name in summary["total_by_cat"]:
+            summary["total_by_cat"][category_name] = round(
+                summary["total_by_cat"][category_name] + amount, 2
+            )
+        else:
+            summary["total_by_cat"][category_name] = amount
+        if summary["total_by_cat"][category_name] <= 0:
+            summary["total_by_cat"].pop(category_name)
+
     def update(
         self, user: User, txn_date: date, amount: Decimal, category_name: str
     ) -> None:
         """Update all cached txn summary with txn."""
-        # Get set all cached txn summary keys
-        summary_cache_map = cache.get(self.SUMMARY_CACHE_MAP)
-        if summary_cache_map is None or user.username not in summary_cache_map:
+        self.update_many(user, [(txn_date, amount, category_name)])
+
+    def gen_events_channel(self, user: str) -> str:
+        """Generate channel of user's summary events"""
+        return f"{user}:summary_events"
+
+    def _publish(
+        self,
+        user: User,
+        txns: list[tuple[date, Decimal, str]],
+        summaries: list[dict[str, Any]],
+    ) -> None:
+        """Publish txn deltas and changed summaries once the write is committed"""
+        event = json.dumps(
+            {
+                "txns": [
+                    {"date": txn_date, "amount": amount, "category": category_name}
+                    for txn_date, amount, category_name in txns
+                ],
+                "summaries": summaries,
+            },
+            cls=DjangoJSONEncoder,
+        )
+        channel = self.gen_events_channel(user.username)
+        # Otherwise a subscriber could fetch data the write hasn't committed yet
+        transaction.on_commit(lambda: publish(channel, event))
+
+    def update_many(
+        self, user: User, txns: Iterable[tuple[date, Decimal, str]]
+    ) -> None:
+        """Update all cached txn summary with many txn, one cache access per summary"""
+        txns = list(txns)
+        if not txns:
             return
-        for summary_cache_key in summary_cache_map[user.username]:
+        # Get set of user's cached txn summary keys
+        keys_cache_key = self._gen_summary_keys_cache_key(user.username)
+        summary_cache_keys = cache.get(keys_cache_key) or set()
+        expired_keys = set()
+        summaries = []
+        for summary_cache_key in summary_cache_keys:
             # Summary cache key contains start and end date
             _, _, start_date_str, end_date_str = summary_cache_key.split(":")
             start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
             end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
-            # If txn date is within current txn summary range, update
-            if not (start_date <= txn_date <= end_date):
+            # Only txn with date within current txn summary range update it
+            txns_in_range = [txn for txn in txns if start_date <= txn[0] <= end_date]
+            if not txns_in_range:
                 continue
             summary = cache.get(summary_cache_key)
-            if summary:
-                summary["total"] = round(summary["total"] + amount, 2)
-                if category_name in summary["total_by_cat"]:
-                    summary["total_by_cat"][category_name] = round(summary["total_by_cat"][category_name] + amount, 2)
-                else:
-                    summary["total_by_cat"][category_name] = amount
-                if summary["total_by_cat"][category_name] <= 0:
-                    summary["total_by_cat"].pop(category_name)
-                self._save_to_cache(summary_cache_key, summary)
+            if summary is None:
+                expired_keys.add(summary_cache_key)
+                continue
+            for _, amount, category_name in txns_in_range:
+                self._apply_txn(summary, amount, category_name)
+            self._save_to_cache(summary_cache_key, summary)
+            summaries.append(summary)
+        if expired_keys:
+            cache.set(keys_cache_key, summary_cache_keys - expired_keys, timeout=1800)
+        self._publish(user, txns, summaries)
+
+    def invalidate(self, user: User) -> None:
+        """Remove user's cached txn summaries, they are recalculated on next read"""
+        keys_cache_key = self._gen_summary_keys_cache_key(user.username)
+        summary_cache_keys = cache.get(keys_cache_key) or set()
+        cache.delete_many([*summary_cache_keys, keys_cache_key])
+
+
+class BudgetTracker:
+    """
+    Maintain spending of user's monthly budgets as txn change
+
+    Called from the same write paths as SummaryCache.update. Txn amounts are summed by
+    budget and month and added to the budget periods with a single upsert, which returns
+    the new spending so alerts of thresholds it reaches are created by the same write.
+    User's budgets are cached by category name, so writes of users without a budget of the
+    txn category don't touch the database.
+
+    Method:
+        Public:
+            - update budgets with txn
+            - update budgets with many txn
+            - initialize budget spending from existing txn
+            - invalidate user's cached budgets
+        Private:
+            - generate cache key
+            - get user's budgets by category name
+            - create alerts of thresholds reached
+    """
+
+    def _gen_cache_key(self, user_id: int) -> str:
+        """Generate cache key of user's budgets"""
+        return f"{user_id}:budgets"
+
+    def _budgets(self, user_id: int) -> dict[str, tuple[int, Decimal, list[int]]]:
+        """Get user's budget id, amount and alert thresholds by category name"""
+        cache_key = self._gen_cache_key(user_id)
+        budgets = cache.get(cache_key)
+        if budgets is None:
+            budgets = {
+                name: (pk, amount, thresholds)
+                for pk, name, amount, thresholds in Budget.objects.filter(
+                    user_id=user_id
+                ).values_list("id", "category__name", "amount", "alert_thresholds")
+            }
+            cache.set(cache_key, budgets, timeout=1800)
+        return budgets
+
+    def _create_alerts(
+        self,
+        budgets: dict[str, tuple[int, Decimal, list[int]]],
+        deltas: dict[tuple[int, date], Decimal],
+        periods: list[tuple[int, date, Decimal]],
+    ) -> None:
+        """Create alerts of thresholds the updated spending reached"""
+        budgets_by_id = {
+            pk: (amount, thresholds) for pk, amount, thresholds in budgets.values()
+        }
+        alerts = []
+        for budget_id, month, spent in periods:
+            amount, thresholds = budgets_by_id[budget_id]
+            spent_before = spent - deltas[(budget_id, month)]
+            for threshold in thresholds:
+                limit = amount * threshold / 100
+                if spent_before < limit <= spent:
+                    alerts.append(
+                        BudgetAlert(
+                            budget_id=budget_id,
+                            month=month,
+                            threshold=threshold,
+                            spent=spent,
+                        )
+                    )
+        if alerts:
+            BudgetAlert.objects.bulk_create(alerts, ignore_conflicts=True)
+
+    def update(
+        self, user: User, txn_date: date, amount: Decimal, category_name: str
+    ) -> None:
+        """Update budget of txn category with txn"""
+        self.update_many(user, [(txn_date, amount, category_name)])
+
+    def update_many(
+        self, user: User, txns: Iterable[tuple[date, Decimal, str]]
+    ) -> None:
+        """Update budgets with many txn, one upsert for all budgets and months"""
+        budgets = self._budgets(user.pk)
+        if not budgets:
+            return
+        deltas = defaultdict(Decimal)
+        for txn_date, amount, category_name in txns:
+            if category_name in budgets:
+                deltas[(budgets[category_name][0], txn_date.replace(day=1))] += amount
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        table = connection.ops.quote_name(BudgetPeriod._meta.db_table)
+        values = ", ".join(["(%s, %s, %s)"] * len(deltas))
+        params = [
+            value
+            for (budget_id, month), delta in deltas.items()
+            for value in (budget_id, month, delta)
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (budget_id, month, spent) VALUES {values} "
+                f"ON CONFLICT (budget_id, month) DO UPDATE "
+                f"SET spent = {table}.spent + EXCLUDED.spent "
+                "RETURNING budget_id, month, spent",
+                params,
+            )
+            periods = cursor.fetchall()
+        self._create_alerts(budgets, deltas, periods)
+
+    def initialize(self, budget: Budget) -> dict[date, Decimal]:
+        """Create budget periods from existing txn of its category, return spent by month"""
+        txns = budget.user.txns.filter(
+            Q(category_ref=budget.category_id)
+            | Q(category_ref__isnull=True, category=budget.category.name)
+        )
+        spent_by_month = {
+            item["month"]: item["spent"]
+            for item in txns.annotate(month=TruncMonth("date"))
+            .values("month")
+            .annotate(spent=Sum("amount"))
+        }
+        BudgetPeriod.objects.bulk_create(
+            BudgetPeriod(budget=budget, month=month, spent=spent)
+            for month, spent in spent_by_month.items()
+        )
+        return spent_by_month
+
+    def invalidate(self, user_id: int) -> None:
+        """Remove user's cached budgets"""
+        cache.delete(self._gen_cache_key(user_id))
+
+
+class TxnIngestStream:
+    """
+    Buffer txn writes in a Redis stream and flush them to the database in batches
+
+    Each ingest request appends one entry of the user's validated txn and is acknowledged
+    once Redis has it. Consumers of the stream's consumer group read batches of entries,
+    insert each user's txn with a single statement, update their budgets in the same
+    transaction and apply summary deltas summed by date and category. Entries are
+    acknowledged and deleted only after they are flushed.
+
+    Entries of a crashed consumer stay pending until another consumer claims them. Replayed
+    txn are skipped by their fingerprint, and as the crashed consumer may have committed
+    them without updating the summary cache, the user's cached summaries are dropped.
+
+    Entries delivered MAX_DELIVERIES times without being flushed, e.g. ones that always
+    fail, are moved to the dead letter stream instead of being claimed again, so they can
+    be inspected and replayed by hand.
+
+    An entry is flushed once it isn't in the stream anymore, so the writing client reads
+    its writes after its entry is flushed, or on the summary event published by the flush.
+    The stream is kept in the TXN_INGEST LOCATION Redis, apart from the cache, so cache
+    clears, evictions and version bumps never drop it. Acknowledged entries are as durable
+    as its persistence, e.g. appendonly with fsync every second.
+
+    TXN_INGEST setting:
+        LOCATION (str): Redis url of stream, should not evict keys
+        MAX_DELIVERIES (int): Deliveries of an entry before it's dead lettered
+
+    Method:
+        Public:
+            - create consumer group
+            - append user's txn
+            - return status of user's entry
+            - read new entries
+            - move entries delivered too many times to dead letter stream
+            - claim entries pending on idle consumers
+            - flush entries to database
+            - acknowledge and delete entries
+        Private:
+            - return redis client and stream key
+            - decode entry
+
+    Attribute:
+        STREAM (str): Key of stream
+        GROUP (str): Name of consumer group
+        DEAD_LETTER_STREAM (str): Key of stream of entries that failed to flush
+        DEAD_LETTER_IDS (str): Key of hash of dead lettered entry ids to their user
+        PENDING, FLUSHED, FAILED (str): Statuses of entry
+    """
+
+    STREAM = "txn_ingest"
+    GROUP = "txn_flush"
+    DEAD_LETTER_STREAM = "txn_ingest_dead"
+    DEAD_LETTER_IDS = "txn_ingest_dead_ids"
+    PENDING = "pending"
+    FLUSHED = "flushed"
+    FAILED = "failed"
+
+    _client: Optional[redis.Redis] = None
+
+    def __init__(self):
+        """
+        Initialize TxnIngestStream
+        """
+        self.summary_cache = SummaryCache()
+        self.budget_tracker = BudgetTracker()
+
+    def _stream(self) -> tuple[redis.Redis, str]:
+        """Return redis client of stream, created once per process, and key of stream"""
+        if TxnIngestStream._client is None:
+            TxnIngestStream._client = redis.Redis(
+                connection_pool=InstrumentedConnectionPool.from_url(
+                    settings.TXN_INGEST["LOCATION"]
+                )
+            )
+        return TxnIngestStream._client, self.STREAM
+
+    def _decode(self, entry_id: bytes, fields: dict) -> tuple[str, int, list[dict]]:
+        """Decode entry to its id, user id and txn"""
+        txns = json.loads(fields[b"txns"])
+        for txn in txns:
+            txn["date"] = date.fromisoformat(txn["date"])
+            txn["amount"] = Decimal(txn["amount"])
+        return entry_id.decode(), int(fields[b"user"]), txns
+
+    def create_group(self) -> None:
+        """Create consumer group reading stream from its start, and stream if missing"""
+        client, key = self._stream()
+        # Group exists once any consumer started, checked so it isn't an error reply
+        if client.exists(key) and any(
+            group["name"].decode() == self.GROUP for group in client.xinfo_groups(key)
+        ):
+            return
+        try:
+            client.xgroup_create(key, self.GROUP, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def append(self, user_id: int, txns: list[dict]) -> str:
+        """Append user's validated txn as one entry, return entry id"""
+        client, key = self._stream()
+        entry_id = client.xadd(
+            key, {"user": user_id, "txns": json.dumps(txns, cls=DjangoJSONEncoder)}
+        )
+        return entry_id.decode()
+
+    def status(self, user_id: int, entry_id: str) -> str:
+        """Return if entry of user is pending, flushed or failed and dead lettered"""
+        client, key = self._stream()
+        with client.pipeline(transaction=False) as pipe:
+            pipe.xrange(key, entry_id, entry_id, count=1)
+            pipe.hget(self.DEAD_LETTER_IDS, entry_id)
+            entries, dead_user_id = pipe.execute()
+        # Entries of other users are reported as flushed, not to reveal them
+        if entries and int(entries[0][1][b"user"]) == user_id:
+            return self.PENDING
+        if dead_user_id is not None and int(dead_user_id) == user_id:
+            return self.FAILED
+        return self.FLUSHED
+
+    def read(
+        self, consumer: str, count: int, block_ms: Optional[int] = None
+    ) -> list[tuple[str, int, list[dict]]]:
+        """Read entries not delivered to any consumer, waiting up to block_ms for some"""
+        client, key = self._stream()
+        response = client.xreadgroup(
+            self.GROUP, consumer, {key: ">"}, count=count, block=block_ms
+        )
+        return [
+            self._decode(entry_id, fields)
+            for _, entries in response or []
+            for entry_id, fields in entries
+        ]
+
+    def dead_letter(self, min_idle_ms: int, count: int) -> int:
+        """
+        Move entries idle for at least min_idle_ms and delivered MAX_DELIVERIES times to
+        the dead letter stream, return number moved
+        """
+        client, key = self._stream()
+        max_deliveries = settings.TXN_INGEST["MAX_DELIVERIES"]
+        pending = client.xpending_range(
+            key, self.GROUP, min="-", max="+", count=count, idle=min_idle_ms
+        )
+        entry_ids = [
+            entry["message_id"]
+            for entry in pending
+            if entry["times_delivered"] >= max_deliveries
+        ]
+        if not entry_ids:
+            return 0
+        with client.pipeline(transaction=False) as pipe:
+            for entry_id in entry_ids:
+                pipe.xrange(key, entry_id, entry_id, count=1)
+            entries = pipe.execute()
+        with client.pipeline() as pipe:
+            for entry_id, entry in zip(entry_ids, entries):
+                # Entry may have been deleted by a consumer that flushed it meanwhile
+                if entry:
+                    fields = entry[0][1]
+                    pipe.xadd(self.DEAD_LETTER_STREAM, {**fields, b"id": entry_id})
+                    pipe.hset(self.DEAD_LETTER_IDS, entry_id, fields[b"user"])
+            pipe.xack(key, self.GROUP, *entry_ids)
+            pipe.xdel(key, *entry_ids)
+            pipe.execute()
+        return sum(1 for entry in entries if entry)
+
+    def claim(
+        self, consumer: str, min_idle_ms: int, count: int
+    ) -> list[tuple[str, int, list[dict]]]:
+        """Claim entries pending on consumers idle for at least min_idle_ms"""
+        client, key = self._stream()
+        _, entries, *_ = client.xautoclaim(
+            key, self.GROUP, consumer, min_idle_time=min_idle_ms, count=count
+        )
+        return [
+            self._decode(entry_id, fields) for entry_id, fields in entries if fields
+        ]
+
+    def flush(self, entries: list[tuple[str, int, list[dict]]]) -> int:
+        """Insert txn of entries and update summaries and budgets, return created count"""
+        txns_by_user = defaultdict(list)
+        for entry_id, user_id, txns in entries:
+            for index, txn in enumerate(txns):
+                txns_by_user[user_id].append(
+                    {**txn, "entry_id": entry_id, "index": index}
+                )
+        users = User.objects.in_bulk(txns_by_user)
+        created = 0
+        for user_id, txns in txns_by_user.items():
+            # Txn of users deleted since ingest are dropped
+            if user_id not in users:
+                continue
+            user = users[user_id]
+            importer = StreamTxnImporter(user)
+            with transaction.atomic():
+                importer.insert(txns)
+                self.budget_tracker.update_many(user, importer.summary_deltas())
+            # Writing client reads its txn from the primary while replicas catch up
+            mark_written(user_id)
+            if importer.skipped:
+                # Replayed, summaries may or may not have the committed txn
+                self.summary_cache.invalidate(user)
+            else:
+                self.summary_cache.update_many(user, importer.summary_deltas())
+            created += importer.created
+        return created
+
+    def ack(self, entry_ids: list[str]) -> None:
+        """Acknowledge and delete flushed entries"""
+        client, key = self._stream()
+        with client.pipeline() as pipe:
+            pipe.xack(key, self.GROUP, *entry_ids)
+            pipe.xdel(key, *entry_ids)
+            pipe.execute()
@@ -0,0 +1,141 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from redis.commands.core import Script
+from redis.exceptions import RedisError
+from rest_framework.request import Request
+from rest_framework.throttling import BaseThrottle
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+# Refill bucket for time passed since last call, then take cost tokens if there are enough.
+# Returns if allowed and seconds until enough tokens, as a string since Lua numbers are
+# truncated to integers in replies. Redis time is used so workers agree on the clock.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated")
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / rate
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "updated", tostring(now))
+redis.call("PEXPIRE", KEYS[1], math.ceil(burst / rate * 1000))
+return {allowed, tostring(wait)}
+"""
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(rate: str) -> float:
+    """Parse rate such as '100/hour' into tokens per second"""
+    num, period = rate.split("/")
+    return int(num) / PERIODS[period]
+
+
+class TokenBucketThrottle(BaseThrottle, ABC):
+    """
+    Token bucket rate limit kept in Redis so it is shared by every worker
+
+    Buckets are configured by the throttle scope of the view in the THROTTLE_BUCKETS
+    setting, under the kind of throttle (USER or IP). A request takes the number of tokens
+    returned by the view's get_throttle_cost, 1 if it has none, and the refill and take are
+    a single Lua script call. Views without a bucket for the scope and kind are not limited.
+    If Redis is unavailable requests are allowed, as rejecting them would take the
+    endpoints down with it.
+
+    Attribute:
+        kind (str): Key of bucket config under the scope, set by subclasses
+    """
+
+    kind = None
+    _script: Optional[Script] = None
+
+    def __init__(self):
+        """
+        Initialize TokenBucketThrottle
+        """
+        self._wait = None
+
+    @staticmethod
+    def script() -> Script:
+        """Return token bucket script, registered once, called with EVALSHA"""
+        if TokenBucketThrottle._script is None:
+            TokenBucketThrottle._script = get_redis_connection().register_script(
+                TOKEN_BUCKET_SCRIPT
+            )
+        return TokenBucketThrottle._script
+
+    @abstractmethod
+    def get_bucket_ident(self, request: Request) -> Optional[str]:
+        """Return identity the bucket belongs to, None to not limit request"""
+
+    def allow_request(self, request: Request, view: APIView) -> bool:
+        """Take request cost from bucket, return False if there are not enough tokens"""
+        scope = getattr(view, "throttle_scope", None)
+        config = settings.THROTTLE_BUCKETS.get(scope, {}).get(self.kind)
+        if config is None:
+            return True
+        ident = self.get_bucket_ident(request)
+        if ident is None:
+            return True
+        cost = (
+            view.get_throttle_cost(request) if hasattr(view, "get_throttle_cost") else 1
+        )
+        # A cost over the bucket size could never be paid
+        cost = min(cost, config["BURST"])
+        key = cache.make_key(f"throttle:{scope}:{self.kind}:{ident}")
+        try:
+            allowed, wait = self.script()(
+                keys=[key], args=[parse_rate(config["RATE"]), config["BURST"], cost]
+            )
+        except RedisError as e:
+            logger.warning("Throttle %s skipped, Redis unavailable: %s", scope, e)
+            return True
+        self._wait = float(wait)
+        return bool(allowed)
+
+    def wait(self) -> Optional[float]:
+        """Return seconds until the rejected request would be allowed"""
+        return self._wait
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Token bucket per authenticated user, anonymous requests are not limited
+    """
+
+    kind = "USER"
+
+    def get_bucket_ident(self, request: Request) -> Optional[str]:
+        """Return user id"""
+        if not request.user or not request.user.is_authenticated:
+            return None
+        return str(request.user.pk)
+
+
+class IpTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Token bucket per client IP, behind NUM_PROXIES proxies as set in REST_FRAMEWORK
+    """
+
+    kind = "IP"
+
+    def get_bucket_ident(self, request: Request) -> Optional[str]:
+        """Return client IP"""
+        return self.get_ident(request)
@@ -1,10 +1,23 @@
-from core.api.views import CreateUserView, SummaryView, TxnFile, TxnViewSet
+from core.api.views import (
+    BatchSummaryView,
+    BudgetViewSet,
+    CreateUserView,
+    DbPoolStatsView,
+    MetricsView,
+    SummaryEventsView,
+    SummaryView,
+    TagViewSet,
+    TxnFile,
+    TxnViewSet,
+)
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 router = DefaultRouter()
 router.register(r"txn", TxnViewSet, basename="txn")
+router.register(r"tag", TagViewSet, basename="tag")
+router.register(r"budget", BudgetViewSet, basename="budget")
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -17,4 +30,8 @@ urlpatterns = [
     path(
         "summary/<str:start_date>/<str:end_date>", SummaryView.as_view(), name="summary"
     ),
+    path("summary/batch", BatchSummaryView.as_view(), name="summary_batch"),
+    path("summary/events", SummaryEventsView.as_view(), name="summary_events"),
+    path("db/pool/", DbPoolStatsView.as_view(), name="db_pool"),
+    path("metrics", MetricsView.as_view(), name="metrics"),
 ]
@@ -1,114 +1,326 @@
-from datetime import datetime
-
-from core.api.serializers import SummarySerializer, TxnSerializer, UserSerializer
-from core.api.services import SummaryCache, TxnFileParser
-from core.models import Txn
+import math
+import os
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import AsyncIterator
+
+from adrf.views import APIView as AsyncAPIView
+from adrf.viewsets import GenericViewSet
+from core.api.clients import ProviderUnavailableError
+from core.api.filters import TxnFilter, parse_tag_ids
+from core.api.permissions import HasMetricsToken
+from core.api.readers import TxnFileFormatError
+from core.api.serializers import (
+    BudgetAlertSerializer,
+    BudgetSerializer,
+    ComparisonSerializer,
+    SummarySerializer,
+    TagSerializer,
+    TxnSerializer,
+    UserSerializer,
+)
+from core.api.services import (
+    COMPARE_PERIODS,
+    BudgetTracker,
+    SummaryCache,
+    TxnFileParser,
+    TxnImporter,
+    TxnIngestStream,
+)
+from core.api.throttling import IpTokenBucketThrottle, UserTokenBucketThrottle
+from core.cache import async_cache
+from core.db.pool import pool_stats
+from core.db.router import areplica_reads
+from core.metrics import render_metrics
+from core.models import BudgetAlert, BudgetPeriod, Tag, Txn
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DecimalField, F, Func, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import status
+from rest_framework import mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import OrderingFilter
 from rest_framework.generics import CreateAPIView
 from rest_framework.parsers import FormParser, MultiPartParser
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.viewsets import ModelViewSet
 
 
 class CreateUserView(CreateAPIView):
     """
     API view to create user
 
+    Throttled per IP as hashing the password is expensive.
+
     TODO:
-        - add throttling (please dont ddos me)
         - setup unique email
         - password reset
         - captcha
     """
 
     serializer_class = UserSerializer
+    throttle_classes = [IpTokenBucketThrottle]
+    throttle_scope = "user_create"
 
 
-class TxnViewSet(ModelViewSet):
+class TxnViewSet(
+    mixins.CreateModelMixin,
+    mixins.UpdateModelMixin,
+    mixins.DestroyModelMixin,
+    GenericViewSet,
+):
     """
     ViewSet for CRUD txn
 
+    List and retrieve are async so reads don't hold a worker thread while waiting on the
+    database, and read from a replica unless the user wrote recently. Writes are sync.
+
     For bulk txn:
-        - can handle filtering by date and amount.
+        - can handle filtering by date, amount and any or all of a set of tags.
         - can order by amount and date.
 
+    High rate writers such as card sync integrations post one txn or a list of txn to
+    ingest, which queues them on the txn ingest stream and responds once queued, with the
+    entry id. The entry's txn are visible once ingest/<id> returns flushed.
+
+    Attribute:
+        MAX_INGEST (int): Most txn in one ingest request
+
     TODO:
         - add pagination
     """
 
     serializer_class = TxnSerializer
     filter_backends = [DjangoFilterBackend, OrderingFilter]
-    filterset_fields = {
-        "amount": ["exact", "gte", "lte"],
-        "date": ["exact", "gte", "lte"],
-    }
+    filterset_class = TxnFilter
     ordering_fields = ["amount", "date"]
     ordering = ["-date"]
     permission_classes = [IsAuthenticated]
 
+    MAX_INGEST = 500
+
     summary_cache = SummaryCache()
+    budget_tracker = BudgetTracker()
+    ingest_stream = TxnIngestStream()
 
     def get_queryset(self):
         return self.request.user.txns.all()
 
+    async def list(self, request: Request, *args, **kwargs) -> Response:
+        """List txn asynchronously"""
+        queryset = self.filter_queryset(self.get_queryset())
+        async with areplica_reads(request.user.pk):
+            txns = [txn async for txn in queryset]
+        serializer = self.get_serializer(txns, many=True)
+        return Response(serializer.data)
+
+    async def retrieve(self, request: Request, *args, **kwargs) -> Response:
+        """Retrieve txn asynchronously"""
+        async with areplica_reads(request.user.pk):
+            instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+
+    @transaction.atomic
     def perform_create(self, serializer: TxnSerializer) -> None:
-        """Create a new txn and update the summary cache"""
+        """Create a new txn and update the summary cache and budgets"""
         serializer.save(user=self.request.user)
-        self.summary_cache.update(
-            self.request.user,
-            serializer.validated_data["date"],
-            serializer.validated_data["amount"],
-            serializer.validated_data["category"],
+        # Instance has the category name as stored, which may differ from the input
+        txn = (
+            serializer.instance.date,
+            serializer.instance.amount,
+            serializer.instance.category,
         )
+        self.summary_cache.update(self.request.user, *txn)
+        self.budget_tracker.update(self.request.user, *txn)
 
+    @transaction.atomic
     def perform_update(self, serializer: TxnSerializer) -> None:
-        """Update an existing txn and update the summary cache"""
-        # Update summary cache to remove old txn values
-        # TO DO: Update logic to remove two cache access
-        self.summary_cache.update(
-            self.request.user,
+        """Update an existing txn and update the summary cache and budgets"""
+        old_txn = (
             serializer.instance.date,
             -1 * serializer.instance.amount,
             serializer.instance.category,
         )
         serializer.save(user=self.request.user)
-        # Update summary cache to add new txn values
-        self.summary_cache.update(
-            self.request.user,
+        new_txn = (
             serializer.instance.date,
             serializer.instance.amount,
             serializer.instance.category,
         )
+        # Remove old txn values and add new ones with one access per cached summary
+        self.summary_cache.update_many(self.request.user, [old_txn, new_txn])
+        self.budget_tracker.update_many(self.request.user, [old_txn, new_txn])
 
+    @transaction.atomic
     def perform_destroy(self, instance: Txn) -> None:
-        """Delete txn from DB and update the summary cache"""
+        """Delete txn from DB and update the summary cache and budgets"""
         instance.delete()
-        self.summary_cache.update(
-            self.request.user, instance.date, -1 * instance.amount, instance.category
+        txn = (instance.date, -1 * instance.amount, instance.category)
+        self.summary_cache.update(self.request.user, *txn)
+        self.budget_tracker.update(self.request.user, *txn)
+
+    @action(detail=False, methods=["post"])
+    def ingest(self, request: Request) -> Response:
+        """Validate txn and queue them on the ingest stream to be flushed in a batch"""
+        many = isinstance(request.data, list)
+        if many and not 0 < len(request.data) <= self.MAX_INGEST:
+            return Response(
+                {"error": f"Ingest 1 to {self.MAX_INGEST} txn."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        serializer = self.get_serializer(data=request.data, many=many)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        txns = serializer.validated_data if many else [serializer.validated_data]
+        entry_id = self.ingest_stream.append(request.user.pk, txns)
+        return Response(
+            {"id": entry_id, "queued": len(txns)}, status=status.HTTP_202_ACCEPTED
+        )
+
+    @action(detail=False, url_path=r"ingest/(?P<entry_id>[0-9]+-[0-9]+)")
+    def ingest_status(self, request: Request, entry_id: str) -> Response:
+        """Return whether txn of ingest entry are flushed to the database or failed"""
+        entry_status = self.ingest_stream.status(request.user.pk, entry_id)
+        return Response(
+            {
+                "id": entry_id,
+                "flushed": entry_status == TxnIngestStream.FLUSHED,
+                "failed": entry_status == TxnIngestStream.FAILED,
+            }
+        )
+
+
+class TagViewSet(
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
+    mixins.UpdateModelMixin,
+    mixins.DestroyModelMixin,
+    GenericViewSet,
+):
+    """
+    ViewSet for CRUD tags
+
+    Deleting a tag removes it from the user's txn.
+    """
+
+    serializer_class = TagSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return self.request.user.tags.all()
+
+    def perform_create(self, serializer: TagSerializer) -> None:
+        """Create a new tag for the user"""
+        serializer.save(user=self.request.user)
+
+    @transaction.atomic
+    def perform_destroy(self, instance: Tag) -> None:
+        """Remove tag from the user's txn and delete it"""
+        self.request.user.txns.filter(tags__contains=[instance.pk]).update(
+            tags=Func(F("tags"), Value(instance.pk), function="array_remove")
         )
+        instance.delete()
+
+
+class BudgetViewSet(
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
+    mixins.UpdateModelMixin,
+    mixins.DestroyModelMixin,
+    GenericViewSet,
+):
+    """
+    ViewSet for CRUD monthly budgets of categories and their progress
+
+    Budgets have the spent and remaining of the month in query param month, YYYY-MM, by
+    default the current month. Spent is maintained as txn change, so listing budgets reads
+    one budget period per budget however much txn history the user has.
+
+    Method:
+        Public:
+            - GET alerts of user's budgets in month
+        Private:
+            - parse month query param
+    """
+
+    serializer_class = BudgetSerializer
+    permission_classes = [IsAuthenticated]
+
+    budget_tracker = BudgetTracker()
+
+    def _month(self) -> date:
+        """Return first day of month of query param month, or of current month"""
+        month = self.request.query_params.get("month")
+        if month is None:
+            return date.today().replace(day=1)
+        try:
+            return datetime.strptime(month, "%Y-%m").date()
+        except ValueError:
+            raise ValidationError({"month": "Invalid month format. Use YYYY-MM."})
+
+    def get_queryset(self):
+        spent = BudgetPeriod.objects.filter(
+            budget=OuterRef("pk"), month=self._month()
+        ).values("spent")
+        return (
+            self.request.user.budgets.select_related("category")
+            .annotate(
+                spent=Coalesce(
+                    Subquery(spent),
+                    Value(Decimal("0.00")),
+                    output_field=DecimalField(max_digits=11, decimal_places=2),
+                )
+            )
+            .order_by("category__name")
+        )
+
+    @transaction.atomic
+    def perform_create(self, serializer: BudgetSerializer) -> None:
+        """Create a budget with the spending of its category's existing txn"""
+        budget = serializer.save(user=self.request.user)
+        spent_by_month = self.budget_tracker.initialize(budget)
+        budget.spent = spent_by_month.get(self._month(), Decimal("0.00"))
+
+    @action(detail=False)
+    def alerts(self, request: Request) -> Response:
+        """Return alerts of user's budgets in month, oldest first"""
+        alerts = (
+            BudgetAlert.objects.filter(budget__user=request.user, month=self._month())
+            .select_related("budget__category")
+            .order_by("created")
+        )
+        return Response(BudgetAlertSerializer(alerts, many=True).data)
 
 
 class TxnFile(APIView):
     """
     API endpoint for uploading a file to be parsed for tnn.
 
-    The uploaded file is processed and parsed into txn data which is serialized and saved into db
+    The uploaded file is processed and parsed into txn data which is serialized and saved into db.
+    PDF statements are parsed by AI, CSV, OFX and QIF exports are streamed and inserted in
+    batches. Txn already imported from an overlapping statement are skipped.
+
+    Throttled per user and per IP, AI parsed statements cost more of the limit.
 
     Method:
         post: Handles file upload and txn creation
-
-    TODO:
-        - currently only handles bank statement pdf. adding more formats in future
-        - need to add format type checking
+        get_throttle_cost: Returns throttle tokens taken by upload
     """
 
     parser = (MultiPartParser, FormParser)
     permission_classes = [IsAuthenticated]
+    throttle_classes = [UserTokenBucketThrottle, IpTokenBucketThrottle]
+    throttle_scope = "txnfile"
+
+    summary_cache = SummaryCache()
+    budget_tracker = BudgetTracker()
 
     def __init__(self):
         """
@@ -117,6 +329,15 @@ class TxnFile(APIView):
         self.parser = TxnFileParser()
         super().__init__()
 
+    def get_throttle_cost(self, request: Request) -> int:
+        """Return throttle tokens taken by upload from the COSTS of its file format"""
+        costs = settings.THROTTLE_BUCKETS[self.throttle_scope].get("COSTS", {})
+        try:
+            file_format = self.parser.detect_format(request.data.get("file"))
+        except TxnFileFormatError:
+            return 1
+        return costs.get(file_format, 1)
+
     def post(self, request: Request, *args, **kwargs) -> Response:
         """
         Handles POST request for uploading and parsing txn files
@@ -127,20 +348,52 @@ class TxnFile(APIView):
             **kwargs: Arbitrary keyword arguments
 
         Returns:
-            Response: Response obj with serialized txn data or error
+            Response: Response obj with count of created and skipped txn or error
         """
-        txn_file_dict = self.parser.txn_file_to_dict(request.data.get("file"))
-        serializer = TxnSerializer(data=txn_file_dict, many=True)
-        if serializer.is_valid():
-            serializer.save(user=request.user)
-            return Response(serializer.data)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        txn_file = request.data.get("file")
+        importer = TxnImporter(request.user)
+        try:
+            file_format = self.parser.detect_format(txn_file)
+            if file_format == "pdf":
+                serializer = TxnSerializer(
+                    data=self.parser.txn_file_to_dict(txn_file),
+                    many=True,
+                    context={"request": request},
+                )
+                if not serializer.is_valid():
+                    return Response(
+                        serializer.errors, status=status.HTTP_400_BAD_REQUEST
+                    )
+                txns = serializer.validated_data
+            else:
+                txns = self.parser.iter_txns(txn_file, file_format)
+            importer.insert(txns)
+        except TxnFileFormatError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ProviderUnavailableError as e:
+            return Response(
+                {"error": "Statement parsing is unavailable. Try again later."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(math.ceil(e.retry_after))},
+            )
+        self.summary_cache.update_many(request.user, importer.summary_deltas())
+        self.budget_tracker.update_many(request.user, importer.summary_deltas())
+        return Response({"created": importer.created, "skipped": importer.skipped})
 
 
-class SummaryView(APIView):
+class SummaryView(AsyncAPIView):
     """
     API endpoint that returns txn summary of a specified date range
 
+    Async so the request doesn't hold a worker thread while waiting on cache or database.
+
+    Query params tags and tags_all limit the summary to txn with any or all of the comma
+    separated tag ids. Tag filtered summaries are calculated, not cached.
+
+    Query param compare returns the summary with the summary of the previous period, of
+    the same length or whole months, or of the same dates a year before, and the change
+    of total and each category.
+
     Method:
         Public:
             - GET HTTP method to return txn summary of specified date range
@@ -153,7 +406,7 @@ class SummaryView(APIView):
 
     summary_cache = SummaryCache()
 
-    def get(self, request: Request, start_date: str, end_date: str) -> Response:
+    async def get(self, request: Request, start_date: str, end_date: str) -> Response:
         """Handle GET request to return txn summary for the specified date range"""
         try:
             start = datetime.strptime(start_date, "%Y-%m-%d").date()
@@ -163,8 +416,188 @@ class SummaryView(APIView):
                 {"error": "Invalid date format. Use YYYY-MM-DD."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        summary_data = self.summary_cache.get(request.user, start, end)
+        any_tags = request.query_params.get("tags")
+        all_tags = request.query_params.get("tags_all")
+        compare = request.query_params.get("compare")
+        if compare is not None:
+            if compare not in COMPARE_PERIODS or any_tags or all_tags:
+                return Response(
+                    {
+                        "error": "Invalid compare. Use compare=previous or compare=year, "
+                        "without tags."
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            comparison = await self.summary_cache.aget_comparison(
+                request.user, start, end, compare
+            )
+            serializer = ComparisonSerializer(data=comparison)
+            if serializer.is_valid():
+                return Response(serializer.data)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if any_tags or all_tags:
+            try:
+                summary_data = await self.summary_cache.aget_tagged(
+                    request.user,
+                    start,
+                    end,
+                    any_tags=parse_tag_ids(any_tags or ""),
+                    all_tags=parse_tag_ids(all_tags or ""),
+                )
+            except ValueError:
+                return Response(
+                    {"error": "Invalid tags. Use comma separated tag ids."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        else:
+            summary_data = await self.summary_cache.aget(request.user, start, end)
         serializer = SummarySerializer(data=summary_data)
         if serializer.is_valid():
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class BatchSummaryView(AsyncAPIView):
+    """
+    API endpoint that returns txn summaries of many date ranges in one request
+
+    Ranges are repeated query params range=YYYY-MM-DD,YYYY-MM-DD and summaries are returned
+    in the same order. Cached summaries are read together and all others are calculated
+    with a single query.
+
+    Method:
+        Public:
+            - GET HTTP method to return txn summaries of specified date ranges
+
+    Attribute:
+        MAX_RANGES (int): Most ranges in one request
+    """
+
+    permission_classes = [IsAuthenticated]
+    MAX_RANGES = 12
+
+    summary_cache = SummaryCache()
+
+    async def get(self, request: Request) -> Response:
+        """Handle GET request to return txn summaries of the specified date ranges"""
+        range_params = request.query_params.getlist("range")
+        if not 0 < len(range_params) <= self.MAX_RANGES:
+            return Response(
+                {"error": f"Request 1 to {self.MAX_RANGES} ranges."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            ranges = []
+            for range_param in range_params:
+                start_date, end_date = range_param.split(",")
+                ranges.append(
+                    (
+                        datetime.strptime(start_date, "%Y-%m-%d").date(),
+                        datetime.strptime(end_date, "%Y-%m-%d").date(),
+                    )
+                )
+        except ValueError:
+            return Response(
+                {"error": "Invalid range format. Use range=YYYY-MM-DD,YYYY-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        summaries = await self.summary_cache.aget_many(request.user, ranges)
+        serializer = SummarySerializer(data=summaries, many=True)
+        if serializer.is_valid():
+            return Response(serializer.data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class SummaryEventsView(AsyncAPIView):
+    """
+    API endpoint that streams the user's summary events as Server-Sent Events
+
+    After each txn write the txn deltas and the user's cached summaries they changed are
+    sent as a summary event, so clients update their summaries without requesting them
+    again. Comment lines are sent while idle so proxies keep the connection open.
+
+    Streams end after MAX_STREAM_SECONDS and clients reconnect after RETRY_MS, so streams
+    of disconnected clients don't subscribe forever. Authenticated with the Bearer token
+    header like other endpoints, so browsers need a fetch based EventSource.
+
+    Method:
+        Public:
+            - GET HTTP method to stream summary events
+        Private:
+            - generate server-sent events of user's summary events channel
+
+    Attribute:
+        KEEPALIVE_SECONDS (int): Most seconds between messages on an idle stream
+        MAX_STREAM_SECONDS (int): Seconds before a stream ends
+        RETRY_MS (int): Milliseconds clients wait before reconnecting
+    """
+
+    permission_classes = [IsAuthenticated]
+    KEEPALIVE_SECONDS = 15
+    MAX_STREAM_SECONDS = 300
+    RETRY_MS = 1000
+
+    summary_cache = SummaryCache()
+
+    async def _events(self, channel: str) -> AsyncIterator[str]:
+        """Generate server-sent events of channel's messages until stream ends"""
+        yield f"retry: {self.RETRY_MS}\n\n"
+        end = time.monotonic() + self.MAX_STREAM_SECONDS
+        messages = async_cache.subscribe(channel, timeout=self.KEEPALIVE_SECONDS)
+        try:
+            async for message in messages:
+                if message is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"event: summary\ndata: {message}\n\n"
+                if time.monotonic() >= end:
+                    return
+        finally:
+            await messages.aclose()
+
+    async def get(self, request: Request) -> StreamingHttpResponse:
+        """Handle GET request to stream summary events of the user"""
+        channel = self.summary_cache.gen_events_channel(request.user.username)
+        response = StreamingHttpResponse(
+            self._events(channel), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        # Stop nginx from buffering events
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+class DbPoolStatsView(APIView):
+    """
+    API endpoint that returns database connection pool stats of the serving process
+
+    Stats are per process, each gunicorn worker has its own pool.
+
+    Method:
+        Public:
+            - GET HTTP method to return pool size, checkouts and wait times
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request: Request) -> Response:
+        """Handle GET request to return pool stats by database alias"""
+        return Response({"pid": os.getpid(), "pools": pool_stats()})
+
+
+class MetricsView(APIView):
+    """
+    Endpoint that returns metrics of all workers in Prometheus text format
+
+    Method:
+        Public:
+            - GET HTTP method to return request latency, query, Redis and cache metrics
+    """
+
+    authentication_classes = []
+    permission_classes = [HasMetricsToken]
+
+    def get(self, request: Request) -> HttpResponse:
+        """Handle GET request to return metrics"""
+        body, content_type = render_metrics()
+        return HttpResponse(body, content_type=content_type)
@@ -0,0 +1,311 @@
+import asyncio
+import pickle
+import time
+import weakref
+from datetime import date
+from decimal import Decimal
+from typing import Any, AsyncIterator, Optional
+
+import msgpack
+import redis
+import redis.asyncio as aioredis
+from core.metrics import record_redis_round_trip
+from django.conf import settings
+from django.core.cache import caches
+from django_redis.client import DefaultClient
+from django_redis.compressors.zlib import ZlibCompressor
+from django_redis.exceptions import CompressorError
+from django_redis.serializers.base import BaseSerializer
+
+
+class MsgpackSerializer(BaseSerializer):
+    """
+    Compact msgpack serializer for cache values
+
+    Cached summaries are mostly money amounts and dates, so Decimal with two decimal places
+    are packed as integer cents and dates as day ordinals. Sets are packed as lists. Any
+    other type msgpack can't pack exactly (e.g. tuple, datetime) falls back to pickle.
+
+    Attribute:
+        CENTS, DECIMAL, DATE, SET, PICKLE (int): msgpack extension type codes
+    """
+
+    CENTS = 1
+    DECIMAL = 2
+    DATE = 3
+    SET = 4
+    PICKLE = 127
+
+    def _default(self, value: Any) -> msgpack.ExtType:
+        """Pack value of a type msgpack doesn't support"""
+        if isinstance(value, Decimal):
+            text = str(value)
+            if text[-3:-2] == "." and "E" not in text:
+                cents = int(text[:-3] + text[-2:])
+                return msgpack.ExtType(
+                    self.CENTS,
+                    cents.to_bytes(cents.bit_length() // 8 + 1, "big", signed=True),
+                )
+            return msgpack.ExtType(self.DECIMAL, text.encode())
+        if type(value) is date:
+            return msgpack.ExtType(self.DATE, value.toordinal().to_bytes(3, "big"))
+        if type(value) in (set, frozenset):
+            return msgpack.ExtType(self.SET, self.dumps(list(value)))
+        return msgpack.ExtType(
+            self.PICKLE, pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        )
+
+    def _ext_hook(self, code: int, data: bytes) -> Any:
+        """Unpack value packed by _default"""
+        if code == self.CENTS:
+            return Decimal(int.from_bytes(data, "big", signed=True)).scaleb(-2)
+        if code == self.DATE:
+            return date.fromordinal(int.from_bytes(data, "big"))
+        if code == self.DECIMAL:
+            return Decimal(data.decode())
+        if code == self.SET:
+            return set(self.loads(data))
+        if code == self.PICKLE:
+            return pickle.loads(data)
+        return msgpack.ExtType(code, data)
+
+    def dumps(self, value: Any) -> bytes:
+        """Pack value, strict types so subclasses such as tuple aren't packed as list"""
+        return msgpack.packb(
+            value, default=self._default, use_bin_type=True, strict_types=True
+        )
+
+    def loads(self, value: bytes) -> Any:
+        """Unpack value"""
+        return msgpack.unpackb(
+            value, ext_hook=self._ext_hook, raw=False, strict_map_key=False
+        )
+
+
+class ThresholdZlibCompressor(ZlibCompressor):
+    """
+    Zlib compressor that only compresses values above a size threshold
+
+    Small values barely shrink and cost CPU to compress, so only values longer than the
+    COMPRESS_MIN_LENGTH cache option are compressed. Compression level is the
+    COMPRESS_LEVEL cache option, level 1 is several times faster than the zlib default for
+    about the same size on cache payloads.
+    """
+
+    def __init__(self, options: dict):
+        """
+        Initialize ThresholdZlibCompressor with threshold and level from cache options
+        """
+        super().__init__(options)
+        self.min_length = options.get("COMPRESS_MIN_LENGTH", 256)
+        self.preset = options.get("COMPRESS_LEVEL", 1)
+
+    def decompress(self, value: bytes) -> bytes:
+        """Decompress value, skip zlib when value doesn't start with a zlib header"""
+        # Every zlib stream starts with 0x78, packed values never do as django-redis stores
+        # ints (msgpack 0x78 is int 120) without serializing them
+        if value[:1] != b"\x78":
+            raise CompressorError("Value is not compressed")
+        return super().decompress(value)
+
+
+class InstrumentedConnection(redis.Connection):
+    """
+    Redis connection that records round trips on request metrics
+
+    A round trip is timed from the last command sent, or the last response read for
+    pipelines, to its response being read.
+    """
+
+    _sent_at = 0.0
+    _command = None
+
+    def send_command(self, *args, **kwargs) -> None:
+        """Send single command, its name is recorded with the round trip"""
+        self._command = args[0]
+        super().send_command(*args, **kwargs)
+
+    def send_packed_command(self, *args, **kwargs) -> None:
+        """Send command and start timing round trip"""
+        self._sent_at = time.perf_counter()
+        super().send_packed_command(*args, **kwargs)
+
+    def read_response(self, *args, **kwargs) -> Any:
+        """Read response and record round trip"""
+        response = super().read_response(*args, **kwargs)
+        now = time.perf_counter()
+        record_redis_round_trip(now - self._sent_at, self._command)
+        self._sent_at = now
+        self._command = None
+        return response
+
+
+class AsyncInstrumentedConnection(aioredis.Connection):
+    """
+    Asyncio Redis connection that records round trips on request metrics
+
+    Timed the same way as InstrumentedConnection.
+    """
+
+    _sent_at = 0.0
+    _command = None
+
+    async def send_command(self, *args, **kwargs) -> None:
+        """Send single command, its name is recorded with the round trip"""
+        self._command = args[0]
+        await super().send_command(*args, **kwargs)
+
+    async def send_packed_command(self, *args, **kwargs) -> None:
+        """Send command and start timing round trip"""
+        self._sent_at = time.perf_counter()
+        await super().send_packed_command(*args, **kwargs)
+
+    async def read_response(self, *args, **kwargs) -> Any:
+        """Read response and record round trip"""
+        response = await super().read_response(*args, **kwargs)
+        now = time.perf_counter()
+        record_redis_round_trip(now - self._sent_at, self._command)
+        self._sent_at = now
+        self._command = None
+        return response
+
+
+class InstrumentedConnectionPool(redis.ConnectionPool):
+    """
+    Redis connection pool of InstrumentedConnection, for the django-redis
+    CONNECTION_POOL_CLASS cache option
+    """
+
+    def __init__(self, **kwargs):
+        """
+        Initialize InstrumentedConnectionPool, TLS and unix socket urls keep their class
+        """
+        kwargs.setdefault("connection_class", InstrumentedConnection)
+        super().__init__(**kwargs)
+
+
+class AsyncRedisCache:
+    """
+    Async access to a django-redis cache
+
+    Keys and values are encoded by the django-redis client of the same cache, so values are
+    shared with the sync cache API. Connections are made with the same cache OPTIONS as the
+    django-redis client, e.g. password, socket timeouts and CONNECTION_POOL_KWARGS.
+    Asyncio connections can't be shared across event loops, so a connection pool is kept
+    per event loop.
+
+    Method:
+        Public:
+            - get value from cache
+            - get values of many keys from cache in one MGET
+            - set value in cache
+            - set many values in cache in one round trip
+            - subscribe to pub/sub channel
+    """
+
+    def __init__(self, alias: str = "default"):
+        """
+        Initialize AsyncRedisCache for cache alias
+        """
+        self.alias = alias
+        self._codec: Optional[DefaultClient] = None
+        self._clients = weakref.WeakKeyDictionary()
+
+    @property
+    def codec(self) -> DefaultClient:
+        """Return django-redis client used to make keys and encode values"""
+        if self._codec is None:
+            self._codec = caches[self.alias].client
+        return self._codec
+
+    def _client(self) -> aioredis.Redis:
+        """Return redis client of running event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            options = settings.CACHES[self.alias].get("OPTIONS", {})
+            pool = aioredis.ConnectionPool.from_url(
+                settings.CACHES[self.alias]["LOCATION"],
+                **self._connection_kwargs(options),
+            )
+            client = aioredis.Redis(
+                connection_pool=pool, **options.get("REDIS_CLIENT_KWARGS", {})
+            )
+            self._clients[loop] = client
+        return client
+
+    def _connection_kwargs(self, options: dict) -> dict:
+        """Return connection kwargs from cache options, as django-redis builds them"""
+        kwargs = {
+            "password": options.get("PASSWORD"),
+            "socket_timeout": options.get("SOCKET_TIMEOUT"),
+            "socket_connect_timeout": options.get("SOCKET_CONNECT_TIMEOUT"),
+        }
+        # Options django-redis leaves unset keep the redis-py defaults
+        kwargs = {name: value for name, value in kwargs.items() if value}
+        return {
+            **kwargs,
+            **options.get("CONNECTION_POOL_KWARGS", {}),
+            "connection_class": AsyncInstrumentedConnection,
+        }
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        """Get value from cache"""
+        value = await self._client().get(self.codec.make_key(key))
+        if value is None:
+            return default
+        return self.codec.decode(value)
+
+    async def set(self, key: str, value: Any, timeout: int) -> None:
+        """Set value in cache with timeout in seconds"""
+        await self._client().set(
+            self.codec.make_key(key), self.codec.encode(value), ex=timeout
+        )
+
+    async def get_many(self, keys: list[str]) -> dict[str, Any]:
+        """Get values of keys in cache, keys not in cache are left out"""
+        if not keys:
+            return {}
+        values = await self._client().mget([self.codec.make_key(key) for key in keys])
+        return {
+            key: self.codec.decode(value)
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    async def set_many(self, data: dict[str, Any], timeout: int) -> None:
+        """Set values of keys in cache with timeout in seconds, pipelined"""
+        if not data:
+            return
+        async with self._client().pipeline(transaction=False) as pipe:
+            for key, value in data.items():
+                pipe.set(self.codec.make_key(key), self.codec.encode(value), ex=timeout)
+            await pipe.execute()
+
+    async def subscribe(
+        self, channel: str, timeout: float
+    ) -> AsyncIterator[Optional[str]]:
+        """
+        Yield messages published to channel, None when no message came within timeout
+
+        The subscription holds its own connection until the iterator is closed.
+        """
+        pubsub = self._client().pubsub()
+        await pubsub.subscribe(self.codec.make_key(channel))
+        try:
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=timeout
+                )
+                yield None if message is None else message["data"].decode()
+        finally:
+            await pubsub.aclose()
+
+
+async_cache = AsyncRedisCache()
+
+
+def publish(channel: str, message: str, alias: str = "default") -> int:
+    """Publish message to channel of cache, return number of subscribers that got it"""
+    client = caches[alias].client
+    return client.get_client(write=True).publish(client.make_key(channel), message)
@@ -0,0 +1,112 @@
+from typing import Any, Optional
+
+from core.db.pool import ConnectionPool, PoolTimeoutError, get_pool
+from django.db.backends.postgresql import base, creation
+from psycopg2 import extensions
+
+
+def _check_connection(conn: Any) -> bool:
+    """Return if connection can still run a query"""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except base.Database.Error:
+        return False
+    return True
+
+
+def _reset_connection(conn: Any) -> bool:
+    """Roll back unfinished transaction, return False if connection can't be reused"""
+    if conn.closed:
+        return False
+    status = conn.info.transaction_status
+    if status == extensions.TRANSACTION_STATUS_IDLE:
+        return True
+    if status in (
+        extensions.TRANSACTION_STATUS_INTRANS,
+        extensions.TRANSACTION_STATUS_INERROR,
+    ):
+        try:
+            conn.rollback()
+        except base.Database.Error:
+            return False
+        return True
+    # Query still running or connection lost
+    return False
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """
+    Test database creation that closes pooled connections before dropping the database
+    """
+
+    def destroy_test_db(self, *args, **kwargs) -> None:
+        """Close idle pooled connections, they keep the test database from being dropped"""
+        self.connection.close()
+        pool = self.connection.pool
+        if pool is not None:
+            pool.close_idle()
+        super().destroy_test_db(*args, **kwargs)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Postgres backend that can check connections out of a process wide pool
+
+    Pooling is on when the POOL setting of the database has a MAX_SIZE, otherwise this is
+    the stock Postgres backend. Under ASGI every request runs the ORM in its own thread, so
+    connections kept by the thread (CONN_MAX_AGE) are not reused by the next request. The
+    pool is shared by all threads, closing a pooled connection returns it to the pool.
+
+    POOL setting:
+        MAX_SIZE (int): Max connections opened by the process, 0 disables the pool
+        TIMEOUT (float): Seconds to wait for a free connection
+        MAX_IDLE (float): Seconds an idle connection is kept open
+        CHECK_AFTER (float): Seconds idle before a connection is checked on checkout
+    """
+
+    creation_class = DatabaseCreation
+
+    def _create_pool(self) -> ConnectionPool:
+        """Create pool from POOL setting"""
+        options = self.settings_dict["POOL"]
+        return ConnectionPool(
+            check=_check_connection,
+            reset=_reset_connection,
+            close=lambda conn: conn.close(),
+            max_size=options["MAX_SIZE"],
+            timeout=options.get("TIMEOUT", 10.0),
+            max_idle=options.get("MAX_IDLE", 300.0),
+            check_after=options.get("CHECK_AFTER", 30.0),
+        )
+
+    @property
+    def pool(self) -> Optional[ConnectionPool]:
+        """Return pool of this database, None if pooling is off"""
+        if not (self.settings_dict.get("POOL") or {}).get("MAX_SIZE"):
+            return None
+        return get_pool(self.alias, self.settings_dict["NAME"], self._create_pool)
+
+    def get_new_connection(self, conn_params: dict) -> Any:
+        """Check out pooled connection, open one if pool has none idle"""
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        try:
+            connection = pool.getconn(
+                lambda: super(DatabaseWrapper, self).get_new_connection(conn_params)
+            )
+        except PoolTimeoutError as e:
+            raise self.Database.OperationalError(str(e)) from e
+        # Pool may be replaced while checked out, connection goes back where it came from
+        self._checkout_pool = pool
+        return connection
+
+    def _close(self) -> None:
+        """Return pooled connection to pool instead of closing it"""
+        pool = getattr(self, "_checkout_pool", None)
+        if pool is None or self.connection is None:
+            return super()._close()
+        self._checkout_pool = None
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
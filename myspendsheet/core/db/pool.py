@@ -0,0 +1,210 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+
+class PoolTimeoutError(Exception):
+    """
+    Raised when no pooled connection is free within the pool timeout
+    """
+
+
+class ConnectionPool:
+    """
+    Thread safe pool of database connections shared by every thread of the process
+
+    Connections are opened on demand up to max size. Once max size is checked out, callers
+    wait up to timeout for a connection to be returned. Idle connections are handed out most
+    recently used first, checked before reuse when they sat idle for a while, and closed once
+    idle longer than max idle.
+
+    Attribute:
+        max_size (int): Max open connections
+        timeout (float): Seconds to wait for a free connection
+        max_idle (float): Seconds an idle connection is kept open
+        check_after (float): Seconds idle before a connection is checked on checkout
+    """
+
+    def __init__(
+        self,
+        check: Callable[[Any], bool],
+        reset: Callable[[Any], bool],
+        close: Callable[[Any], None],
+        max_size: int,
+        timeout: float = 10.0,
+        max_idle: float = 300.0,
+        check_after: float = 30.0,
+    ):
+        """
+        Initialize empty ConnectionPool
+
+        check returns if an idle connection still works, reset returns a connection to a
+        reusable state and returns False if it can't be reused.
+        """
+        self.check = check
+        self.reset = reset
+        self.close = close
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.check_after = check_after
+        self._idle = deque()  # (connection, returned at), most recently returned last
+        self._size = 0
+        self._cond = threading.Condition()
+
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.timeouts = 0
+        self.discarded = 0
+
+    def _take(self) -> tuple[Any, float]:
+        """Take idle connection or a slot to open one, waiting up to timeout"""
+        start = time.monotonic()
+        waited = False
+        with self._cond:
+            while not self._idle and self._size >= self.max_size:
+                remaining = start + self.timeout - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeoutError(
+                        f"No connection free in pool of {self.max_size} "
+                        f"after {self.timeout} seconds"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+            self.checkouts += 1
+            if waited:
+                wait_time = time.monotonic() - start
+                self.waits += 1
+                self.wait_time += wait_time
+                self.max_wait_time = max(self.max_wait_time, wait_time)
+
+            if self._idle:
+                return self._idle.pop()
+            self._size += 1
+            return None, 0.0
+
+    def _release_slot(self) -> None:
+        """Free slot of a connection that was closed or failed to open"""
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def getconn(self, connect: Callable[[], Any]) -> Any:
+        """Check out a connection, open one with connect if none is idle"""
+        conn, returned_at = self._take()
+        # Checking and opening connections is slow so it's done outside the lock
+        if conn is not None and time.monotonic() - returned_at > self.check_after:
+            if not self.check(conn):
+                self._close_quietly(conn)
+                with self._cond:
+                    self.discarded += 1
+                conn = None
+        if conn is None:
+            try:
+                conn = connect()
+            except BaseException:
+                self._release_slot()
+                raise
+        return conn
+
+    def putconn(self, conn: Any) -> None:
+        """Return a checked out connection, close it if it can't be reused"""
+        if not self.reset(conn):
+            self._close_quietly(conn)
+            with self._cond:
+                self.discarded += 1
+            self._release_slot()
+            return
+
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            self._idle.append((conn, now))
+            while self._idle and now - self._idle[0][1] > self.max_idle:
+                expired.append(self._idle.popleft()[0])
+                self._size -= 1
+            self._cond.notify()
+        for expired_conn in expired:
+            self._close_quietly(expired_conn)
+
+    def _close_quietly(self, conn: Any) -> None:
+        """Close connection ignoring errors, it is being thrown away"""
+        try:
+            self.close(conn)
+        except Exception:
+            pass
+
+    def close_idle(self) -> None:
+        """Close all idle connections"""
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self) -> dict[str, Any]:
+        """Return pool size and checkout counters"""
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_time": round(self.wait_time, 6),
+                "max_wait_time": round(self.max_wait_time, 6),
+                "timeouts": self.timeouts,
+                "discarded": self.discarded,
+            }
+
+
+_pools: dict[str, tuple[str, ConnectionPool]] = {}
+_pools_pid: Optional[int] = None
+_pools_lock = threading.Lock()
+
+
+def get_pool(
+    alias: str,
+    database: str,
+    factory: Optional[Callable[[], ConnectionPool]] = None,
+) -> Optional[ConnectionPool]:
+    """
+    Return the process wide pool of database alias, created with factory on first use
+
+    Pools are per pid so forked workers never share connections with their parent. If the
+    alias now points to another database (e.g. the test database), the old pool's idle
+    connections are closed and a new pool is created.
+    """
+    global _pools_pid
+    stale = None
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            _pools.clear()
+            _pools_pid = os.getpid()
+        if alias in _pools and _pools[alias][0] != database:
+            stale = _pools.pop(alias)[1]
+        if alias not in _pools and factory is not None:
+            _pools[alias] = (database, factory())
+        pool = _pools[alias][1] if alias in _pools else None
+    if stale is not None:
+        stale.close_idle()
+    return pool
+
+
+def pool_stats() -> dict[str, dict[str, Any]]:
+    """Return stats of every pool in this process by database alias"""
+    with _pools_lock:
+        pools = dict(_pools) if _pools_pid == os.getpid() else {}
+    return {
+        alias: {"database": database, **pool.stats()}
+        for alias, (database, pool) in pools.items()
+    }
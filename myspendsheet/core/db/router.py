@@ -0,0 +1,147 @@
+import math
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Iterator, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+# Replica lag in seconds, 0 when replay has caught up with the WAL received. NULL on the
+# primary, which is never behind
+LAG_SQL = (
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+# User whose reads in the current block may go to a replica, and the database chosen
+_replica_reads: ContextVar[Optional[dict]] = ContextVar("replica_reads", default=None)
+
+
+def _gen_sticky_cache_key(user_id: int) -> str:
+    """Generate cache key marking user wrote recently"""
+    return f"{user_id}:db_sticky"
+
+
+@contextmanager
+def replica_reads(user_id: int) -> Iterator[dict]:
+    """Route reads of block to a replica, unless user wrote recently or replicas lag"""
+    reads = {"user_id": user_id, "alias": None}
+    token = _replica_reads.set(reads)
+    try:
+        yield reads
+    finally:
+        _replica_reads.reset(token)
+
+
+@asynccontextmanager
+async def areplica_reads(user_id: int) -> AsyncIterator[dict]:
+    """
+    Route reads of block to a replica like replica_reads, from async code
+
+    Managers route their queries when created, so the replica is picked in a thread up
+    front instead of by the first query in the event loop.
+    """
+    with replica_reads(user_id) as reads:
+        if settings.DATABASE_REPLICAS:
+            reads["alias"] = await sync_to_async(ReplicaRouter().pick)(user_id)
+        yield reads
+
+
+def mark_written(user_id: int) -> None:
+    """Route user's reads to the primary for the sticky window after a write"""
+    if settings.DATABASE_REPLICAS:
+        cache.set(
+            _gen_sticky_cache_key(user_id),
+            True,
+            timeout=settings.DATABASE_REPLICA_ROUTING["STICKY_SECONDS"],
+        )
+
+
+class ReplicaRouter:
+    """
+    Route reads of replica_reads blocks to a read replica, all other queries to default
+
+    Heavy reads, txn lists and summary calculations, run in replica_reads blocks of the
+    requesting user. A replica is picked at random among replicas whose lag is within
+    MAX_LAG_SECONDS, checked at most every LAG_CHECK_SECONDS per process. Unreachable
+    replicas count as lagging. Reads fall back to default when no replica is in lag, when
+    the user wrote within STICKY_SECONDS, so they see their writes, or inside a transaction
+    of default. Replicas are the DATABASE_REPLICAS aliases.
+
+    DATABASE_REPLICA_ROUTING setting:
+        STICKY_SECONDS (int): Seconds a user's reads stay on default after a write
+        MAX_LAG_SECONDS (float): Most lag of a replica reads are routed to
+        LAG_CHECK_SECONDS (float): Seconds a replica's lag is reused before checked again
+
+    Method:
+        Public:
+            - return database for read of model
+            - return database for write of model
+            - check relation is allowed
+            - check migration is allowed on database
+            - return lag of replica
+            - pick database for user's reads
+    """
+
+    _lags: dict[str, tuple[float, float]] = {}
+    _lags_lock = threading.Lock()
+
+    def replica_lag(self, alias: str) -> float:
+        """Return replica lag in seconds, inf if replica can't be reached"""
+        options = settings.DATABASE_REPLICA_ROUTING
+        now = time.monotonic()
+        with self._lags_lock:
+            checked_at, lag = self._lags.get(alias, (-math.inf, math.inf))
+            if now - checked_at < options["LAG_CHECK_SECONDS"]:
+                return lag
+            # Only this caller checks, others skip the replica until it answers, so a
+            # hung replica doesn't hold up every read for the connect timeout
+            self._lags[alias] = (now, math.inf)
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(LAG_SQL)
+                lag = float(cursor.fetchone()[0] or 0)
+        except DatabaseError:
+            lag = math.inf
+        with self._lags_lock:
+            self._lags[alias] = (now, lag)
+        return lag
+
+    def pick(self, user_id: int) -> str:
+        """Pick replica in lag for user's reads, default if none or user wrote recently"""
+        if cache.get(_gen_sticky_cache_key(user_id)):
+            return DEFAULT_DB_ALIAS
+        max_lag = settings.DATABASE_REPLICA_ROUTING["MAX_LAG_SECONDS"]
+        replicas = [
+            alias
+            for alias in settings.DATABASE_REPLICAS
+            if self.replica_lag(alias) <= max_lag
+        ]
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_read(self, model: type, **hints) -> Optional[str]:
+        reads = _replica_reads.get()
+        if reads is None or not settings.DATABASE_REPLICAS:
+            return None
+        # Uncommitted writes of the transaction are only on default
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if reads["alias"] is None:
+            reads["alias"] = self.pick(reads["user_id"])
+        return reads["alias"]
+
+    def db_for_write(self, model: type, **hints) -> Optional[str]:
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: object, obj2: object, **hints) -> Optional[bool]:
+        # Replicas have the same data as default
+        return True
+
+    def allow_migrate(self, db: str, app_label: str, **hints) -> Optional[bool]:
+        # Replicas are migrated through replication
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,82 @@
+import time
+from collections import defaultdict
+
+from core.api.services import CategoryMap, create_default_categories
+from core.models import Txn
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+
+
+class Command(BaseCommand):
+    """
+    Backfill category ids of txn stored before txn referred to categories
+
+    Txn are updated in batches in order of id, each batch in its own transaction so rows are
+    only locked briefly and a stopped backfill continues where it left off when rerun.
+    Category names are normalized on the way, so misspellings of a default category such
+    as Restuarants are stored as their default category.
+
+    Method:
+        Public:
+            - handle command
+        Private:
+            - create default categories of users without categories
+            - backfill batch of txn
+    """
+
+    help = "Backfill category ids of txn from their category names, in batches"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def _create_default_categories(self, batch_size: int) -> None:
+        """Create default categories of users created before categories existed"""
+        users = User.objects.filter(categories__isnull=True).order_by("pk")
+        while True:
+            batch = list(users[:batch_size])
+            if not batch:
+                return
+            create_default_categories(batch)
+
+    def _backfill_batch(self, category_map: CategoryMap, txns: list[Txn]) -> None:
+        """Set category id and normalized category name of batch of txn"""
+        txns_by_user = defaultdict(list)
+        for txn in txns:
+            txns_by_user[txn.user_id].append(txn)
+        for user_id, user_txns in txns_by_user.items():
+            categories = category_map.resolve(
+                user_id, (txn.category for txn in user_txns)
+            )
+            for txn in user_txns:
+                txn.category_ref_id, txn.category = categories[txn.category]
+        Txn.objects.bulk_update(txns, ["category", "category_ref"], batch_size=1000)
+
+    def handle(self, *args, **options) -> None:
+        start = time.monotonic()
+        batch_size = options["batch_size"]
+        category_map = CategoryMap()
+        self._create_default_categories(batch_size)
+        txns = (
+            Txn.objects.filter(category_ref__isnull=True)
+            .only("id", "user_id", "category")
+            .order_by("pk")
+        )
+        last_id = 0
+        backfilled = 0
+        while True:
+            with transaction.atomic():
+                batch = list(txns.filter(pk__gt=last_id)[:batch_size])
+                if not batch:
+                    break
+                self._backfill_batch(category_map, batch)
+            last_id = batch[-1].pk
+            backfilled += len(batch)
+            self.stdout.write(
+                f"Backfilled {backfilled} txn in {time.monotonic() - start:.1f}s"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Backfilled {backfilled} txn in {time.monotonic() - start:.1f}s"
+            )
+        )
@@ -0,0 +1,84 @@
+import logging
+import os
+import socket
+
+from core.api.services import TxnIngestStream
+from django.core.management.base import BaseCommand, CommandParser
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Flush txn queued on the txn ingest stream to the database
+
+    Runs as a consumer of the stream's consumer group, so any number can run side by side.
+    Entries pending on consumers idle for at least min idle time, e.g. ones that crashed
+    mid batch, are claimed and flushed before new entries. A batch is acknowledged only
+    after it is flushed, so a consumer stopped mid batch loses nothing.
+
+    A batch that fails is flushed again an entry at a time so one bad entry doesn't hold
+    back the rest. Entries that fail stay pending and are claimed again after min idle
+    time, until they are moved to the dead letter stream after MAX_DELIVERIES.
+
+    Method:
+        Public:
+            - handle command
+        Private:
+            - flush entries and return flushed entries and created count
+    """
+
+    help = "Flush txn queued on the txn ingest stream to the database in batches"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--block-ms", type=int, default=5000)
+        parser.add_argument("--min-idle-ms", type=int, default=60000)
+        parser.add_argument(
+            "--once", action="store_true", help="Exit once no entries are waiting"
+        )
+
+    def _flush(
+        self, stream: TxnIngestStream, entries: list[tuple[str, int, list[dict]]]
+    ) -> tuple[list[tuple[str, int, list[dict]]], int]:
+        """Flush entries, one at a time if the batch fails, return flushed and created"""
+        try:
+            return entries, stream.flush(entries)
+        except Exception:
+            logger.exception("Failed to flush batch of %d entries", len(entries))
+        flushed = []
+        created = 0
+        for entry in entries:
+            try:
+                # Replayed txn of entries committed before the batch failed are skipped
+                created += stream.flush([entry])
+            except Exception:
+                logger.exception("Failed to flush entry %s", entry[0])
+            else:
+                flushed.append(entry)
+        return flushed, created
+
+    def handle(self, *args, **options) -> None:
+        batch_size = options["batch_size"]
+        min_idle_ms = options["min_idle_ms"]
+        stream = TxnIngestStream()
+        stream.create_group()
+        consumer = f"{socket.gethostname()}-{os.getpid()}"
+        block_ms = None if options["once"] else options["block_ms"]
+        while True:
+            dead = stream.dead_letter(min_idle_ms, batch_size)
+            if dead:
+                self.stderr.write(f"Moved {dead} entries to dead letter stream")
+            entries = stream.claim(consumer, min_idle_ms, batch_size)
+            if not entries:
+                entries = stream.read(consumer, batch_size, block_ms)
+            if not entries:
+                if options["once"]:
+                    break
+                continue
+            flushed, created = self._flush(stream, entries)
+            if flushed:
+                stream.ack([entry_id for entry_id, _, _ in flushed])
+                self.stdout.write(
+                    f"Flushed {len(flushed)} entries, created {created} txn"
+                )
@@ -0,0 +1,112 @@
+import io
+import pstats
+import statistics
+from collections import defaultdict
+
+from core.profiling import iter_profiles, profile_dir
+from django.core.management.base import BaseCommand, CommandParser
+
+
+class Command(BaseCommand):
+    """
+    List the slowest profiled requests and aggregate them by view
+
+    Method:
+        Public:
+            - handle command
+        Private:
+            - print slowest requests
+            - print requests aggregated by view
+            - print functions of pstats profiles by cumulative time
+    """
+
+    help = "List and aggregate the slowest requests stored by ProfilingMiddleware"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--top", type=int, default=20, help="Number of requests")
+        parser.add_argument("--view", help="Only requests of view with this URL name")
+        parser.add_argument(
+            "--by-view", action="store_true", help="Aggregate requests by view"
+        )
+        parser.add_argument(
+            "--functions",
+            action="store_true",
+            help="Combine pstats profiles of the listed requests, slowest functions first",
+        )
+
+    def _print_requests(self, profiles: list[dict]) -> None:
+        """Print requests, slowest first"""
+        self.stdout.write(
+            f"{'ms':>9} {'view':<24} {'method':<7} {'status':>6} {'queries':>8} "
+            f"{'db ms':>8} {'redis':>6} {'redis ms':>9}  path, profile"
+        )
+        for profile in profiles:
+            self.stdout.write(
+                f"{profile['seconds'] * 1000:>9.1f} {profile['view']:<24} "
+                f"{profile['method']:<7} {profile['status']:>6} "
+                f"{profile['db_queries']:>8} {profile['db_seconds'] * 1000:>8.1f} "
+                f"{profile['redis_round_trips']:>6} "
+                f"{profile['redis_seconds'] * 1000:>9.1f}  {profile['path']}, "
+                f"{profile['file']}"
+            )
+
+    def _print_by_view(self, profiles: list[dict]) -> None:
+        """Print request count and latency of each view, slowest p95 first"""
+        by_view = defaultdict(list)
+        for profile in profiles:
+            by_view[profile["view"]].append(profile)
+        rows = []
+        for view, view_profiles in by_view.items():
+            latencies = sorted(profile["seconds"] * 1000 for profile in view_profiles)
+            rows.append(
+                (
+                    view,
+                    len(latencies),
+                    statistics.median(latencies),
+                    latencies[int(0.95 * (len(latencies) - 1))],
+                    latencies[-1],
+                    statistics.mean(profile["db_queries"] for profile in view_profiles),
+                )
+            )
+        self.stdout.write(
+            f"{'view':<24} {'requests':>8} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} "
+            f"{'queries':>8}"
+        )
+        for view, count, p50, p95, worst, queries in sorted(
+            rows, key=lambda row: row[3], reverse=True
+        ):
+            self.stdout.write(
+                f"{view:<24} {count:>8} {p50:>9.1f} {p95:>9.1f} {worst:>9.1f} "
+                f"{queries:>8.1f}"
+            )
+
+    def _print_functions(self, profiles: list[dict]) -> None:
+        """Print slowest functions of the combined pstats profiles"""
+        paths = [
+            profile["file"] for profile in profiles if profile["format"] == "pstats"
+        ]
+        if not paths:
+            self.stdout.write("No pstats profiles, set PROFILING FORMAT to pstats")
+            return
+        output = io.StringIO()
+        stats = pstats.Stats(*paths, stream=output)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(30)
+        self.stdout.write(output.getvalue())
+
+    def handle(self, *args, **options) -> None:
+        profiles = [
+            profile
+            for profile in iter_profiles()
+            if options["view"] is None or profile["view"] == options["view"]
+        ]
+        if not profiles:
+            self.stdout.write(f"No profiles in {profile_dir()}")
+            return
+        if options["by_view"]:
+            self._print_by_view(profiles)
+            return
+        profiles.sort(key=lambda profile: profile["seconds"], reverse=True)
+        profiles = profiles[: options["top"]]
+        self._print_requests(profiles)
+        if options["functions"]:
+            self._print_functions(profiles)
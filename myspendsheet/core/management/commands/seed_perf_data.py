@@ -0,0 +1,225 @@
+import csv
+import io
+import json
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Iterator
+from uuid import uuid4
+
+from core.api.services import create_default_categories
+from core.models import Category, Txn
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Same as test/perf/perftest_util.py, which the locust scripts read the files with
+USERNAME_PREFIX = "test_user_"
+PASSWORD = "test123"
+USER_FILE = "perftest_user.txt"
+USER_TOKEN_FILE = "perftest_user_tokens.json"
+
+# Category: (share of txn, merchants, median amount). Income is negative as spending is
+# positive
+CATEGORIES = {
+    "Groceries": (0.18, ["Safeway", "Trader Joe's", "Costco", "Whole Foods"], 60),
+    "Restaurants": (0.16, ["Chipotle", "Starbucks", "Local Diner", "Sushi Bar"], 18),
+    "Transportation": (0.09, ["Uber", "Shell", "Chevron", "Metro Transit"], 25),
+    "Entertainment": (0.07, ["Netflix", "AMC Theatres", "Spotify", "Steam"], 15),
+    "Household Items": (0.07, ["Target", "Home Depot", "IKEA"], 45),
+    "Clothing": (0.05, ["Uniqlo", "Nike", "Old Navy"], 50),
+    "Health": (0.04, ["CVS Pharmacy", "Walgreens", "Dental Care"], 40),
+    "Utilities": (0.04, ["PG&E", "Comcast", "Water Dept"], 90),
+    "Bills": (0.04, ["Verizon", "State Farm", "Geico"], 110),
+    "Hobbies": (0.04, ["REI", "Guitar Center", "Michaels"], 35),
+    "Personal": (0.04, ["Great Clips", "Venmo Payment"], 30),
+    "Pet": (0.03, ["Petco", "Chewy", "Vet Clinic"], 40),
+    "Gifts": (0.03, ["Amazon", "Etsy"], 35),
+    "Rent": (0.02, ["Property Management"], 1800),
+    "Income": (0.04, ["Payroll Deposit", "Client Payment"], -2200),
+    "Savings": (0.02, ["Transfer to Savings"], 300),
+    "Debt": (0.02, ["Credit Card Payment", "Student Loan"], 350),
+}
+
+
+class Command(BaseCommand):
+    """
+    Bulk create perf test users with txn histories and write their token files
+
+    Every user gets the same password hash, computed once, and JWT pairs are minted
+    directly instead of logging in through the API. Txn are copied in batches with COPY.
+    Each user's number of txn is skewed like real usage, a few heavy users and many light.
+
+    Method:
+        Public:
+            - handle command
+        Private:
+            - delete previously seeded users and their txn
+            - create users with default categories
+            - write user and token files
+            - generate txn rows
+            - copy txn rows in batches
+    """
+
+    help = "Seed perf test users, tokens and txn histories for the locust load tests"
+
+    BATCH_SIZE = 100000
+    TXN_COLUMNS = [
+        "user",
+        "date",
+        "description",
+        "amount",
+        "category",
+        "category_ref",
+        "tags",
+    ]
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--users", type=int, default=5000)
+        parser.add_argument("--txns", type=int, default=1000000, help="Total txn")
+        parser.add_argument(
+            "--start-date",
+            type=date.fromisoformat,
+            default=date(2025, 1, 1),
+            help="First txn date, the load tests query April 2025",
+        )
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument(
+            "--output-dir",
+            type=Path,
+            default=Path(settings.BASE_DIR).parent / "test" / "perf",
+            help="Directory to write the user and token files to",
+        )
+        parser.add_argument("--seed", type=int, default=None, help="Random seed")
+        parser.add_argument(
+            "--clear", action="store_true", help="Delete previously seeded users first"
+        )
+
+    def _clear(self) -> None:
+        """Delete previously seeded users and their txn"""
+        seeded = User.objects.filter(username__startswith=USERNAME_PREFIX)
+        # Txn has no dependents, so this is a single DELETE instead of a cascade
+        deleted, _ = Txn.objects.filter(user__in=seeded).delete()
+        users, _ = seeded.delete()
+        self.stdout.write(f"Deleted {users} users and {deleted} txn")
+
+    def _create_users(self, num_of_users: int) -> list[User]:
+        """Create users sharing one precomputed password hash, with default categories"""
+        password = make_password(PASSWORD)
+        usernames = set()
+        while len(usernames) < num_of_users:
+            usernames.add(f"{USERNAME_PREFIX}{uuid4().hex[:8]}")
+        users = [User(username=username, password=password) for username in usernames]
+        users = User.objects.bulk_create(users, batch_size=5000)
+        # bulk_create doesn't send post_save, which creates them for other users
+        create_default_categories(users)
+        return users
+
+    def _write_files(self, users: list[User], output_dir: Path) -> None:
+        """Write usernames and JWT pairs in the format of test/perf/perftest_util.py"""
+        output_dir.mkdir(parents=True, exist_ok=True)
+        tokens = {}
+        for user in users:
+            refresh = RefreshToken.for_user(user)
+            tokens[user.username] = {
+                "access": str(refresh.access_token),
+                "refresh": str(refresh),
+            }
+        (output_dir / USER_FILE).write_text(
+            "".join(f"{user.username}\n" for user in users)
+        )
+        with open(output_dir / USER_TOKEN_FILE, "w") as file:
+            json.dump(tokens, file, indent=2)
+
+    def _txn_rows(
+        self,
+        rng: random.Random,
+        users: list[User],
+        num_of_txns: int,
+        start_date: date,
+        days: int,
+    ) -> Iterator[list]:
+        """Yield txn rows in TXN_COLUMNS order"""
+        categories = list(CATEGORIES)
+        category_ids = {
+            (user_id, name): pk
+            for pk, user_id, name in Category.objects.filter(
+                user__in=users
+            ).values_list("id", "user_id", "name")
+        }
+        weights = [share for share, _, _ in CATEGORIES.values()]
+        dates = [start_date + timedelta(days=day) for day in range(days)]
+        # Lognormal activity gives a long tail of heavy users
+        activity = [rng.lognormvariate(0, 1) for _ in users]
+        total_activity = sum(activity)
+        user_txns = [int(num_of_txns * share / total_activity) for share in activity]
+        for i in rng.sample(range(len(users)), num_of_txns - sum(user_txns)):
+            user_txns[i] += 1
+        for user, num_of_user_txns in zip(users, user_txns):
+            user_categories = rng.choices(categories, weights, k=num_of_user_txns)
+            for category in user_categories:
+                _, merchants, median = CATEGORIES[category]
+                amount = Decimal(median * rng.lognormvariate(0, 0.5)).quantize(
+                    Decimal("0.01")
+                )
+                yield [
+                    user.pk,
+                    rng.choice(dates),
+                    rng.choice(merchants),
+                    amount,
+                    category,
+                    category_ids[(user.pk, category)],
+                    "{}",
+                ]
+
+    def _copy_txns(self, rows: Iterator[list]) -> int:
+        """Copy txn rows into txn table in batches, return number of rows copied"""
+        quote_name = connection.ops.quote_name
+        columns = ", ".join(
+            quote_name(Txn._meta.get_field(field).column) for field in self.TXN_COLUMNS
+        )
+        sql = f"COPY {quote_name(Txn._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv)"
+        copied = 0
+        with connection.cursor() as cursor:
+            while True:
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                batch = 0
+                for row in rows:
+                    writer.writerow(row)
+                    batch += 1
+                    if batch == self.BATCH_SIZE:
+                        break
+                if not batch:
+                    return copied
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+                copied += batch
+
+    def handle(self, *args, **options) -> None:
+        start = time.monotonic()
+        rng = random.Random(options["seed"])
+        if options["clear"]:
+            self._clear()
+        with transaction.atomic():
+            users = self._create_users(options["users"])
+            self.stdout.write(
+                f"Created {len(users)} users in {time.monotonic() - start:.1f}s"
+            )
+            rows = self._txn_rows(
+                rng, users, options["txns"], options["start_date"], options["days"]
+            )
+            copied = self._copy_txns(rows)
+            self.stdout.write(f"Copied {copied} txn in {time.monotonic() - start:.1f}s")
+        self._write_files(users, options["output_dir"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {USER_FILE} and {USER_TOKEN_FILE} to {options['output_dir']} "
+                f"in {time.monotonic() - start:.1f}s"
+            )
+        )
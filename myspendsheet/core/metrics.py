@@ -0,0 +1,227 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Iterator, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.mmap_dict import MmapedDict
+
+# Buckets cover cached reads (ms) up to AI parsing of a statement (30+ s)
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+REQUEST_LATENCY = Histogram(
+    "myspendsheet_request_duration_seconds",
+    "Request latency by view",
+    ["view", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = Counter(
+    "myspendsheet_db_queries", "Database queries run by requests", ["view"]
+)
+DB_QUERY_TIME = Counter(
+    "myspendsheet_db_query_seconds", "Database query time of requests", ["view"]
+)
+REDIS_ROUND_TRIPS = Counter(
+    "myspendsheet_redis_round_trips", "Redis round trips made by requests", ["view"]
+)
+REDIS_TIME = Counter(
+    "myspendsheet_redis_seconds", "Redis round trip time of requests", ["view"]
+)
+SUMMARY_CACHE = Counter(
+    "myspendsheet_summary_cache_requests", "Summary cache lookups", ["result"]
+)
+SUMMARY_CACHE_HIT = SUMMARY_CACHE.labels(result="hit")
+SUMMARY_CACHE_MISS = SUMMARY_CACHE.labels(result="miss")
+OPERATION_LATENCY = Histogram(
+    "myspendsheet_operation_duration_seconds",
+    "Latency of instrumented operations",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+class RequestStats:
+    """
+    Database and Redis usage of a single request
+
+    Attribute:
+        db_queries (int): Database queries run
+        db_time (float): Seconds spent in database queries
+        redis_round_trips (int): Redis responses read
+        redis_time (float): Seconds waited on Redis
+        queries (Optional[list]): SQL and seconds of each query, only kept when profiling
+        redis_commands (Optional[list]): Command and seconds of each Redis round trip, only
+            kept when profiling
+    """
+
+    __slots__ = (
+        "db_queries",
+        "db_time",
+        "redis_round_trips",
+        "redis_time",
+        "queries",
+        "redis_commands",
+    )
+
+    def __init__(self):
+        """
+        Initialize empty RequestStats
+        """
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.redis_round_trips = 0
+        self.redis_time = 0.0
+        self.queries = None
+        self.redis_commands = None
+
+
+# Context is copied into threads running sync code of the request, so queries and Redis
+# calls made there are counted on the same stats
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def record_query(
+    execute: Callable, sql: str, params: Any, many: bool, context: dict
+) -> Any:
+    """Database execute wrapper counting queries and their time on request stats"""
+    stats = request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        stats.db_queries += 1
+        stats.db_time += elapsed
+        if stats.queries is not None:
+            stats.queries.append((sql, elapsed))
+
+
+def record_redis_round_trip(elapsed: float, command: Optional[str] = None) -> None:
+    """Count Redis round trip and its time on request stats"""
+    stats = request_stats.get()
+    if stats is not None:
+        stats.redis_round_trips += 1
+        stats.redis_time += elapsed
+        if stats.redis_commands is not None:
+            stats.redis_commands.append((command or "PIPELINE", elapsed))
+
+
+HTTP_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+# Looking up labelled metrics takes a lock and validates labels, so they are cached. Labels
+# are bounded as views are URL names and unknown methods are grouped
+@lru_cache(maxsize=None)
+def _request_latency(view: str, method: str, status: int) -> Histogram:
+    """Return latency histogram of view, method and status"""
+    return REQUEST_LATENCY.labels(view, method, status)
+
+
+@lru_cache(maxsize=None)
+def _view_counters(view: str) -> tuple[Counter, Counter, Counter, Counter]:
+    """Return database and Redis counters of view"""
+    return (
+        DB_QUERIES.labels(view),
+        DB_QUERY_TIME.labels(view),
+        REDIS_ROUND_TRIPS.labels(view),
+        REDIS_TIME.labels(view),
+    )
+
+
+def observe_request(
+    view: str, method: str, status: int, elapsed: float, stats: RequestStats
+) -> None:
+    """Record latency and database and Redis usage of a request"""
+    if method not in HTTP_METHODS:
+        method = "other"
+    _request_latency(view, method, status).observe(elapsed)
+    if stats.db_queries or stats.redis_round_trips:
+        db_queries, db_query_time, redis_round_trips, redis_time = _view_counters(view)
+        db_queries.inc(stats.db_queries)
+        db_query_time.inc(stats.db_time)
+        redis_round_trips.inc(stats.redis_round_trips)
+        redis_time.inc(stats.redis_time)
+
+
+@lru_cache(maxsize=None)
+def _operation_latency(operation: str) -> Histogram:
+    """Return latency histogram of operation"""
+    return OPERATION_LATENCY.labels(operation)
+
+
+@contextmanager
+def timed(operation: str) -> Iterator[None]:
+    """Record latency of the block as operation"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _operation_latency(operation).observe(time.perf_counter() - start)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    Return metrics in Prometheus text format and its content type
+
+    Gunicorn workers each have their own metrics, they are written to files in
+    PROMETHEUS_MULTIPROC_DIR and merged here so any worker can serve all of them.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def archive_worker_metrics(pid: int, path: Optional[str] = None) -> None:
+    """
+    Add metrics of exited worker to the archive files and remove its files
+
+    Counters of exited workers must be kept, but recycled workers would otherwise leave
+    files behind that every scrape reads. Must only be called by the gunicorn master.
+    """
+    path = path or os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    for kind in ("counter", "histogram"):
+        worker_file = os.path.join(path, f"{kind}_{pid}.db")
+        if not os.path.exists(worker_file):
+            continue
+        archive = MmapedDict(os.path.join(path, f"{kind}_archive.db"))
+        try:
+            for key, value, timestamp, _ in MmapedDict.read_all_values_from_file(
+                worker_file
+            ):
+                # Histogram buckets are stored per bucket, not cumulative, so all sum
+                total = archive.read_value(key)[0] + value
+                archive.write_value(key, total, timestamp)
+        finally:
+            archive.close()
+        os.remove(worker_file)
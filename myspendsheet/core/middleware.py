@@ -0,0 +1,267 @@
+import random
+import time
+from contextvars import Token
+from typing import Any, Callable, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from core.api.authentication import CachedJWTAuthentication
+from core.db.router import mark_written
+from core.metrics import RequestStats, observe_request, request_stats
+from core.profiling import save_profile
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpRequest, HttpResponse
+from pyinstrument import Profiler
+from rest_framework.exceptions import APIException
+
+
+def view_name(request: HttpRequest) -> str:
+    """Return URL name of view, path is not used to keep the number of labels small"""
+    match = request.resolver_match
+    if match is None:
+        return "unmatched"
+    return match.view_name or match.route
+
+
+class MetricsMiddleware:
+    """
+    Record latency, database queries and Redis round trips of each request by view
+
+    Runs sync or async to match the rest of the middleware chain, so it doesn't add a
+    thread switch under ASGI. Should be first in MIDDLEWARE so the whole request is timed.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable):
+        """
+        Initialize MetricsMiddleware
+        """
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """Time request"""
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            request_stats.reset(token)
+        elapsed = time.perf_counter() - start
+        observe_request(
+            view_name(request),
+            request.method,
+            response.status_code,
+            elapsed,
+            stats,
+        )
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        """Time request asynchronously"""
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_stats.reset(token)
+        elapsed = time.perf_counter() - start
+        observe_request(
+            view_name(request),
+            request.method,
+            response.status_code,
+            elapsed,
+            stats,
+        )
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profile sampled requests and requests of staff users sending an X-Profile header
+
+    A statistical profiler samples the stack every INTERVAL seconds while the rest of the
+    chain and the view run. The profile is stored with the SQL queries and Redis commands
+    of the request, see core.profiling. Django drops the middleware unless PROFILING ENABLED
+    is set, so it costs nothing when off. Goes after MetricsMiddleware to share its request
+    stats. Under ASGI, sync code run in threads shows as time awaiting it. Views
+    authenticate users after middleware, so requests with the header are authenticated
+    here first, and ones of other users aren't profiled at all.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable):
+        """
+        Initialize ProfilingMiddleware
+        """
+        options = settings.PROFILING
+        if not options["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = options["SAMPLE_RATE"]
+        self.interval = options["INTERVAL"]
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _reason(self, request: HttpRequest) -> Optional[str]:
+        """Return why request is profiled, None if it isn't"""
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        if "x-profile" in request.headers and self._is_staff(request):
+            return "requested"
+        return None
+
+    def _is_staff(self, request: HttpRequest) -> bool:
+        """Check request is authenticated as a staff user"""
+        # Set by AuthenticationMiddleware for session users, e.g. of admin
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return user.is_staff
+        try:
+            authenticated = CachedJWTAuthentication().authenticate(request)
+        except APIException:
+            return False
+        return authenticated is not None and authenticated[0].is_staff
+
+    def _start(self) -> tuple[Profiler, RequestStats, Optional[Token]]:
+        """Start profiler and keeping queries and Redis commands on request stats"""
+        stats = request_stats.get()
+        token = None
+        if stats is None:
+            stats = RequestStats()
+            token = request_stats.set(stats)
+        stats.queries = []
+        stats.redis_commands = []
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        profiler.start()
+        return profiler, stats, token
+
+    def _meta(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        reason: str,
+        elapsed: float,
+        stats: RequestStats,
+    ) -> dict[str, Any]:
+        """Return metadata of profiled request"""
+        return {
+            "time": time.time(),
+            "view": view_name(request),
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "seconds": elapsed,
+            "reason": reason,
+            "user": request.user.pk if hasattr(request, "user") else None,
+            "db_queries": len(stats.queries),
+            "db_seconds": sum(seconds for _, seconds in stats.queries),
+            "redis_round_trips": len(stats.redis_commands),
+            "redis_seconds": sum(seconds for _, seconds in stats.redis_commands),
+        }
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """Profile request if sampled or requested"""
+        if self.async_mode:
+            return self.__acall__(request)
+        reason = self._reason(request)
+        if reason is None:
+            return self.get_response(request)
+        profiler, stats, token = self._start()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+            if token is not None:
+                request_stats.reset(token)
+        meta = self._meta(request, response, reason, time.perf_counter() - start, stats)
+        save_profile(profiler.last_session, stats, meta)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        """Profile request asynchronously if sampled or requested"""
+        if "x-profile" in request.headers:
+            # Authenticating may query the cache and database
+            reason = await sync_to_async(self._reason)(request)
+        else:
+            reason = self._reason(request)
+        if reason is None:
+            return await self.get_response(request)
+        profiler, stats, token = self._start()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.stop()
+            if token is not None:
+                request_stats.reset(token)
+        meta = self._meta(request, response, reason, time.perf_counter() - start, stats)
+        # Rendering large profiles takes a while, keep it off the event loop
+        await sync_to_async(save_profile, thread_sensitive=False)(
+            profiler.last_session, stats, meta
+        )
+        return response
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Route reads of users who just wrote to the primary database
+
+    After a successful request with an unsafe method, the user's reads stay on the primary
+    for the sticky window so they see their own writes while replicas catch up, see
+    core.db.router. The user is the one authenticated by the view. Django drops the
+    middleware when there are no DATABASE_REPLICAS, so it costs nothing without replicas.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+    def __init__(self, get_response: Callable):
+        """
+        Initialize ReplicaStickinessMiddleware
+        """
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _mark_writer(self, request: HttpRequest, response: HttpResponse) -> None:
+        """Mark user as having written if request was a successful write"""
+        if response.status_code >= 400:
+            return
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            mark_written(user.pk)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """Mark user of write request as having written"""
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if request.method not in self.SAFE_METHODS:
+            self._mark_writer(request, response)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        """Mark user of write request as having written asynchronously"""
+        response = await self.get_response(request)
+        if request.method not in self.SAFE_METHODS:
+            # User may be a lazy session user loaded from the database
+            await sync_to_async(self._mark_writer)(request, response)
+        return response
@@ -1,7 +1,57 @@
 from django.contrib.auth.models import User
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 
 
+class Category(models.Model):
+    """
+    Model representing a user's txn category
+
+    Every user starts with the default categories and gets a new one the first time a txn
+    uses a name they don't have. Txn refer to categories by integer id, so summaries group
+    by a small key and names are only looked up once per summary.
+
+    Attributes:
+        id (AutoField): 4 byte key, txn refer to categories by it
+        user (ForeignKey): owner of category
+        name (CharField): name of category, unique per user
+    """
+
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="categories")
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"], name="unique_category_name_per_user"
+            )
+        ]
+
+
+class Tag(models.Model):
+    """
+    Model representing a user's txn tag
+
+    Attributes:
+        id (AutoField): 4 byte key, txn store the ids of their tags
+        user (ForeignKey): owner of tag
+        name (CharField): name of tag, unique per user
+    """
+
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="tags")
+    name = models.CharField(max_length=50)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"], name="unique_tag_name_per_user"
+            )
+        ]
+
+
 class Txn(models.Model):
     """
     Model representing transaction (txn)
@@ -13,14 +63,22 @@ class Txn(models.Model):
         date (DateField): date of txn
         description (CharField): short description of txn
         amount (DecimalField): txn amount in $
-        category (CharField): category of txn
+        category (CharField): name of category of txn, kept until all txn have
+            category_ref
+        category_ref (ForeignKey): category of txn, null until backfilled by the
+            backfill_categories command
         source (CharField): source of txn (i.e bank, cash)
         source_name (CharField): name of source
         date_of_input (DateField): date the txn was recorded
+        fingerprint (CharField): hash identifying a txn imported from a statement, used to
+            skip duplicates when statements overlap, or ingested through the ingest stream,
+            used to skip replayed txn. Null for manually entered txn
+        tags (ArrayField): ids of the txn's tags. GIN indexed, so filtering by any or all
+            of a set of tags is an index lookup
 
     TODO:
-        - create model for categories per user with default instances
-        - create model for tags per user
+        - drop category name once category_ref is backfilled everywhere and make
+        category_ref required
     """
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="txns")
@@ -28,4 +86,101 @@ class Txn(models.Model):
     description = models.CharField(max_length=100)
     amount = models.DecimalField(max_digits=9, decimal_places=2)
     category = models.CharField(max_length=100)
-    # tags = models.ForeignKey
+    category_ref = models.ForeignKey(
+        Category, on_delete=models.RESTRICT, related_name="txns", null=True, blank=True
+    )
+    fingerprint = models.CharField(
+        max_length=64, unique=True, null=True, blank=True, editable=False
+    )
+    tags = ArrayField(models.IntegerField(), default=list, blank=True)
+
+    class Meta:
+        indexes = [GinIndex(fields=["tags"], name="txn_tags_gin")]
+
+
+def default_alert_thresholds() -> list[int]:
+    """Percents of budget spent that alert by default"""
+    return [80, 100]
+
+
+class Budget(models.Model):
+    """
+    Model representing a user's monthly budget of a category
+
+    Attributes:
+        user (ForeignKey): owner of budget
+        category (ForeignKey): category budgeted
+        amount (DecimalField): budget per month in $
+        alert_thresholds (ArrayField): percents of amount that alert when spending in a
+            month reaches them
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="budgets")
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name="budgets"
+    )
+    amount = models.DecimalField(max_digits=9, decimal_places=2)
+    alert_thresholds = ArrayField(
+        models.PositiveSmallIntegerField(), default=default_alert_thresholds, blank=True
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "category"], name="unique_budget_per_category"
+            )
+        ]
+
+
+class BudgetPeriod(models.Model):
+    """
+    Model representing the spending of a budget's category in a month
+
+    Spent is maintained as txn are created, updated and deleted, so reading a budget's
+    progress is a single row lookup. Months without a row have nothing spent.
+
+    Attributes:
+        budget (ForeignKey): budget of period
+        month (DateField): first day of month
+        spent (DecimalField): sum of txn amounts of budget's category in month
+    """
+
+    budget = models.ForeignKey(Budget, on_delete=models.CASCADE, related_name="periods")
+    month = models.DateField()
+    spent = models.DecimalField(max_digits=11, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["budget", "month"], name="unique_budget_period"
+            )
+        ]
+
+
+class BudgetAlert(models.Model):
+    """
+    Model representing spending of a budget's category reaching an alert threshold
+
+    Created when a txn write takes a month's spending to or past the threshold, at most once
+    per budget, month and threshold.
+
+    Attributes:
+        budget (ForeignKey): budget alerted
+        month (DateField): first day of month
+        threshold (PositiveSmallIntegerField): percent of budget amount reached
+        spent (DecimalField): spent in month when threshold was reached
+        created (DateTimeField): time threshold was reached
+    """
+
+    budget = models.ForeignKey(Budget, on_delete=models.CASCADE, related_name="alerts")
+    month = models.DateField()
+    threshold = models.PositiveSmallIntegerField()
+    spent = models.DecimalField(max_digits=11, decimal_places=2)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["budget", "month", "threshold"], name="unique_budget_alert"
+            )
+        ]
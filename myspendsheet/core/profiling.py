@@ -0,0 +1,87 @@
+import json
+import os
+import time
+from typing import Any, Iterator
+from uuid import uuid4
+
+from core.metrics import RequestStats
+from django.conf import settings
+from pyinstrument.renderers import PstatsRenderer, SpeedscopeRenderer
+from pyinstrument.session import Session
+
+RENDERERS = {"speedscope": SpeedscopeRenderer, "pstats": PstatsRenderer}
+EXTENSIONS = {"speedscope": ".speedscope.json", "pstats": ".pstats"}
+META_EXTENSION = ".meta.json"
+
+
+def profile_dir() -> str:
+    """Return directory profiles are stored in"""
+    return settings.PROFILING["DIR"]
+
+
+def save_profile(session: Session, stats: RequestStats, meta: dict[str, Any]) -> str:
+    """
+    Save profile of request with its queries and Redis commands, return profile id
+
+    Each profile is a profile file in the configured format and a metadata file. Ids start
+    with the time in ns so they sort by age, the oldest are removed past MAX_PROFILES.
+    """
+    options = settings.PROFILING
+    path = profile_dir()
+    os.makedirs(path, exist_ok=True)
+    profile_id = f"{time.time_ns()}-{uuid4().hex[:8]}"
+    profile_format = options["FORMAT"]
+    rendered = RENDERERS[profile_format]().render(session)
+    with open(
+        os.path.join(path, profile_id + EXTENSIONS[profile_format]), "wb"
+    ) as file:
+        # pstats are marshalled bytes decoded with surrogateescape
+        file.write(rendered.encode("utf-8", errors="surrogateescape"))
+    meta = {
+        **meta,
+        "id": profile_id,
+        "format": profile_format,
+        "queries": [{"sql": sql, "seconds": seconds} for sql, seconds in stats.queries],
+        "redis_commands": [
+            {"command": str(command), "seconds": seconds}
+            for command, seconds in stats.redis_commands
+        ],
+    }
+    with open(os.path.join(path, profile_id + META_EXTENSION), "w") as file:
+        json.dump(meta, file)
+    rotate_profiles(options["MAX_PROFILES"])
+    return profile_id
+
+
+def rotate_profiles(max_profiles: int) -> None:
+    """Remove oldest profiles past max profiles"""
+    path = profile_dir()
+    profile_ids = sorted(
+        name[: -len(META_EXTENSION)]
+        for name in os.listdir(path)
+        if name.endswith(META_EXTENSION)
+    )
+    for profile_id in profile_ids[: max(0, len(profile_ids) - max_profiles)]:
+        for extension in (META_EXTENSION, *EXTENSIONS.values()):
+            try:
+                os.remove(os.path.join(path, profile_id + extension))
+            except FileNotFoundError:
+                pass
+
+
+def iter_profiles() -> Iterator[dict[str, Any]]:
+    """Yield metadata of stored profiles, with the path of their profile file as file"""
+    path = profile_dir()
+    if not os.path.isdir(path):
+        return
+    for name in sorted(os.listdir(path)):
+        if not name.endswith(META_EXTENSION):
+            continue
+        try:
+            with open(os.path.join(path, name), "r") as file:
+                meta = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            # Rotated or still being written by a worker
+            continue
+        meta["file"] = os.path.join(path, meta["id"] + EXTENSIONS[meta["format"]])
+        yield meta
@@ -0,0 +1,65 @@
+from core.api.authentication import user_cache_key
+from core.api.services import (
+    BudgetTracker,
+    CategoryMap,
+    TagMap,
+    create_default_categories,
+)
+from core.metrics import record_query
+from core.models import Budget, Category, Tag
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender: type[User], instance: User, **kwargs) -> None:
+    """Remove user from authentication cache when user changes"""
+    cache.delete(user_cache_key(instance.pk))
+
+
+@receiver(post_save, sender=User)
+def create_user_categories(
+    sender: type[User], instance: User, created: bool, **kwargs
+) -> None:
+    """Give new user the default categories"""
+    if created:
+        create_default_categories([instance])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_map(
+    sender: type[Category], instance: Category, **kwargs
+) -> None:
+    """Remove user's cached category map when one of their categories changes"""
+    CategoryMap().invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_map(sender: type[Tag], instance: Tag, **kwargs) -> None:
+    """Remove user's cached tag map when one of their tags changes"""
+    TagMap().invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+def invalidate_budgets(sender: type[Budget], instance: Budget, **kwargs) -> None:
+    """Remove user's cached budgets once change to one of their budgets is committed"""
+    # Otherwise a txn write before the commit could cache budgets without the change
+    transaction.on_commit(lambda: BudgetTracker().invalidate(instance.user_id))
+
+
+@receiver(connection_created)
+def instrument_connection(
+    sender: type[BaseDatabaseWrapper], connection: BaseDatabaseWrapper, **kwargs
+) -> None:
+    """Count queries of new database connection on request metrics"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -0,0 +1,58 @@
+"""
+Gunicorn config for serving the ASGI app in production
+
+Run from this directory with `gunicorn -c gunicorn.conf.py`. Workers are uvicorn workers
+so async views run on an event loop. Sync views run one at a time in a thread of each
+worker, so workers are sized like sync workers.
+
+The app is loaded once before workers are forked so they share its memory copy-on-write.
+As a result `kill -HUP` only restarts workers with the already loaded code, a code change
+needs a restart. Workers are recycled after max requests to bound memory growth, and on
+restart are given graceful timeout to finish in flight requests.
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# API only stack, admin runs in a separate process with DJANGO_SETTINGS_MODULE set to
+# config.settings_prod and its own GUNICORN_BIND
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings_api")
+
+# Workers write metrics to files in this directory so /metrics on any worker serves all of
+# them. Must be set before the app is loaded, files of the last run are removed.
+metrics_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), "myspendsheet-metrics"),
+)
+shutil.rmtree(metrics_dir, ignore_errors=True)
+os.makedirs(metrics_dir)
+
+wsgi_app = "config.asgi:application"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+
+preload_app = True
+max_requests = 1000
+max_requests_jitter = 100  # Keep workers from recycling at the same time
+timeout = 120  # PDF parsing waits on OpenAI for 30+ seconds
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master so they are not shared"""
+    from django.db import connections
+
+    connections.close_all()
+
+
+def child_exit(server, worker):
+    """Archive metrics of exited worker so files don't pile up as workers are recycled"""
+    from core.metrics import archive_worker_metrics
+
+    archive_worker_metrics(worker.pid)
@@ -0,0 +1,41 @@
+from datetime import date, timedelta
+
+import pymupdf
+import pytest
+from core.api.services import TxnPdfParser
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+PAGES = [1, 10, 50, 200]
+TXN_PER_PAGE = 40
+
+
+def statement_pdf(num_of_pages: int) -> bytes:
+    """Generate bank statement PDF with a page of txn lines per page"""
+    doc = pymupdf.open()
+    txn_date = date(2025, 1, 1)
+    for page_num in range(num_of_pages):
+        page = doc.new_page()
+        page.insert_text((50, 50), f"Statement page {page_num + 1}", fontsize=12)
+        for line in range(TXN_PER_PAGE):
+            txn_date += timedelta(hours=6)
+            page.insert_text(
+                (50, 80 + line * 18),
+                f"{txn_date:%m/%d/%Y}   POS PURCHASE MERCHANT #{line:04d}   "
+                f"{(line * 7.31) % 500:>10.2f}",
+                fontsize=9,
+            )
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+@pytest.mark.benchmark(group="pdf_to_txt")
+@pytest.mark.parametrize("num_of_pages", PAGES)
+def test_pdf_to_txt(benchmark, num_of_pages: int) -> None:
+    """Benchmark: Text extraction of statement PDF"""
+    content = statement_pdf(num_of_pages)
+    parser = TxnPdfParser()
+    text = benchmark(
+        lambda: parser._pdf_to_txt(SimpleUploadedFile("statement.pdf", content))
+    )
+    assert text.count("POS PURCHASE") == num_of_pages * TXN_PER_PAGE
@@ -0,0 +1,24 @@
+import pytest
+from core.api.serializers import TxnSerializer
+from core.models import Txn
+from django.contrib.auth.models import User
+from rest_framework.renderers import JSONRenderer
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def txns(txn_user: User) -> list[Txn]:
+    """All txn of user, as the txn list view loads them"""
+    return list(txn_user.txns.all())
+
+
+@pytest.mark.benchmark(group="txn_list_render")
+def test_txn_list_render(benchmark, txns: list[Txn]) -> None:
+    """Benchmark: Serialize and render txn list to JSON"""
+
+    def render() -> bytes:
+        return JSONRenderer().render(TxnSerializer(txns, many=True).data)
+
+    content = benchmark.pedantic(render, rounds=5)
+    assert content.startswith(b"[{")
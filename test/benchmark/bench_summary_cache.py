@@ -0,0 +1,71 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from core.api.services import SummaryCache
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+pytestmark = pytest.mark.django_db
+
+# Txn of seeded users are within 2025
+RANGES = {
+    "month": (date(2025, 4, 1), date(2025, 4, 30)),
+    "year": (date(2025, 1, 1), date(2025, 12, 31)),
+}
+CACHED_RANGES = [1, 10, 100, 1000]
+
+
+def cache_ranges(user: User, num_of_ranges: int) -> None:
+    """Cache summaries of ranges of 1 to 3 months starting throughout the year"""
+    summary_cache = SummaryCache()
+    start = date(2025, 1, 1)
+    for i in range(num_of_ranges):
+        start_date = start + timedelta(days=i % 365)
+        end_date = start_date + timedelta(days=30 * (1 + i // 365 % 3))
+        summary_cache.get(user, start_date, end_date)
+
+
+@pytest.mark.benchmark(group="calc_summary")
+@pytest.mark.parametrize("date_range", RANGES.values(), ids=RANGES.keys())
+def test_calc_summary(benchmark, txn_user: User, date_range: tuple) -> None:
+    """Benchmark: Summary query and build from database"""
+    summary_cache = SummaryCache()
+    summary = benchmark(summary_cache._calc_summary, txn_user, *date_range)
+    assert summary["total_by_cat"]
+
+
+@pytest.mark.benchmark(group="get_hit")
+def test_get_hit(benchmark, txn_user: User) -> None:
+    """Benchmark: Get of a cached summary"""
+    summary_cache = SummaryCache()
+    summary_cache.get(txn_user, *RANGES["month"])
+    summary = benchmark(summary_cache.get, txn_user, *RANGES["month"])
+    assert summary["total_by_cat"]
+
+
+@pytest.mark.benchmark(group="get_miss")
+def test_get_miss(benchmark, txn_user: User) -> None:
+    """Benchmark: Get of an uncached summary, calculated and cached"""
+    summary_cache = SummaryCache()
+    summary = benchmark.pedantic(
+        summary_cache.get,
+        args=(txn_user, *RANGES["month"]),
+        setup=cache.clear,
+        rounds=20,
+    )
+    assert summary["total_by_cat"]
+
+
+@pytest.mark.benchmark(group="update")
+@pytest.mark.parametrize("txn_user", [1000], ids=["1k"], indirect=True)
+@pytest.mark.parametrize("num_of_ranges", CACHED_RANGES)
+def test_update(benchmark, txn_user: User, num_of_ranges: int) -> None:
+    """Benchmark: Update of every cached summary a new txn falls in"""
+    cache_ranges(txn_user, num_of_ranges)
+    summary_cache = SummaryCache()
+    benchmark(
+        summary_cache.update, txn_user, date(2025, 1, 15), Decimal("12.34"), "Food"
+    )
+    summary = summary_cache.get(txn_user, date(2025, 1, 1), date(2025, 1, 31))
+    assert summary["total_by_cat"]["Food"] > 0
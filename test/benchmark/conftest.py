@@ -0,0 +1,58 @@
+"""
+Fixtures of the service micro-benchmarks
+
+Benchmarks are named bench_*.py so the test suite doesn't run them. Needs the database and
+Redis of the development settings. Run from the repo root, saving results as JSON in
+.benchmarks:
+    pytest test/benchmark/bench_*.py --benchmark-autosave
+
+Compare a change against the last saved run:
+    pytest test/benchmark/bench_*.py --benchmark-autosave --benchmark-compare
+    pytest-benchmark compare --group-by=name --columns=min,median,mean,rounds
+
+Users with 1M txn take a while to seed, leave them out with -k "not 1M".
+"""
+
+import io
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+
+# Txn per user
+TXN_SIZES = {"1k": 1000, "100k": 100000, "1M": 1000000}
+
+
+@pytest.fixture(scope="session", params=TXN_SIZES.values(), ids=TXN_SIZES.keys())
+def txn_user(
+    request: pytest.FixtureRequest,
+    django_db_setup,
+    django_db_blocker,
+    tmp_path_factory: pytest.TempPathFactory,
+) -> Iterator[User]:
+    """User with a year of txn from 2025-01-01, seeded once per size and committed"""
+    output_dir: Path = tmp_path_factory.mktemp("seed")
+    with django_db_blocker.unblock():
+        call_command(
+            "seed_perf_data",
+            "--users=1",
+            f"--txns={request.param}",
+            f"--output-dir={output_dir}",
+            "--seed=1",
+            stdout=io.StringIO(),
+        )
+        username = (output_dir / "perftest_user.txt").read_text().strip()
+        user = User.objects.get(username=username)
+    yield user
+    with django_db_blocker.unblock():
+        user.txns.all().delete()
+        user.delete()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache() -> None:
+    """Clear cache btw benchmarks"""
+    cache.clear()
@@ -1,9 +1,15 @@
+from contextlib import contextmanager
 from datetime import date, timedelta
-from typing import Callable, Union
+from decimal import Decimal
+from typing import Callable, Iterator, Union
 
 import pytest
+from core.api.services import CategoryMap
+from core.models import Txn
+from django.contrib.auth.models import User
 from django.core.cache import cache
-from integration.int_test_util import random_date
+from django.urls import reverse
+from integration.int_test_util import ApiCallRecorder, random_date
 from rest_framework.test import APIClient
 
 
@@ -18,6 +24,51 @@ def client() -> APIClient:
     return client
 
 
+@pytest.fixture
+def warm_client(client: APIClient) -> APIClient:
+    """Client whose user is already in the authentication cache, as between requests"""
+    client.get(reverse("txn-list"))
+    return client
+
+
+@pytest.fixture
+def budget() -> Callable:
+    """Context manager asserting DB queries and Redis commands of a block are in budget"""
+
+    @contextmanager
+    def _budget(queries: int, redis: int) -> Iterator[ApiCallRecorder]:
+        with ApiCallRecorder() as recorded:
+            yield recorded
+        recorded.assert_within(queries, redis)
+
+    return _budget
+
+
+@pytest.fixture
+def seed_txns(client: APIClient, start_date: str, end_date: str) -> Callable:
+    """Bulk create txn of test user until there are size txn, in date range"""
+
+    def _seed_txns(size: int) -> None:
+        user = User.objects.get(username="test")
+        existing = user.txns.count()
+        categories = CategoryMap().resolve(
+            user.pk, (f"Category {i}" for i in range(10))
+        )
+        Txn.objects.bulk_create(
+            Txn(
+                user=user,
+                date=random_date(start_date, end_date),
+                description=f"Seeded {i}",
+                amount=Decimal("12.34"),
+                category=f"Category {i % 10}",
+                category_ref_id=categories[f"Category {i % 10}"][0],
+            )
+            for i in range(existing, size)
+        )
+
+    return _seed_txns
+
+
 @pytest.fixture
 def start_date() -> str:
     """Start date used throughtout tests"""
@@ -1,6 +1,11 @@
 from datetime import date, timedelta
 from random import randint
+from typing import Callable, Iterable
 
+from core.cache import AsyncInstrumentedConnection, InstrumentedConnection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.response import Response
 from rest_framework.test import APIClient
@@ -30,8 +35,129 @@ def get_summary(client: APIClient, start_date: str, end_date: str) -> Response:
     return client.get(past_week_summary_url)
 
 
+def get_summaries(client: APIClient, ranges: list[tuple[str, str]]) -> Response:
+    """Get client summaries of date ranges in one request"""
+    query = "&".join(
+        f"range={start_date},{end_date}" for start_date, end_date in ranges
+    )
+    return client.get(f"{reverse('summary_batch')}?{query}")
+
+
 def random_date(start_date: str, end_date: str) -> str:
     """Random date seven days before date"""
     date_range = (date.fromisoformat(end_date) - date.fromisoformat(start_date)).days
     days = randint(0, date_range)
     return (date.fromisoformat(end_date) - timedelta(days=days)).isoformat()
+
+
+def post_txn_file(client: APIClient, txn_file: bytes, name: str) -> Response:
+    """Post client txn file"""
+    txn_file_url = reverse("txnfile")
+    return client.post(
+        txn_file_url,
+        data={"file": SimpleUploadedFile(name, txn_file)},
+        format="multipart",
+    )
+
+
+class ApiCallRecorder:
+    """
+    Record DB queries and Redis commands made within a block
+
+    Redis connection setup commands are not recorded. Connections are kept open between
+    requests when served, but the test client opens one per async request. Pipelines are
+    recorded as one PIPELINE, as they are one round trip.
+
+    Attribute:
+        SETUP_COMMANDS (set[str]): Redis commands sent when a connection is opened
+        queries (list[str]): SQL of queries made
+        redis_commands (list[str]): Names of Redis commands sent
+    """
+
+    SETUP_COMMANDS = {"HELLO", "CLIENT", "AUTH", "SELECT"}
+
+    def __init__(self):
+        """
+        Initialize empty ApiCallRecorder
+        """
+        self.queries = []
+        self.redis_commands = []
+        self._capture = CaptureQueriesContext(connection)
+        self._send_commands = {}
+        self._send_packed_commands = {}
+
+    def _recording(self, send_command: Callable) -> Callable:
+        """Wrap connection send_command to record the command name"""
+        recorder = self
+
+        def send_recorded_command(self, *args, **kwargs):
+            name = str(args[0]).upper()
+            if name not in recorder.SETUP_COMMANDS:
+                recorder.redis_commands.append(name)
+            return send_command(self, *args, **kwargs)
+
+        return send_recorded_command
+
+    def _recording_pipeline(self, send_packed_command: Callable) -> Callable:
+        """Wrap connection send_packed_command to record pipelines"""
+        recorder = self
+
+        def send_recorded_packed_command(self, *args, **kwargs):
+            # Single commands are packed by send_command, which sets their name
+            if self._command is None:
+                recorder.redis_commands.append("PIPELINE")
+            return send_packed_command(self, *args, **kwargs)
+
+        return send_recorded_packed_command
+
+    def __enter__(self) -> "ApiCallRecorder":
+        for connection_class in (InstrumentedConnection, AsyncInstrumentedConnection):
+            send_command = connection_class.send_command
+            self._send_commands[connection_class] = send_command
+            connection_class.send_command = self._recording(send_command)
+            send_packed_command = connection_class.send_packed_command
+            self._send_packed_commands[connection_class] = send_packed_command
+            connection_class.send_packed_command = self._recording_pipeline(
+                send_packed_command
+            )
+        self._capture.__enter__()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._capture.__exit__(*exc_info)
+        for connection_class, send_command in self._send_commands.items():
+            connection_class.send_command = send_command
+        for connection_class, send_packed in self._send_packed_commands.items():
+            connection_class.send_packed_command = send_packed
+        self.queries = [query["sql"] for query in self._capture.captured_queries]
+
+    def assert_within(self, queries: int, redis: int) -> None:
+        """Assert number of queries and Redis commands are within budget"""
+        assert (
+            len(self.queries) <= queries
+        ), f"{len(self.queries)} queries over budget of {queries}:\n" + "\n".join(
+            self.queries
+        )
+        assert len(self.redis_commands) <= redis, (
+            f"{len(self.redis_commands)} Redis commands over budget of {redis}: "
+            f"{self.redis_commands}"
+        )
+
+
+def assert_no_growth(
+    call: Callable[[], Response], grow: Callable[[int], None], sizes: Iterable[int]
+) -> None:
+    """
+    Assert DB queries and Redis commands of call don't grow with data size (N+1)
+
+    grow(size) adds data so there is size of it before call is recorded.
+    """
+    costs = {}
+    for size in sizes:
+        grow(size)
+        with ApiCallRecorder() as recorded:
+            call()
+        costs[size] = (len(recorded.queries), len(recorded.redis_commands))
+    assert (
+        len(set(costs.values())) == 1
+    ), f"(queries, Redis commands) grow with data size: {costs}"
@@ -0,0 +1,50 @@
+from typing import Callable
+
+import pytest
+from django.contrib.auth.models import User
+from integration.int_test_util import get_summary
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+def test_summary_cache_hit_no_query(
+    client: APIClient,
+    start_date: str,
+    end_date: str,
+    django_assert_num_queries: Callable,
+) -> None:
+    """Test Case: Authenticated summary cache hit doesn't query database"""
+    resp = get_summary(client, start_date, end_date)
+    with django_assert_num_queries(0):
+        resp = get_summary(client, start_date, end_date)
+    assert resp.status_code == 200
+
+
+def test_inactive_user_invalidated(
+    client: APIClient, start_date: str, end_date: str
+) -> None:
+    """Test Case: Cached user is invalidated when user is deactivated"""
+    resp = get_summary(client, start_date, end_date)
+    user = User.objects.get(username="test")
+    user.is_active = False
+    user.save()
+    resp = get_summary(client, start_date, end_date)
+    assert resp.status_code == 401
+
+
+def test_deleted_user_invalidated(
+    client: APIClient, start_date: str, end_date: str
+) -> None:
+    """Test Case: Cached user is invalidated when user is deleted"""
+    resp = get_summary(client, start_date, end_date)
+    User.objects.filter(username="test").delete()
+    resp = get_summary(client, start_date, end_date)
+    assert resp.status_code == 401
+
+
+def test_invalid_token(client: APIClient, start_date: str, end_date: str) -> None:
+    """Test Case: Invalid token is rejected"""
+    client.credentials(HTTP_AUTHORIZATION="Bearer invalid")
+    resp = get_summary(client, start_date, end_date)
+    assert resp.status_code == 401
@@ -0,0 +1,123 @@
+from datetime import date, timedelta
+from typing import Callable
+
+import pytest
+from django.urls import reverse
+from integration.int_test_util import delete_txn, patch_txn, post_txn
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+def post_budget(client: APIClient, category: str, amount: float, **kwargs) -> Response:
+    data = {"category": category, "amount": amount, **kwargs}
+    return client.post(reverse("budget-list"), data, format="json")
+
+
+def get_budgets(client: APIClient, month: str = "") -> dict[str, dict]:
+    """Return user's budgets by category"""
+    query = f"?month={month}" if month else ""
+    resp = client.get(reverse("budget-list") + query)
+    return {budget["category"]: budget for budget in resp.data}
+
+
+@pytest.fixture
+def today() -> str:
+    return date.today().isoformat()
+
+
+@pytest.fixture
+def last_month() -> date:
+    return date.today().replace(day=1) - timedelta(days=1)
+
+
+def test_budget_initialized_from_history(
+    client: APIClient, txn_factory: Callable, today: str, last_month: date
+) -> None:
+    """Test Case: New budget has spending of existing txn of its category by month"""
+    post_txn(client, txn_factory(date=today, amount=30, category="Groceries"))
+    post_txn(
+        client,
+        txn_factory(date=last_month.isoformat(), amount=70, category="Groceries"),
+    )
+    post_txn(client, txn_factory(date=today, amount=99, category="Rent"))
+
+    resp = post_budget(client, "groceries", 200)
+    assert resp.status_code == 201
+    assert resp.data["category"] == "Groceries"
+    assert resp.data["spent"] == "30.00"
+    assert resp.data["remaining"] == "170.00"
+    budgets = get_budgets(client, last_month.strftime("%Y-%m"))
+    assert budgets["Groceries"]["spent"] == "70.00"
+
+
+def test_budget_maintained(client: APIClient, txn_factory: Callable, today: str):
+    """Test Case: Budget spending follows txn create, update and delete"""
+    post_budget(client, "Groceries", 200)
+    post_budget(client, "Restaurants", 100)
+    txn_id = post_txn(client, txn_factory(date=today, amount=50, category="Groceries"))
+    txn_id = txn_id.data["id"]
+    post_txn(client, txn_factory(date=today, amount=10, category="Groceries"))
+    assert get_budgets(client)["Groceries"]["spent"] == "60.00"
+
+    patch_txn(client, txn_id, {"amount": 40, "category": "Restuarants"})
+    budgets = get_budgets(client)
+    assert budgets["Groceries"]["spent"] == "10.00"
+    assert budgets["Restaurants"]["spent"] == "40.00"
+
+    delete_txn(client, txn_id)
+    assert get_budgets(client)["Restaurants"]["spent"] == "0.00"
+
+
+def test_budget_alerts(client: APIClient, txn_factory: Callable, today: str) -> None:
+    """Test Case: Alert when spending reaches a threshold, once per month"""
+    post_budget(client, "Groceries", 100, alert_thresholds=[100, 50])
+    post_txn(client, txn_factory(date=today, amount=40, category="Groceries"))
+    assert client.get(reverse("budget-alerts")).data == []
+
+    txn_id = post_txn(client, txn_factory(date=today, amount=20, category="Groceries"))
+    delete_txn(client, txn_id.data["id"])
+    post_txn(client, txn_factory(date=today, amount=70, category="Groceries"))
+    resp = client.get(reverse("budget-alerts"))
+    assert [(alert["threshold"], alert["spent"]) for alert in resp.data] == [
+        (50, "60.00"),
+        (100, "110.00"),
+    ]
+
+
+def test_budget_validation(client: APIClient) -> None:
+    """Test Case: One budget per category, category can't change, month is YYYY-MM"""
+    budget_id = post_budget(client, "Groceries", 100).data["id"]
+    assert post_budget(client, "Groceries", 50).status_code == 400
+    url = reverse("budget-detail", args=[budget_id])
+    resp = client.patch(url, {"category": "Rent"}, format="json")
+    assert resp.status_code == 400
+    resp = client.patch(url, {"amount": 150}, format="json")
+    assert resp.data["amount"] == "150.00"
+    resp = client.get(reverse("budget-list") + "?month=2025-13")
+    assert resp.status_code == 400
+
+
+@pytest.mark.parametrize("size", [1, 10, 100])
+def test_budget_read_budget(
+    warm_client: APIClient, budget: Callable, seed_txns: Callable, size: int
+) -> None:
+    """Test Case: Budgets are read in one query at any size of txn history"""
+    post_budget(warm_client, "Category 1", 100)
+    post_budget(warm_client, "Category 2", 100)
+    seed_txns(size)
+    with budget(queries=1, redis=1):
+        resp = warm_client.get(reverse("budget-list"))
+    assert len(resp.data) == 2
+
+
+def test_budget_write_budget(
+    warm_client: APIClient, budget: Callable, txn_factory: Callable, today: str
+) -> None:
+    """Test Case: Txn of a budgeted category updates its budget in one query"""
+    post_budget(warm_client, "Groceries", 1000)
+    post_txn(warm_client, txn_factory(date=today, category="Groceries"))
+    # Savepoint, insert, budget upsert and release
+    with budget(queries=4, redis=4):
+        post_txn(warm_client, txn_factory(date=today, category="Groceries"))
@@ -0,0 +1,95 @@
+from decimal import Decimal
+from io import StringIO
+from typing import Callable
+
+import pytest
+from core.api.services import DEFAULT_CATEGORIES
+from core.models import Category, Txn
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from integration.int_test_util import get_summary, post_txn, post_txn_file
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+def test_new_user_has_default_categories(client: APIClient) -> None:
+    """Test Case: New user gets the default categories"""
+    user = User.objects.get(username="test")
+    names = set(user.categories.values_list("name", flat=True))
+    assert names == set(DEFAULT_CATEGORIES)
+
+
+def test_category_names_normalized(
+    client: APIClient, txn_factory: Callable, start_date: str, end_date: str
+) -> None:
+    """Test Case: Misspelled and differently cased names are one category in summary"""
+    resp = get_summary(client, start_date, end_date)
+    post_txn(client, txn_factory(amount=10, category="Restaurants"))
+    resp = post_txn(client, txn_factory(amount=20, category="Restuarants"))
+    assert resp.data["category"] == "Restaurants"
+    post_txn(client, txn_factory(amount=30, category=" restaurants "))
+
+    cached = get_summary(client, start_date, end_date)
+    assert cached.data["total_by_cat"] == {"Restaurants": "60.00"}
+    cache.clear()
+    resp = get_summary(client, start_date, end_date)
+    assert resp.data == cached.data
+    assert Txn.objects.values("category_ref").distinct().count() == 1
+
+
+def test_new_category_created_on_use(client: APIClient, txn_factory: Callable):
+    """Test Case: Txn of a new category creates it once, reused in any case"""
+    post_txn(client, txn_factory(category="Coffee"))
+    resp = post_txn(client, txn_factory(category="coffee"))
+    assert resp.data["category"] == "Coffee"
+    user = User.objects.get(username="test")
+    assert user.categories.filter(name__iexact="coffee").count() == 1
+    assert user.txns.filter(category_ref__name="Coffee").count() == 2
+
+
+def test_import_resolves_categories(
+    client: APIClient, start_date: str, end_date: str
+) -> None:
+    """Test Case: Imported txn get category ids"""
+    csv_file = (
+        "Date,Description,Amount,Category\n"
+        f"{start_date},Coffee,-4.50,Restuarants\n{end_date},Gym,-30.00,Fitness\n"
+    ).encode()
+    resp = post_txn_file(client, csv_file, "export.csv")
+    assert resp.data == {"created": 2, "skipped": 0}
+    assert not Txn.objects.filter(category_ref__isnull=True).exists()
+    resp = get_summary(client, start_date, end_date)
+    assert resp.data["total_by_cat"] == {"Restaurants": "4.50", "Fitness": "30.00"}
+
+
+def test_backfill_categories(client: APIClient, start_date: str, end_date: str):
+    """Test Case: Txn without category ids are summarized by name, then backfilled"""
+    user = User.objects.get(username="test")
+    legacy = User.objects.create_user(username="legacy", password="test")
+    # Users and txn from before categories existed
+    Category.objects.filter(user=legacy).delete()
+    Txn.objects.bulk_create(
+        Txn(
+            user=txn_user,
+            date=start_date,
+            description="Legacy",
+            amount=Decimal("5.00"),
+            category=category,
+        )
+        for txn_user in (user, legacy)
+        for category in ("Restuarants", "Restaurants", "Food", "Food", "Food")
+    )
+    resp = get_summary(client, start_date, end_date)
+    assert resp.data["total_by_cat"] == {"Restaurants": "10.00", "Food": "15.00"}
+
+    out = StringIO()
+    call_command("backfill_categories", "--batch-size=3", stdout=out)
+    assert "Backfilled 10 txn" in out.getvalue()
+    assert not Txn.objects.filter(category_ref__isnull=True).exists()
+    assert not Txn.objects.filter(category="Restuarants").exists()
+    assert legacy.categories.count() == len(DEFAULT_CATEGORIES) + 1
+    cache.clear()
+    resp = get_summary(client, start_date, end_date)
+    assert resp.data["total_by_cat"] == {"Restaurants": "10.00", "Food": "15.00"}
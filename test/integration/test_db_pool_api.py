@@ -0,0 +1,67 @@
+import pytest
+from core.db.base import DatabaseWrapper
+from django.contrib.auth.models import User
+from django.db import connection
+from django.urls import reverse
+from psycopg2 import extensions
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def pooled_connection() -> DatabaseWrapper:
+    """Pooled connection to the test database"""
+    settings_dict = {**connection.settings_dict, "POOL": {"MAX_SIZE": 2}}
+    pooled = DatabaseWrapper(settings_dict, alias="pool_test")
+    yield pooled
+    pooled.close()
+    pooled.pool.close_idle()
+
+
+def test_closed_connection_is_reused(pooled_connection: DatabaseWrapper) -> None:
+    """Test closing a pooled connection returns it to the pool for the next query"""
+    with pooled_connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    raw_connection = pooled_connection.connection
+    pooled_connection.close()
+
+    with pooled_connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    assert pooled_connection.connection is raw_connection
+    stats = pooled_connection.pool.stats()
+    assert stats["checkouts"] == 2
+    assert stats["size"] == 1
+
+
+def test_unfinished_transaction_rolled_back(
+    pooled_connection: DatabaseWrapper,
+) -> None:
+    """Test connection returned mid transaction is rolled back before reuse"""
+    pooled_connection.set_autocommit(False)
+    with pooled_connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    pooled_connection.close()
+
+    with pooled_connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    assert pooled_connection.get_autocommit()
+    assert (
+        pooled_connection.connection.info.transaction_status
+        == extensions.TRANSACTION_STATUS_IDLE
+    )
+
+
+def test_stats_staff_only(client: APIClient) -> None:
+    """Test pool stats are hidden from non staff users"""
+    resp = client.get(reverse("db_pool"))
+    assert resp.status_code == 403
+
+
+def test_stats(client: APIClient, pooled_connection: DatabaseWrapper) -> None:
+    """Test staff user gets stats of pools in the process"""
+    User.objects.filter(username="test").update(is_staff=True)
+    pooled_connection.ensure_connection()
+    resp = client.get(reverse("db_pool"))
+    assert resp.status_code == 200
+    assert resp.data["pools"]["pool_test"]["in_use"] == 1
@@ -0,0 +1,174 @@
+from io import StringIO
+from typing import Callable, Iterable, Iterator
+from unittest.mock import patch
+
+import pytest
+from core.api.services import StreamTxnImporter, TxnIngestStream
+from core.models import Txn
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from integration.int_test_util import get_summary
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_stream() -> Iterator[None]:
+    """Clear ingest stream btw tests, it isn't in the cache"""
+    stream = TxnIngestStream()
+    client, key = stream._stream()
+    keys = [key, stream.DEAD_LETTER_STREAM, stream.DEAD_LETTER_IDS]
+    client.delete(*keys)
+    yield
+    client.delete(*keys)
+
+
+def ingest_txn(client: APIClient, data) -> Response:
+    """Post client txn to ingest"""
+    return client.post(reverse("txn-ingest"), data, format="json")
+
+
+def ingest_status(client: APIClient, entry_id: str) -> Response:
+    """Get status of client's ingest entry"""
+    return client.get(reverse("txn-ingest-status", args=[entry_id]))
+
+
+def flush(*args: str) -> str:
+    """Flush ingest stream until no entries are waiting, return command output"""
+    out = StringIO()
+    call_command("flush_txn_ingest", "--once", *args, stdout=out)
+    return out.getvalue()
+
+
+def test_ingest_flushed_in_batch(
+    client: APIClient, txn_factory: Callable, start_date: str, end_date: str
+) -> None:
+    """Test Case: Ingested txn are queued, then flushed with summaries updated"""
+    get_summary(client, start_date, end_date)
+    resp = ingest_txn(
+        client,
+        [
+            txn_factory(amount=10, category="Rent"),
+            txn_factory(amount=5, category="Pet"),
+        ],
+    )
+    assert resp.status_code == 202
+    assert resp.data["queued"] == 2
+    entry_id = resp.data["id"]
+    resp = ingest_txn(client, txn_factory(amount=10, category="restuarants"))
+    assert resp.data["queued"] == 1
+    assert ingest_status(client, entry_id).data == {
+        "id": entry_id,
+        "flushed": False,
+        "failed": False,
+    }
+    assert not Txn.objects.exists()
+
+    assert "Flushed 2 entries, created 3 txn" in flush()
+    assert ingest_status(client, entry_id).data["flushed"]
+    assert Txn.objects.filter(category_ref__name="Restaurants").exists()
+    resp = get_summary(client, start_date, end_date)
+    assert resp.data["total"] == "25.00"
+    assert resp.data["total_by_cat"] == {
+        "Rent": "10.00",
+        "Pet": "5.00",
+        "Restaurants": "10.00",
+    }
+
+
+def test_ingest_replay_idempotent(
+    client: APIClient, txn_factory: Callable, start_date: str, end_date: str
+) -> None:
+    """Test Case: Entries of a consumer that crashed after flushing aren't inserted twice"""
+    ingest_txn(client, [txn_factory(amount=10), txn_factory(amount=10)])
+    get_summary(client, start_date, end_date)
+    stream = TxnIngestStream()
+    stream.create_group()
+    # Consumer crashed after its batch was committed, before acknowledging it
+    stream.flush(stream.read("crashed", 10))
+    assert Txn.objects.count() == 2
+
+    assert "Flushed 1 entries, created 0 txn" in flush("--min-idle-ms=0")
+    assert Txn.objects.count() == 2
+    assert get_summary(client, start_date, end_date).data["total"] == "20.00"
+    assert flush() == ""
+
+
+def test_ingest_kept_through_cache_clear(client: APIClient, txn_factory: Callable):
+    """Test Case: Queued txn aren't dropped when the cache is cleared"""
+    ingest_txn(client, txn_factory())
+    cache.clear()
+    assert "Flushed 1 entries, created 1 txn" in flush()
+
+
+def test_ingest_failing_entry_dead_lettered(
+    client: APIClient, txn_factory: Callable, settings
+) -> None:
+    """Test Case: Entry that fails to flush doesn't hold back others, then is set aside"""
+    settings.TXN_INGEST = {**settings.TXN_INGEST, "MAX_DELIVERIES": 3}
+    insert = StreamTxnImporter.insert
+
+    def insert_failing(importer: StreamTxnImporter, txns: Iterable[dict]) -> None:
+        txns = list(txns)
+        if any(txn["description"] == "Poison" for txn in txns):
+            raise ValueError("Poison txn")
+        insert(importer, txns)
+
+    ingest_txn(client, txn_factory(description="Fine"))
+    entry_id = ingest_txn(client, txn_factory(description="Poison")).data["id"]
+    with patch.object(StreamTxnImporter, "insert", insert_failing):
+        out = flush("--min-idle-ms=0")
+    assert "Flushed 1 entries, created 1 txn" in out
+    assert list(Txn.objects.values_list("description", flat=True)) == ["Fine"]
+    assert ingest_status(client, entry_id).data == {
+        "id": entry_id,
+        "flushed": False,
+        "failed": True,
+    }
+    stream = TxnIngestStream()
+    redis_client, _ = stream._stream()
+    [(_, fields)] = redis_client.xrange(stream.DEAD_LETTER_STREAM)
+    assert fields[b"id"].decode() == entry_id
+    assert flush() == ""
+
+
+def test_ingest_identical_txn_kept(client: APIClient, txn_factory: Callable) -> None:
+    """Test Case: Identical txn of separate ingest requests are separate txn"""
+    txn = txn_factory()
+    ingest_txn(client, txn)
+    ingest_txn(client, txn)
+    flush()
+    assert Txn.objects.count() == 2
+
+
+def test_ingest_invalid(client: APIClient, txn_factory: Callable) -> None:
+    """Test Case: Invalid txn and empty or oversized lists aren't queued"""
+    assert ingest_txn(client, [txn_factory(amount="ten")]).status_code == 400
+    assert ingest_txn(client, [txn_factory(tags=[123])]).status_code == 400
+    assert ingest_txn(client, []).status_code == 400
+    assert ingest_txn(client, [txn_factory()] * 501).status_code == 400
+    assert flush() == ""
+
+
+def test_ingest_status_of_other_user(client: APIClient, txn_factory: Callable) -> None:
+    """Test Case: Entries of other users aren't shown as pending"""
+    entry_id = ingest_txn(client, txn_factory()).data["id"]
+    other = APIClient()
+    other.post("/user/", {"username": "other", "password": "test"})
+    token = other.post("/token/", {"username": "other", "password": "test"})
+    other.credentials(HTTP_AUTHORIZATION=f"Bearer {token.data['access']}")
+    assert ingest_status(other, entry_id).data["flushed"]
+    assert not ingest_status(client, entry_id).data["flushed"]
+
+
+def test_ingest_budget(
+    warm_client: APIClient, budget: Callable, txn_factory: Callable
+) -> None:
+    """Test Case: Ingest is acknowledged without touching the database"""
+    # Auth and append
+    with budget(queries=0, redis=2):
+        resp = ingest_txn(warm_client, [txn_factory() for _ in range(10)])
+    assert resp.status_code == 202
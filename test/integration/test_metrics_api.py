@@ -0,0 +1,54 @@
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from integration.int_test_util import get_summary, post_txn
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+def sample(name: str, **labels) -> float:
+    """Return current value of metric sample, 0 if it has not been recorded"""
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@override_settings(METRICS_TOKEN="scrape-token")
+def test_metrics_token_required() -> None:
+    """Test metrics are hidden without the metrics token"""
+    resp = APIClient().get(reverse("metrics"))
+    assert resp.status_code == 403
+
+    resp = APIClient().get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong-token")
+    assert resp.status_code == 403
+
+
+@override_settings(METRICS_TOKEN="scrape-token")
+def test_metrics(client: APIClient, txn: dict, start_date: str, end_date: str) -> None:
+    """Test request latency, query, Redis and summary cache metrics are recorded"""
+    summary_labels = {"view": "summary", "method": "GET", "status": "200"}
+    requests = sample("myspendsheet_request_duration_seconds_count", **summary_labels)
+    queries = sample("myspendsheet_db_queries_total", view="txn-list")
+    round_trips = sample("myspendsheet_redis_round_trips_total", view="summary")
+    hits = sample("myspendsheet_summary_cache_requests_total", result="hit")
+    misses = sample("myspendsheet_summary_cache_requests_total", result="miss")
+
+    post_txn(client, txn)
+    get_summary(client, start_date, end_date)
+    get_summary(client, start_date, end_date)
+
+    assert (
+        sample("myspendsheet_request_duration_seconds_count", **summary_labels)
+        == requests + 2
+    )
+    assert sample("myspendsheet_db_queries_total", view="txn-list") > queries
+    assert sample("myspendsheet_redis_round_trips_total", view="summary") > round_trips
+    assert sample("myspendsheet_summary_cache_requests_total", result="hit") == hits + 1
+    assert (
+        sample("myspendsheet_summary_cache_requests_total", result="miss") == misses + 1
+    )
+
+    resp = APIClient().get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape-token")
+    assert resp.status_code == 200
+    assert resp["Content-Type"].startswith("text/plain")
+    assert b'myspendsheet_request_duration_seconds_count{method="GET"' in resp.content
@@ -0,0 +1,108 @@
+import json
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from integration.int_test_util import get_summary
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def profiling(settings, tmp_path: Path) -> Path:
+    """Enable profiling into tmp dir, clients must be created after"""
+    settings.PROFILING = {
+        **settings.PROFILING,
+        "ENABLED": True,
+        "SAMPLE_RATE": 0.0,
+        "DIR": str(tmp_path),
+    }
+    return tmp_path
+
+
+def auth_client(username: str) -> APIClient:
+    """Client authenticated as user, created after profiling is set"""
+    client = APIClient()
+    client.post("/user/", {"username": username, "password": "test"})
+    resp = client.post("/token/", {"username": username, "password": "test"})
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+    return client
+
+
+def profiles(path: Path) -> list[dict]:
+    """Return metadata of stored profiles"""
+    return [json.loads(meta.read_text()) for meta in sorted(path.glob("*.meta.json"))]
+
+
+def test_profiling_disabled(client: APIClient, start_date: str, end_date: str) -> None:
+    """Test Case: X-Profile header does nothing when profiling is off"""
+    resp = client.get(
+        reverse("summary", args=[start_date, end_date]), HTTP_X_PROFILE="1"
+    )
+    assert resp.status_code == 200
+
+
+def test_sampled_profile(profiling: Path, settings, start_date: str, end_date: str):
+    """Test Case: Sampled request is stored with its queries and Redis commands"""
+    settings.PROFILING["SAMPLE_RATE"] = 1.0
+    client = auth_client("test")
+    resp = get_summary(client, start_date, end_date)
+    assert resp.status_code == 200
+
+    summary_profiles = [
+        meta for meta in profiles(profiling) if meta["view"] == "summary"
+    ]
+    assert len(summary_profiles) == 1
+    meta = summary_profiles[0]
+    assert meta["reason"] == "sampled"
+    assert meta["status"] == 200
+    assert meta["db_queries"] == len(meta["queries"]) > 0
+    assert "GET" in {command["command"] for command in meta["redis_commands"]}
+    assert (profiling / f"{meta['id']}.speedscope.json").exists()
+
+    out = StringIO()
+    call_command("profiles", "--view=summary", stdout=out)
+    assert reverse("summary", args=[start_date, end_date]) in out.getvalue()
+    out = StringIO()
+    call_command("profiles", "--by-view", stdout=out)
+    assert "summary" in out.getvalue()
+
+
+def test_requested_profile_staff_only(
+    profiling: Path, start_date: str, end_date: str
+) -> None:
+    """Test Case: X-Profile only profiles requests of staff users"""
+    client = auth_client("test")
+    url = reverse("summary", args=[start_date, end_date])
+    with patch("core.middleware.Profiler") as profiler:
+        client.get(url, HTTP_X_PROFILE="1")
+        APIClient().get(url, HTTP_X_PROFILE="1", HTTP_AUTHORIZATION="Bearer invalid")
+    profiler.assert_not_called()
+    assert profiles(profiling) == []
+
+    user = User.objects.get(username="test")
+    user.is_staff = True
+    user.save()
+    client.get(url, HTTP_X_PROFILE="1")
+    assert [meta["reason"] for meta in profiles(profiling)] == ["requested"]
+
+
+def test_profiles_rotated(profiling: Path, settings, start_date: str, end_date: str):
+    """Test Case: Oldest profiles are removed past max profiles"""
+    settings.PROFILING.update(SAMPLE_RATE=1.0, MAX_PROFILES=2, FORMAT="pstats")
+    client = auth_client("test")
+    for _ in range(3):
+        get_summary(client, start_date, end_date)
+
+    stored = profiles(profiling)
+    assert len(stored) == 2
+    assert len(list(profiling.glob("*.pstats"))) == 2
+
+    out = StringIO()
+    call_command("profiles", "--functions", stdout=out)
+    assert "cumulative" in out.getvalue()
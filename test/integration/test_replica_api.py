@@ -0,0 +1,94 @@
+from typing import Callable, Iterator
+
+import pytest
+from core.db.router import ReplicaRouter
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from integration.int_test_util import get_summary, post_txn
+from rest_framework.test import APIClient
+
+# Replica connections don't see data of the test transaction, so data is committed
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def add_database(alias: str, **settings_dict) -> None:
+    """Add database alias with the settings of default"""
+    connections.settings[alias] = {
+        **connections["default"].settings_dict,
+        **settings_dict,
+    }
+
+
+def remove_database(alias: str) -> None:
+    """Close and remove database alias"""
+    connections[alias].close()
+    del connections[alias]
+    del connections.settings[alias]
+
+
+@pytest.fixture
+def replica(settings) -> Iterator[str]:
+    """Second connection to the test database, used as a replica"""
+    add_database("replica")
+    settings.DATABASE_REPLICAS = ["replica"]
+    ReplicaRouter._lags.clear()
+    yield "replica"
+    ReplicaRouter._lags.clear()
+    remove_database("replica")
+
+
+@pytest.fixture
+def replica_client(replica: str) -> APIClient:
+    """Client created once there are replicas, so write requests mark the user sticky"""
+    client = APIClient()
+    client.post("/user/", {"username": "test", "password": "test"})
+    resp = client.post("/token/", {"username": "test", "password": "test"})
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+    return client
+
+
+def txn_queries(captured: CaptureQueriesContext) -> list[str]:
+    """Return captured queries reading txn"""
+    return [query["sql"] for query in captured if '"core_txn"' in query["sql"]]
+
+
+def test_reads_after_write_on_primary(
+    replica: str,
+    replica_client: APIClient,
+    txn_factory: Callable,
+    start_date: str,
+    end_date: str,
+) -> None:
+    """Test Case: Reads go to the replica, except within the sticky window of a write"""
+    post_txn(replica_client, txn_factory(amount=10))
+    with CaptureQueriesContext(connections[replica]) as captured:
+        assert len(replica_client.get(reverse("txn-list")).data) == 1
+    assert not txn_queries(captured)
+
+    user = User.objects.get(username="test")
+    cache.delete(f"{user.pk}:db_sticky")  # Sticky window passed
+    # Summary first, so the replica's lag is checked by an async view
+    with CaptureQueriesContext(connections[replica]) as captured:
+        resp = get_summary(replica_client, start_date, end_date)
+        assert len(replica_client.get(reverse("txn-list")).data) == 1
+    assert resp.data["total"] == "10.00"
+    assert len(txn_queries(captured)) == 2
+
+
+def test_reads_fall_back_when_replica_down(
+    replica: str, replica_client: APIClient, txn_factory: Callable, settings
+) -> None:
+    """Test Case: Reads go to the primary when no replica can be reached"""
+    add_database("down", PORT="1", OPTIONS={"connect_timeout": 1})
+    settings.DATABASE_REPLICAS = ["down"]
+    try:
+        post_txn(replica_client, txn_factory(amount=10))
+        cache.clear()
+        resp = replica_client.get(reverse("txn-list"))
+        assert len(resp.data) == 1
+        assert ReplicaRouter._lags["down"][1] == float("inf")
+    finally:
+        remove_database("down")
@@ -0,0 +1,48 @@
+import json
+from pathlib import Path
+
+import pytest
+from core.models import Txn
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+def seed(output_dir: Path, *args) -> None:
+    call_command(
+        "seed_perf_data",
+        "--users=3",
+        "--txns=60",
+        "--start-date=2025-04-01",
+        "--days=10",
+        f"--output-dir={output_dir}",
+        "--seed=1",
+        *args,
+    )
+
+
+def test_seed_perf_data(tmp_path: Path) -> None:
+    """Test Case: Seeded users have txn and the written tokens authenticate them"""
+    seed(tmp_path)
+    usernames = (tmp_path / "perftest_user.txt").read_text().split()
+    tokens = json.loads((tmp_path / "perftest_user_tokens.json").read_text())
+    assert len(usernames) == 3
+    assert set(tokens) == set(usernames)
+    assert Txn.objects.filter(user__username__in=usernames).count() == 60
+
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens[usernames[0]]['access']}")
+    resp = client.get(reverse("summary", args=["2025-04-01", "2025-04-10"]))
+    assert resp.status_code == 200
+    assert resp.data["total_by_cat"]
+
+
+def test_seed_perf_data_clear(tmp_path: Path) -> None:
+    """Test Case: Clear deletes previously seeded users and their txn"""
+    seed(tmp_path)
+    seed(tmp_path, "--clear")
+    usernames = (tmp_path / "perftest_user.txt").read_text().split()
+    assert Txn.objects.count() == 60
+    assert set(Txn.objects.values_list("user__username", flat=True)) <= set(usernames)
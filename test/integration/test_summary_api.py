@@ -1,7 +1,23 @@
+import asyncio
+import json
 from datetime import date, timedelta
+from typing import Callable
 
 import pytest
-from integration.int_test_util import delete_txn, get_summary, patch_txn, post_txn
+from core.api.services import SummaryCache
+from core.api.views import SummaryEventsView
+from core.cache import publish
+from django.core.cache import cache
+from django.urls import reverse
+from django_redis import get_redis_connection
+from integration.int_test_util import (
+    assert_no_growth,
+    delete_txn,
+    get_summaries,
+    get_summary,
+    patch_txn,
+    post_txn,
+)
 from rest_framework.test import APIClient
 
 pytestmark = pytest.mark.django_db
@@ -133,4 +149,220 @@ def test_txn_amt_update_less(
     }
 
 
+SIZES = [1, 10, 100]
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_summary_budget(
+    warm_client: APIClient,
+    budget: Callable,
+    seed_txns: Callable,
+    start_date: str,
+    end_date: str,
+    size: int,
+) -> None:
+    """Test Case: Summary cache miss and hit within budget at any size"""
+    seed_txns(size)
+    # auth, summary get and set, category map get, summary keys get and set
+    with budget(queries=1, redis=6):
+        resp = get_summary(warm_client, start_date, end_date)
+    assert resp.status_code == 200
+    with budget(queries=0, redis=2):
+        resp = get_summary(warm_client, start_date, end_date)
+    assert resp.status_code == 200
+
+
+def test_summary_no_n_plus_one(
+    warm_client: APIClient, seed_txns: Callable, start_date: str, end_date: str
+) -> None:
+    """Test Case: Summary cache miss queries don't grow with number of txn"""
+
+    def grow(size: int) -> None:
+        seed_txns(size)
+        cache.clear()
+
+    assert_no_growth(
+        lambda: get_summary(warm_client, start_date, end_date), grow, SIZES
+    )
+
+
+@pytest.fixture
+def ranges(start_date: str, end_date: str) -> list[tuple[str, str]]:
+    """Overlapping ranges of a dashboard, with a range repeated"""
+    month_ago = (date.fromisoformat(end_date) - timedelta(days=30)).isoformat()
+    yesterday = (date.fromisoformat(end_date) - timedelta(days=1)).isoformat()
+    return [
+        (start_date, end_date),
+        (month_ago, end_date),
+        (start_date, yesterday),
+        (month_ago, start_date),
+        (start_date, end_date),
+    ]
+
+
+def test_batch_summary(
+    client: APIClient, txn_factory: Callable, ranges: list[tuple[str, str]]
+) -> None:
+    """Test Case: Batch summary equals summaries of each range, cached or calculated"""
+    for i in range(5):
+        post_txn(client, txn_factory(amount=10 + i, category=f"Category {i % 2}"))
+    get_summary(client, *ranges[1])
+
+    resp = get_summaries(client, ranges)
+    assert resp.status_code == 200
+    expected = [get_summary(client, *date_range).data for date_range in ranges]
+    assert resp.data == expected
+    cache.clear()
+    assert get_summaries(client, ranges).data == expected
+
+
+def test_batch_summary_budget(
+    warm_client: APIClient,
+    budget: Callable,
+    seed_txns: Callable,
+    ranges: list[tuple[str, str]],
+) -> None:
+    """Test Case: Batch summary misses are one query, hits one Redis command"""
+    seed_txns(100)
+    # auth, get many, category map, set many pipeline, summary keys get and set
+    with budget(queries=1, redis=6):
+        resp = get_summaries(warm_client, ranges)
+    assert resp.status_code == 200
+    with budget(queries=0, redis=2):
+        resp = get_summaries(warm_client, ranges)
+    assert len(resp.data) == len(ranges)
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["", "?range=2025-04-01", "?range=2025-04-01,2025-13-01", "?range=a,b&range=c,d"]
+    + ["?" + "&".join(["range=2025-04-01,2025-04-30"] * 13)],
+)
+def test_batch_summary_invalid(client: APIClient, query: str) -> None:
+    """Test Case: Batch summary needs 1 to 12 ranges of two dates"""
+    resp = client.get(reverse("summary_batch") + query)
+    assert resp.status_code == 400
+
+
+def test_compare_previous_month(client: APIClient, txn_factory: Callable) -> None:
+    """Test Case: Month compared with previous month, change per category"""
+    post_txn(client, txn_factory(date="2025-02-10", amount=100, category="Rent"))
+    post_txn(client, txn_factory(date="2025-02-20", amount=50, category="Pet"))
+    post_txn(client, txn_factory(date="2025-03-10", amount=150, category="Rent"))
+    post_txn(client, txn_factory(date="2025-03-31", amount=20, category="Gifts"))
+
+    url = reverse("summary", args=["2025-03-01", "2025-03-31"])
+    resp = client.get(url + "?compare=previous")
+    assert resp.status_code == 200
+    assert resp.data["previous"]["date_range"] == ["2025-02-01", "2025-02-28"]
+    assert resp.data["current"]["total"] == "170.00"
+    assert resp.data["previous"]["total"] == "150.00"
+    assert resp.data["total_change"] == {"absolute": "20.00", "percent": "13.3"}
+    assert resp.data["change_by_cat"] == {
+        "Rent": {"absolute": "50.00", "percent": "50.0"},
+        "Gifts": {"absolute": "20.00", "percent": None},
+        "Pet": {"absolute": "-50.00", "percent": "-100.0"},
+    }
+    # Both periods are cached summaries, kept up to date by txn writes
+    post_txn(client, txn_factory(date="2025-02-01", amount=50, category="Rent"))
+    resp = client.get(url + "?compare=previous")
+    assert resp.data["change_by_cat"]["Rent"] == {"absolute": "0.00", "percent": "0.0"}
+    assert get_summary(client, "2025-02-01", "2025-02-28").data == resp.data["previous"]
+
+
+def test_compare_year(client: APIClient, txn_factory: Callable) -> None:
+    """Test Case: Range compared with same dates a year before"""
+    post_txn(client, txn_factory(date="2024-04-03", amount=40, category="Pet"))
+    post_txn(client, txn_factory(date="2025-04-03", amount=10, category="Pet"))
+    url = reverse("summary", args=["2025-04-01", "2025-04-07"])
+    resp = client.get(url + "?compare=year")
+    assert resp.data["previous"]["date_range"] == ["2024-04-01", "2024-04-07"]
+    assert resp.data["total_change"] == {"absolute": "-30.00", "percent": "-75.0"}
+
+
+def test_compare_budget(
+    warm_client: APIClient,
+    budget: Callable,
+    seed_txns: Callable,
+    start_date: str,
+    end_date: str,
+) -> None:
+    """Test Case: Comparison misses are one query, hits one Redis command"""
+    seed_txns(100)
+    url = reverse("summary", args=[start_date, end_date]) + "?compare=previous"
+    # auth, get many, category map, set many pipeline, summary keys get and set
+    with budget(queries=1, redis=6):
+        resp = warm_client.get(url)
+    assert resp.status_code == 200
+    with budget(queries=0, redis=2):
+        resp = warm_client.get(url)
+    assert resp.status_code == 200
+
+
+@pytest.mark.parametrize("query", ["?compare=week", "?compare=year&tags=1"])
+def test_compare_invalid(
+    client: APIClient, start_date: str, end_date: str, query: str
+) -> None:
+    """Test Case: Compare is previous or year, without tags"""
+    resp = client.get(reverse("summary", args=[start_date, end_date]) + query)
+    assert resp.status_code == 400
+
+
+def test_summary_events_published(
+    client: APIClient,
+    txn_factory: Callable,
+    start_date: str,
+    end_date: str,
+    django_capture_on_commit_callbacks: Callable,
+) -> None:
+    """Test Case: Txn writes publish their deltas and the cached summaries they change"""
+    pubsub = get_redis_connection().pubsub()
+    pubsub.subscribe(cache.make_key(SummaryCache().gen_events_channel("test")))
+    assert pubsub.get_message(timeout=1)["type"] == "subscribe"
+    get_summary(client, start_date, end_date)
+    with django_capture_on_commit_callbacks(execute=True):
+        txn = txn_factory(date=end_date, amount=10, category="Rent")
+        txn_id = post_txn(client, txn).data["id"]
+        patch_txn(client, txn_id, {"amount": 15})
+    created, updated = (json.loads(pubsub.get_message(timeout=1)["data"]) for _ in "ab")
+    pubsub.close()
+
+    assert created["txns"] == [
+        {"date": end_date, "amount": "10.00", "category": "Rent"}
+    ]
+    assert [txn["amount"] for txn in updated["txns"]] == ["-10.00", "15.00"]
+    assert updated["summaries"] == [
+        {
+            "date_range": [start_date, end_date],
+            "total": "15.00",
+            "total_by_cat": {"Rent": "15.00"},
+        }
+    ]
+
+
+def test_summary_events_stream(
+    client: APIClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test Case: Stream sends keepalives while idle and the user's summary events"""
+    monkeypatch.setattr(SummaryEventsView, "KEEPALIVE_SECONDS", 0.1)
+    resp = client.get(reverse("summary_events"))
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == "text/event-stream"
+
+    async def read_events() -> list[bytes]:
+        events = resp.streaming_content
+        received = [await events.__anext__(), await events.__anext__()]
+        publish(SummaryCache().gen_events_channel("test"), '{"txns": []}')
+        while not received[-1].startswith(b"event:"):
+            received.append(await asyncio.wait_for(events.__anext__(), timeout=5))
+        await events.aclose()
+        return received
+
+    received = asyncio.run(read_events())
+    assert received[0] == b"retry: 1000\n\n"
+    assert received[1] == b": keepalive\n\n"
+    assert received[-1] == b'event: summary\ndata: {"txns": []}\n\n'
+    assert APIClient().get(reverse("summary_events")).status_code == 401
+
+
 # TODO: Add test cases which test robustness like invalid inputs
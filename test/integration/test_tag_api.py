@@ -0,0 +1,104 @@
+from typing import Callable
+
+import pytest
+from core.models import Txn
+from django.db import connection
+from django.urls import reverse
+from integration.int_test_util import get_summary, patch_txn, post_txn
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+def post_tag(client: APIClient, name: str) -> Response:
+    return client.post(reverse("tag-list"), {"name": name}, format="json")
+
+
+@pytest.fixture
+def tags(client: APIClient) -> dict[str, int]:
+    """Tag ids by name of test user"""
+    return {
+        name: post_tag(client, name).data["id"] for name in ("trip", "work", "kids")
+    }
+
+
+@pytest.fixture
+def tagged(client: APIClient, txn_factory: Callable, tags: dict) -> None:
+    """Txn tagged trip, trip and work, and untagged"""
+    post_txn(client, txn_factory(amount=10, tags=[tags["trip"]]))
+    post_txn(client, txn_factory(amount=20, tags=[tags["trip"], tags["work"]]))
+    post_txn(client, txn_factory(amount=40))
+
+
+def test_create_tag(client: APIClient, tags: dict) -> None:
+    """Test Case: Tags are listed and names are unique per user"""
+    resp = client.get(reverse("tag-list"))
+    assert {tag["name"] for tag in resp.data} == set(tags)
+    resp = post_tag(client, "trip")
+    assert resp.status_code == 400
+
+
+def test_txn_tags(client: APIClient, txn_factory: Callable, tags: dict) -> None:
+    """Test Case: Txn tags are the user's tag ids, stored sorted once each"""
+    resp = post_txn(
+        client, txn_factory(tags=[tags["work"], tags["trip"], tags["work"]])
+    )
+    assert resp.status_code == 201
+    assert resp.data["tags"] == sorted([tags["trip"], tags["work"]])
+
+    other = APIClient()
+    other.post("/user/", {"username": "other", "password": "test"})
+    token = other.post("/token/", {"username": "other", "password": "test"})
+    other.credentials(HTTP_AUTHORIZATION=f"Bearer {token.data['access']}")
+    resp = post_txn(other, txn_factory(tags=[tags["trip"]]))
+    assert resp.status_code == 400
+
+
+def test_list_by_tags(client: APIClient, tagged: None, tags: dict) -> None:
+    """Test Case: List txn with any or all of tags"""
+    trip, work = tags["trip"], tags["work"]
+    resp = client.get(reverse("txn-list") + f"?tags={trip},{work}")
+    assert sorted(txn["amount"] for txn in resp.data) == ["10.00", "20.00"]
+    resp = client.get(reverse("txn-list") + f"?tags_all={trip},{work}")
+    assert [txn["amount"] for txn in resp.data] == ["20.00"]
+
+
+def test_summary_by_tags(
+    client: APIClient, tagged: None, tags: dict, start_date: str, end_date: str
+) -> None:
+    """Test Case: Summary of txn with any or all of tags, full summary still cached"""
+    trip, work = tags["trip"], tags["work"]
+    url = reverse("summary", args=[start_date, end_date])
+    assert get_summary(client, start_date, end_date).data["total"] == "70.00"
+    resp = client.get(url + f"?tags={trip}")
+    assert resp.data["total"] == "30.00"
+    resp = client.get(url + f"?tags_all={trip},{work}")
+    assert resp.data["total"] == "20.00"
+    resp = client.get(url + "?tags=trip")
+    assert resp.status_code == 400
+    assert get_summary(client, start_date, end_date).data["total"] == "70.00"
+
+
+def test_delete_tag(client: APIClient, tagged: None, tags: dict) -> None:
+    """Test Case: Deleted tag is removed from txn"""
+    resp = client.delete(reverse("tag-detail", args=[tags["trip"]]))
+    assert resp.status_code == 204
+    assert list(Txn.objects.values_list("tags", flat=True).order_by("amount")) == [
+        [],
+        [tags["work"]],
+        [],
+    ]
+    txn_id = Txn.objects.get(amount=10).pk
+    resp = patch_txn(client, txn_id, {"tags": [tags["trip"]]})
+    assert resp.status_code == 400
+
+
+def test_tag_filter_uses_index(client: APIClient, tags: dict) -> None:
+    """Test Case: Tag filters can be answered by the GIN index"""
+    with connection.cursor() as cursor:
+        # Tiny test table would be scanned, the plan shows the index can be used
+        cursor.execute("SET LOCAL enable_seqscan = off")
+    for lookup in ("tags__overlap", "tags__contains"):
+        plan = Txn.objects.filter(**{lookup: [tags["trip"]]}).explain()
+        assert "txn_tags_gin" in plan
@@ -0,0 +1,82 @@
+from unittest.mock import patch
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from integration.int_test_util import post_txn_file
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+CSV_FILE = b"Date,Description,Amount\n2025-04-01,Coffee,-4.50\n"
+
+
+@override_settings(
+    THROTTLE_BUCKETS={"user_create": {"IP": {"RATE": "1/hour", "BURST": 2}}}
+)
+def test_create_user_throttled_per_ip() -> None:
+    """Test Case: User creation over the IP bucket is rejected with Retry-After"""
+    api_client = APIClient()
+    for username in ["throttle1", "throttle2"]:
+        resp = api_client.post(reverse("user"), {"username": username, "password": "x"})
+        assert resp.status_code == 201
+
+    resp = api_client.post(reverse("user"), {"username": "throttle3", "password": "x"})
+    assert resp.status_code == 429
+    # Refill of one token at 1/hour
+    assert 3500 < int(resp["Retry-After"]) <= 3600
+
+    resp = api_client.post(
+        reverse("user"),
+        {"username": "throttle3", "password": "x"},
+        REMOTE_ADDR="10.0.0.2",
+    )
+    assert resp.status_code == 201
+
+
+@override_settings(
+    THROTTLE_BUCKETS={
+        "txnfile": {
+            "USER": {"RATE": "1/minute", "BURST": 10},
+            "COSTS": {"pdf": 10},
+        }
+    }
+)
+@patch("core.api.services.TxnFileParser.txn_file_to_dict", return_value=[])
+def test_txnfile_pdf_costs_more(_, client: APIClient) -> None:
+    """Test Case: AI parsed statement takes its cost from the user bucket"""
+    resp = post_txn_file(client, b"%PDF-1.4", "statement.pdf")
+    assert resp.status_code == 200
+
+    resp = post_txn_file(client, CSV_FILE, "export.csv")
+    assert resp.status_code == 429
+    assert int(resp["Retry-After"]) == 60
+
+
+@override_settings(
+    THROTTLE_BUCKETS={
+        "txnfile": {
+            "USER": {"RATE": "1/hour", "BURST": 1},
+            "IP": {"RATE": "1/hour", "BURST": 3},
+        }
+    }
+)
+def test_txnfile_throttled_per_user_and_ip(client: APIClient) -> None:
+    """Test Case: Each user has their own bucket, users share their IP bucket"""
+    resp = post_txn_file(client, CSV_FILE, "export.csv")
+    assert resp.status_code == 200
+    resp = post_txn_file(client, CSV_FILE, "export.csv")
+    assert resp.status_code == 429
+
+    other_client = APIClient()
+    other_client.post(reverse("user"), {"username": "other", "password": "other"})
+    token = other_client.post(
+        reverse("token"), {"username": "other", "password": "other"}
+    ).data["access"]
+    other_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    resp = post_txn_file(other_client, CSV_FILE, "export.csv")
+    assert resp.status_code == 200
+
+    # IP bucket was charged by every request, including the rejected one
+    resp = post_txn_file(other_client, CSV_FILE, "export.csv")
+    assert resp.status_code == 429
@@ -2,7 +2,13 @@ from typing import Callable
 
 import pytest
 from django.urls import reverse
-from integration.int_test_util import post_txn
+from integration.int_test_util import (
+    assert_no_growth,
+    delete_txn,
+    get_summary,
+    patch_txn,
+    post_txn,
+)
 from rest_framework.test import APIClient
 
 pytestmark = pytest.mark.django_db
@@ -165,3 +171,90 @@ def test_filter_desc_date(
         cur = data["date"]
         assert cur <= last
         last = cur
+
+
+SIZES = [1, 10, 100]
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_list_budget(
+    warm_client: APIClient, budget: Callable, seed_txns: Callable, size: int
+) -> None:
+    """Test Case: List txn in one query and one Redis command (auth) at any size"""
+    seed_txns(size)
+    with budget(queries=1, redis=1):
+        resp = warm_client.get(reverse("txn-list"))
+    assert resp.status_code == 200
+    assert len(resp.data) == size
+
+
+def test_list_no_n_plus_one(warm_client: APIClient, seed_txns: Callable) -> None:
+    """Test Case: List txn queries don't grow with number of txn"""
+    assert_no_growth(lambda: warm_client.get(reverse("txn-list")), seed_txns, SIZES)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_create_budget(
+    warm_client: APIClient,
+    budget: Callable,
+    seed_txns: Callable,
+    txn: dict,
+    start_date: str,
+    end_date: str,
+    size: int,
+    django_capture_on_commit_callbacks: Callable,
+) -> None:
+    """Test Case: Create txn updating a cached summary within budget at any size"""
+    seed_txns(size)
+    post_txn(warm_client, txn)
+    get_summary(warm_client, start_date, end_date)
+    # Savepoint, insert and release. Auth, category map, summary keys, summary get and
+    # set, budgets, publish on commit. Txn of a default category, the first txn of a new
+    # category creates it
+    with django_capture_on_commit_callbacks(execute=True), budget(queries=3, redis=7):
+        resp = post_txn(warm_client, {**txn, "category": "Groceries"})
+    assert resp.status_code == 201
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_update_budget(
+    warm_client: APIClient,
+    budget: Callable,
+    seed_txns: Callable,
+    txn: dict,
+    start_date: str,
+    end_date: str,
+    size: int,
+    django_capture_on_commit_callbacks: Callable,
+) -> None:
+    """Test Case: Update txn updating a cached summary within budget at any size"""
+    seed_txns(size)
+    txn_id = post_txn(warm_client, txn).data["id"]
+    get_summary(warm_client, start_date, end_date)
+    # Savepoint, select, update and release. Auth, summary keys, summary get and set to
+    # remove old and add new txn, budgets, publish on commit
+    with django_capture_on_commit_callbacks(execute=True), budget(queries=4, redis=6):
+        resp = patch_txn(warm_client, txn_id, {"amount": 3.21})
+    assert resp.status_code == 200
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_delete_budget(
+    warm_client: APIClient,
+    budget: Callable,
+    seed_txns: Callable,
+    txn: dict,
+    start_date: str,
+    end_date: str,
+    size: int,
+    django_capture_on_commit_callbacks: Callable,
+) -> None:
+    """Test Case: Delete txn updating a cached summary within budget at any size"""
+    seed_txns(size)
+    txn_id = post_txn(warm_client, txn).data["id"]
+    get_summary(warm_client, start_date, end_date)
+    # Savepoint, select, delete and release. Auth, summary keys, summary get and set,
+    # budgets, publish on commit
+    with django_capture_on_commit_callbacks(execute=True), budget(queries=4, redis=6):
+        resp = delete_txn(warm_client, txn_id)
+    assert resp.status_code == 204
@@ -0,0 +1,118 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from integration.int_test_util import get_summary, post_txn_file
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def statement(start_date: str, end_date: str) -> list[dict]:
+    """Txn parsed from a statement"""
+    return [
+        {
+            "date": start_date,
+            "description": "Coffee",
+            "amount": 4.50,
+            "category": "Food",
+        },
+        {
+            "date": start_date,
+            "description": "Coffee",
+            "amount": 4.50,
+            "category": "Food",
+        },
+        {
+            "date": end_date,
+            "description": "Rent",
+            "amount": 1000.00,
+            "category": "Rent",
+        },
+    ]
+
+
+@patch("core.api.services.TxnFileParser.txn_file_to_dict")
+def test_import_statement(
+    mock_parse: MagicMock, client: APIClient, statement: list[dict]
+) -> None:
+    """Test Case: Identical txn within one statement are all imported"""
+    mock_parse.return_value = statement
+    resp = post_txn_file(client, b"%PDF", "statement.pdf")
+    assert resp.status_code == 200
+    assert resp.data == {"created": 3, "skipped": 0}
+
+
+@patch("core.api.services.TxnFileParser.txn_file_to_dict")
+def test_import_overlapping_statement(
+    mock_parse: MagicMock,
+    client: APIClient,
+    statement: list[dict],
+    start_date: str,
+    end_date: str,
+) -> None:
+    """Test Case: Txn already imported from an overlapping statement are skipped"""
+    mock_parse.return_value = statement
+    resp = post_txn_file(client, b"%PDF", "statement.pdf")
+    resp = get_summary(client, start_date, end_date)
+    # Second statement overlaps first and also has a new txn
+    mock_parse.return_value = statement[1:] + [
+        {"date": end_date, "description": "COFFEE ", "amount": 4.50, "category": "Food"}
+    ]
+    resp = post_txn_file(client, b"%PDF", "statement.pdf")
+    assert resp.status_code == 200
+    assert resp.data == {"created": 1, "skipped": 2}
+    resp = get_summary(client, start_date, end_date)
+    assert resp.data["total"] == "1013.50"
+    assert resp.data["total_by_cat"] == {"Food": "13.50", "Rent": "1000.00"}
+
+
+def test_import_csv(client: APIClient, start_date: str, end_date: str) -> None:
+    """Test Case: CSV export is imported and re-importing it skips every txn"""
+    csv_file = (
+        "Date,Description,Amount\n"
+        f"{start_date},Coffee,-4.50\n{start_date},Coffee,-4.50\n{end_date},Paycheck,100.00\n"
+    ).encode()
+    resp = get_summary(client, start_date, end_date)
+    resp = post_txn_file(client, csv_file, "export.csv")
+    assert resp.status_code == 200
+    assert resp.data == {"created": 3, "skipped": 0}
+    resp = post_txn_file(client, csv_file, "export.csv")
+    assert resp.data == {"created": 0, "skipped": 3}
+    resp = get_summary(client, start_date, end_date)
+    assert resp.data["total"] == "-91.00"
+
+
+def test_import_unsupported_file(client: APIClient) -> None:
+    """Test Case: Unsupported file type"""
+    resp = post_txn_file(client, b"\x89PNG", "image.png")
+    assert resp.status_code == 400
+
+
+def test_import_invalid_csv_rolls_back(client: APIClient, start_date: str) -> None:
+    """Test Case: Invalid row fails the whole import"""
+    csv_file = (
+        f"Date,Description,Amount\n{start_date},Coffee,-4.50\n{start_date},Coffee,abc\n"
+    ).encode()
+    resp = post_txn_file(client, csv_file, "export.csv")
+    assert resp.status_code == 400
+    resp = client.get("/txn/")
+    assert resp.data == []
+
+
+def test_import_blank_description_csv(client: APIClient, start_date: str) -> None:
+    """Test Case: CSV row without a description is imported with an empty one"""
+    csv_file = f"Date,Description,Amount\n{start_date},,-4.50\n".encode()
+    resp = post_txn_file(client, csv_file, "export.csv")
+    assert resp.status_code == 200
+    assert resp.data == {"created": 1, "skipped": 0}
+    assert client.get("/txn/").data[0]["description"] == ""
+
+
+def test_import_qif_without_payee(client: APIClient) -> None:
+    """Test Case: QIF record without payee or memo is imported with empty description"""
+    qif_file = b"!Type:Bank\nD04/10/2025\nT-12.00\n^\n"
+    resp = post_txn_file(client, qif_file, "export.qif")
+    assert resp.status_code == 200
+    assert resp.data == {"created": 1, "skipped": 0}
+    assert client.get("/txn/").data[0]["description"] == ""
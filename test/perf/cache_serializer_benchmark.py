@@ -0,0 +1,85 @@
+"""
+Compare cache payload size and encode/decode CPU cost of the django-redis default
+(pickle, no compression) with the msgpack serializer and threshold compressor in core.cache
+
+Run from the repo root:
+    PYTHONPATH=myspendsheet python test/perf/cache_serializer_benchmark.py
+"""
+
+import timeit
+from datetime import date, timedelta
+from decimal import Decimal
+
+from core.cache import MsgpackSerializer, ThresholdZlibCompressor
+from django_redis.compressors.identity import IdentityCompressor
+from django_redis.exceptions import CompressorError
+from django_redis.serializers.pickle import PickleSerializer
+
+OPTIONS = {"COMPRESS_MIN_LENGTH": 256}
+CODECS = {
+    "pickle": (PickleSerializer(OPTIONS), IdentityCompressor(OPTIONS)),
+    "msgpack+zlib": (MsgpackSerializer(OPTIONS), ThresholdZlibCompressor(OPTIONS)),
+}
+
+
+def summary(num_of_categories: int) -> dict:
+    return {
+        "date_range": [date(2025, 4, 1), date(2025, 4, 30)],
+        "total": Decimal("1234.56") * num_of_categories,
+        "total_by_cat": {
+            f"Category {i}": Decimal("1234.56") + i for i in range(num_of_categories)
+        },
+    }
+
+
+def summary_keys(num_of_keys: int) -> set:
+    start = date(2025, 1, 1)
+    return {
+        f"test_user_1234abcd:summary:{start + timedelta(days=i)}:{start + timedelta(days=i + 30)}"
+        for i in range(num_of_keys)
+    }
+
+
+PAYLOADS = {
+    "summary, 5 categories": summary(5),
+    "summary, 50 categories": summary(50),
+    "auth user": {
+        "id": 1234,
+        "username": "test_user_1234abcd",
+        "is_active": True,
+        "is_staff": False,
+        "is_superuser": False,
+    },
+    "summary keys, 10": summary_keys(10),
+    "summary keys, 500": summary_keys(500),
+}
+
+
+def encode(serializer, compressor, value) -> bytes:
+    return compressor.compress(serializer.dumps(value))
+
+
+def decode(serializer, compressor, value: bytes):
+    # Same as django_redis.client.DefaultClient.decode
+    try:
+        value = compressor.decompress(value)
+    except CompressorError:
+        pass
+    return serializer.loads(value)
+
+
+def per_call_us(func, number: int = 2000) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+if __name__ == "__main__":
+    print(f"{'payload':<24}{'codec':<14}{'bytes':>8}{'encode us':>12}{'decode us':>12}")
+    for name, value in PAYLOADS.items():
+        for codec, (serializer, compressor) in CODECS.items():
+            encoded = encode(serializer, compressor, value)
+            assert decode(serializer, compressor, encoded) == value
+            encode_us = per_call_us(lambda: encode(serializer, compressor, value))
+            decode_us = per_call_us(lambda: decode(serializer, compressor, encoded))
+            print(
+                f"{name:<24}{codec:<14}{len(encoded):>8}{encode_us:>12.1f}{decode_us:>12.1f}"
+            )
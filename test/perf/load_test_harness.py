@@ -0,0 +1,316 @@
+"""
+Run the locust scenarios headless against a local stack and gate them on SLOs and baselines
+
+Starts Postgres, Redis and the app with docker compose (or gunicorn against already running
+services with --stack local), migrates, seeds users and txn with seed_perf_data and runs the
+scenarios of load_test_config.json in turn: token, ramp up, steady state, the realistic
+workload of workload.py and the replay of its recorded trace. p50/p95/p99 latency, RPS and
+failure rate of every endpoint are checked against the SLOs and, with a tolerance, against
+the baseline stored for the scenario. Exits 1 on any violation.
+
+Run from the repo root:
+    python test/perf/load_test_harness.py
+    python test/perf/load_test_harness.py --stack local --scenario steady_state
+    python test/perf/load_test_harness.py --update-baselines
+
+Results are written to test/perf/results, baselines to test/perf/baselines. Baselines
+depend on the machine, record them where the gate is run.
+"""
+
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+import requests
+
+PERF_DIR = Path(__file__).resolve().parent
+REPO_DIR = PERF_DIR.parent.parent
+APP_DIR = REPO_DIR / "myspendsheet"
+CONFIG_FILE = PERF_DIR / "load_test_config.json"
+RESULTS_DIR = PERF_DIR / "results"
+BASELINES_DIR = PERF_DIR / "baselines"
+HOST = "http://localhost:8000"
+# Locust stats columns, response times are in ms
+PERCENTILES = {"p50": "50%", "p95": "95%", "p99": "99%"}
+
+
+class Stack:
+    """
+    App, Postgres and Redis the scenarios run against
+
+    Method:
+        Public:
+            - start stack
+            - run manage.py command in app environment
+            - stop stack
+    """
+
+    def __init__(self, kind: str, workers: int):
+        """
+        Initialize Stack
+
+        Attribute:
+            kind (str): docker to start everything with docker compose, local to run
+                gunicorn against Postgres and Redis of the development settings
+            workers (int): Gunicorn workers
+        """
+        self.kind = kind
+        self.workers = workers
+        self._server: Optional[subprocess.Popen] = None
+
+    def _compose(self, *args: str) -> None:
+        """Run docker compose command in repo root"""
+        subprocess.run(["docker", "compose", *args], cwd=REPO_DIR, check=True)
+
+    def manage(self, *args: str) -> None:
+        """Run manage.py command where the app runs"""
+        if self.kind == "docker":
+            self._compose("exec", "-T", "web", "python", "manage.py", *args)
+        else:
+            subprocess.run(
+                [sys.executable, "manage.py", *args], cwd=APP_DIR, check=True
+            )
+
+    def start(self) -> None:
+        """Start stack and wait until the app answers"""
+        if self.kind == "docker":
+            env = {**os.environ, "WEB_CONCURRENCY": str(self.workers)}
+            subprocess.run(
+                ["docker", "compose", "up", "-d", "--build", "--wait"],
+                cwd=REPO_DIR,
+                env=env,
+                check=True,
+            )
+        else:
+            env = {
+                **os.environ,
+                "GUNICORN_BIND": "127.0.0.1:8000",
+                "WEB_CONCURRENCY": str(self.workers),
+            }
+            self._server = subprocess.Popen(
+                [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+                cwd=APP_DIR,
+                env=env,
+                stdout=subprocess.DEVNULL,
+            )
+        self._wait_ready()
+
+    def _wait_ready(self, timeout: float = 120.0) -> None:
+        """Wait for any response from the app"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._server is not None and self._server.poll() is not None:
+                raise RuntimeError("Gunicorn exited on start")
+            try:
+                requests.get(f"{HOST}/metrics", timeout=5)
+                return
+            except requests.RequestException:
+                time.sleep(0.5)
+        raise TimeoutError(f"App not up at {HOST} after {timeout}s")
+
+    def stop(self) -> None:
+        """Stop stack"""
+        if self.kind == "docker":
+            self._compose("down")
+        elif self._server is not None:
+            self._server.terminate()
+            self._server.wait(timeout=60)
+
+
+def seed(stack: Stack, options: dict) -> None:
+    """Migrate and seed perf test users, tokens and txn"""
+    # Migrations are generated on deploy, see .github/workflows/deploy.yml
+    stack.manage("makemigrations")
+    stack.manage("migrate")
+    # Files are written to test/perf on the host, the repo is mounted into the container
+    output_dir = (
+        "/myspendsheet-backend/test/perf" if stack.kind == "docker" else str(PERF_DIR)
+    )
+    args = ["seed_perf_data", "--clear", "--output-dir", output_dir]
+    for option, value in options.items():
+        args += [f"--{option.replace('_', '-')}", str(value)]
+    stack.manage(*args)
+
+
+def run_scenario(name: str, scenario: dict) -> dict:
+    """Run locust scenario headless, return stats by endpoint"""
+    RESULTS_DIR.mkdir(exist_ok=True)
+    prefix = RESULTS_DIR / name
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "locust",
+            "-f",
+            scenario["locustfile"],
+            "--headless",
+            "--only-summary",
+            "--users",
+            str(scenario["users"]),
+            "--spawn-rate",
+            str(scenario["spawn_rate"]),
+            "--run-time",
+            scenario["run_time"],
+            "--host",
+            HOST,
+            "--csv",
+            str(prefix),
+            # Failures are gated here with the rest of the stats
+            "--exit-code-on-error",
+            "0",
+        ],
+        # Locust files read the user and token files from the working directory
+        cwd=PERF_DIR,
+        env={**os.environ, **scenario.get("env", {})},
+        check=True,
+    )
+    return read_stats(Path(f"{prefix}_stats.csv"))
+
+
+def read_stats(path: Path) -> dict:
+    """Return {"METHOD name": stats} from locust stats csv"""
+    stats = {}
+    with open(path, newline="") as file:
+        for row in csv.DictReader(file):
+            if row["Name"] == "Aggregated":
+                continue
+            requests_count = int(row["Request Count"])
+            endpoint = {
+                percentile: float(row[column]) if requests_count else None
+                for percentile, column in PERCENTILES.items()
+            }
+            endpoint["rps"] = float(row["Requests/s"])
+            endpoint["requests"] = requests_count
+            endpoint["failure_rate"] = (
+                int(row["Failure Count"]) / requests_count if requests_count else 0.0
+            )
+            stats[f"{row['Type']} {row['Name']}"] = endpoint
+    return stats
+
+
+def check_slos(stats: dict, slos: dict) -> list[str]:
+    """Return SLO violations of every endpoint"""
+    violations = []
+    for endpoint, endpoint_stats in stats.items():
+        slo = slos.get(endpoint, slos["default"])
+        for metric, limit in slo.items():
+            value = endpoint_stats[metric]
+            if value is not None and value > limit:
+                violations.append(f"{endpoint} {metric} {value:g} over SLO {limit:g}")
+    return violations
+
+
+def check_baseline(stats: dict, baseline: dict, regression: dict) -> list[str]:
+    """Return regressions of every endpoint against its baseline"""
+    violations = []
+    for endpoint, endpoint_stats in stats.items():
+        base = baseline.get(endpoint)
+        # Percentiles of a few requests are noise
+        if base is None or endpoint_stats["requests"] < regression["min_requests"]:
+            continue
+        for percentile in PERCENTILES:
+            if endpoint_stats[percentile] is None or base[percentile] is None:
+                continue
+            limit = (
+                base[percentile] * (1 + regression["latency_tolerance"])
+                + regression["latency_slack_ms"]
+            )
+            if endpoint_stats[percentile] > limit:
+                violations.append(
+                    f"{endpoint} {percentile} {endpoint_stats[percentile]:g}ms, "
+                    f"baseline {base[percentile]:g}ms"
+                )
+        if endpoint_stats["rps"] < base["rps"] * (1 - regression["rps_tolerance"]):
+            violations.append(
+                f"{endpoint} rps {endpoint_stats['rps']:.1f}, baseline {base['rps']:.1f}"
+            )
+    return violations
+
+
+def print_stats(name: str, stats: dict) -> None:
+    """Print stats table of scenario"""
+    print(f"\n{name}")
+    print(
+        f"{'endpoint':<32}{'requests':>10}{'p50':>8}{'p95':>8}{'p99':>8}"
+        f"{'rps':>8}{'fail %':>8}"
+    )
+    for endpoint, endpoint_stats in sorted(stats.items()):
+        latency = "".join(
+            f"{endpoint_stats[percentile] or 0:>8.0f}" for percentile in PERCENTILES
+        )
+        print(
+            f"{endpoint:<32}{endpoint_stats['requests']:>10}{latency}"
+            f"{endpoint_stats['rps']:>8.1f}{endpoint_stats['failure_rate'] * 100:>8.2f}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stack", choices=["docker", "local"], default="docker")
+    parser.add_argument("--config", type=Path, default=CONFIG_FILE)
+    parser.add_argument(
+        "--scenario", action="append", help="Scenario to run, all if not given"
+    )
+    parser.add_argument(
+        "--skip-seed", action="store_true", help="Reuse data of the last run"
+    )
+    parser.add_argument(
+        "--update-baselines",
+        action="store_true",
+        help="Store results as the baselines instead of comparing against them",
+    )
+    args = parser.parse_args()
+
+    config = json.loads(args.config.read_text())
+    scenarios = {
+        name: scenario
+        for name, scenario in config["scenarios"].items()
+        if not args.scenario or name in args.scenario
+    }
+    stack = Stack(args.stack, config["workers"])
+    violations = {}
+    try:
+        stack.start()
+        if not args.skip_seed:
+            seed(stack, config["seed"])
+        for name, scenario in scenarios.items():
+            stats = run_scenario(name, scenario)
+            print_stats(name, stats)
+            scenario_violations = check_slos(stats, config["slos"])
+            baseline_file = BASELINES_DIR / f"{name}.json"
+            if args.update_baselines:
+                BASELINES_DIR.mkdir(exist_ok=True)
+                baseline_file.write_text(json.dumps(stats, indent=2))
+            elif baseline_file.exists():
+                baseline = json.loads(baseline_file.read_text())
+                scenario_violations += check_baseline(
+                    stats, baseline, config["regression"]
+                )
+            else:
+                print(f"No baseline for {name}, run with --update-baselines")
+            (RESULTS_DIR / f"{name}.json").write_text(
+                json.dumps(
+                    {"stats": stats, "violations": scenario_violations}, indent=2
+                )
+            )
+            violations[name] = scenario_violations
+    finally:
+        stack.stop()
+
+    failed = False
+    for name, scenario_violations in violations.items():
+        print(f"\n{name}: {'FAIL' if scenario_violations else 'PASS'}")
+        for violation in scenario_violations:
+            print(f"  {violation}")
+        failed = failed or bool(scenario_violations)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Compare per request overhead of the full settings stack (config.settings_prod) with the API
+only stack (config.settings_api) on a cached summary request through the ASGI handler
+
+Needs the database and redis of the development settings. Run from the repo root:
+    python test/perf/middleware_benchmark.py
+"""
+
+import os
+import subprocess
+import sys
+
+SETTINGS = ["config.settings_prod", "config.settings_api"]
+REQUESTS = 2000
+
+RUN = """
+import asyncio, time, uuid
+import django
+django.setup()
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+user = get_user_model().objects.create_user(username=f"bench_{uuid.uuid4().hex[:8]}")
+# ALLOWED_HOSTS has no testserver, the host name of the test client
+settings.ALLOWED_HOSTS.append("testserver")
+client = AsyncClient()
+headers = {"authorization": f"Bearer {AccessToken.for_user(user)}"}
+url = "/summary/2025-04-01/2025-04-30"
+
+
+async def main(number):
+    for _ in range(50):
+        assert (await client.get(url, headers=headers)).status_code == 200
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(number):
+            await client.get(url, headers=headers)
+        best = min(best, time.perf_counter() - start)
+    return best / number * 1e6
+
+
+try:
+    print(f"{asyncio.run(main({number})):.0f}")
+finally:
+    user.delete()
+"""
+
+
+def per_request_us(settings_module: str) -> float:
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+    result = subprocess.run(
+        [sys.executable, "-c", RUN.replace("{number}", str(REQUESTS))],
+        cwd=os.path.join(os.path.dirname(__file__), "..", "..", "myspendsheet"),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    print(f"{'settings':<24}{'us/request':>12}")
+    for settings_module in SETTINGS:
+        print(f"{settings_module:<24}{per_request_us(settings_module):>12.0f}")
@@ -6,11 +6,15 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import Optional
 
+# For a local stack, `python manage.py seed_perf_data` writes both files with users and txn
+# seeded straight into the database, in minutes instead of hours
 USER_FILE = "perftest_user.txt"
 PASSWORD = "test123"
 USER_TOKEN_FILE = "perftest_user_tokens.json"
 DEFAULT_NUM_OF_USERS = 5000
 MAX_WORKERS = 1
+# Set to e.g. http://localhost:8000 to run against a local stack
+PERFTEST_HOST = os.getenv("PERFTEST_HOST", "https://api.myspendsheet.com")
 
 def perftest_user_file_exists():
     return os.path.exists(USER_FILE)
@@ -24,7 +28,7 @@ def create_perftest_user(username: str) -> None:
         "username": username,
         "password": PASSWORD #All same pw to make easier
     }
-    create_user_url = "https://api.myspendsheet.com/user/"
+    create_user_url = f"{PERFTEST_HOST}/user/"
     try:
         resp = requests.post(create_user_url, json=payload)
         resp.raise_for_status()
@@ -65,7 +69,7 @@ def get_perftest_user_token(username) -> Optional[dict]:
         "username": username,
         "password": PASSWORD #All same pw to make easier
     }
-    token_url = "https://api.myspendsheet.com/token/"
+    token_url = f"{PERFTEST_HOST}/token/"
     try:
         resp = requests.post(token_url, json=payload)
         resp.raise_for_status()
@@ -77,7 +81,7 @@ def create_perftest_user_token_map(num_of_users: int) -> dict:
     """Create a map with {username: token} by fetching user tokens live concurrently"""
     perftest_user_token_map = {}
     # Logging for perf checking
-    print(f"{num_of_users} users token fetch started at {datetime.now().strftime("%H:%M:%S")}")
+    print(f"{num_of_users} users token fetch started at {datetime.now().strftime('%H:%M:%S')}")
 
     #Get usernames from user file and fetches tokens concurrently
     with open(USER_FILE, "r") as file, ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
@@ -98,7 +102,7 @@ def create_perftest_user_token_map(num_of_users: int) -> dict:
             else:
                 perftest_user_token_map[username] = token_resp
 
-        print(f"{num_of_users} users token fetch ended at {datetime.now().strftime("%H:%M:%S")}")
+        print(f"{num_of_users} users token fetch ended at {datetime.now().strftime('%H:%M:%S')}")
 
     return perftest_user_token_map
 
@@ -0,0 +1,66 @@
+"""
+Realistic workload of workload.py sent by the perf test users
+
+Users use the tokens written by seed_perf_data, which are valid for a day. Set
+WORKLOAD_TRACE_OUT to record the requests sent as a JSONL trace to replay with
+trace_replay_load_test.py.
+"""
+
+import os
+import time
+from threading import Lock
+
+from locust import HttpUser, events, task
+from locust.exception import StopUser
+from perftest_util import (
+    perftest_user_token_map_from_file,
+    perftest_users_from_user_file,
+)
+from workload import TraceWriter, WorkloadGenerator, load_config, send
+
+perftest_users = []
+perftest_users_token_map = {}
+perftest_users_lock = Lock()
+workload_config = {}
+trace = None
+start_time = 0.0
+
+
+@events.test_start.add_listener
+def start_of_test(environment, **kwargs):
+    global trace, start_time
+    perftest_users.extend(perftest_users_from_user_file())
+    perftest_users_token_map.update(perftest_user_token_map_from_file())
+    workload_config.update(load_config())
+    start_time = time.monotonic()
+    if os.getenv("WORKLOAD_TRACE_OUT"):
+        trace = TraceWriter(os.environ["WORKLOAD_TRACE_OUT"])
+
+
+@events.test_stop.add_listener
+def end_of_test(environment, **kwargs):
+    if trace is not None:
+        trace.close()
+
+
+class SimulatedUser(HttpUser):
+    def wait_time(self) -> float:
+        return self.generator.think_time()
+
+    @task
+    def send_request(self):
+        request = self.generator.next_request()
+        t = time.monotonic() - start_time
+        status = send(self.client, request, self.txn_ids)
+        if trace is not None:
+            trace.write(t, self.username, request, status)
+
+    def on_start(self):
+        with perftest_users_lock:
+            if not perftest_users:
+                raise StopUser("No perf test users left")
+            self.username = perftest_users.pop()
+        self.generator = WorkloadGenerator(workload_config, self.username)
+        self.txn_ids = {}
+        access = perftest_users_token_map[self.username]["access"]
+        self.client.headers.update({"Authorization": f"Bearer {access}"})
@@ -20,7 +20,7 @@ def end_of_test(environment, **kwargs):
 
 class SimulatedUser(HttpUser):
     def get_tokens(self):
-        get_token_url = "/token/?"
+        get_token_url = "/token/"
         get_token_resp = self.client.post(
             get_token_url,
             json={
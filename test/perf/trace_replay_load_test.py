@@ -0,0 +1,68 @@
+"""
+Replay JSONL trace of WORKLOAD_TRACE, recorded by realistic_load_test.py or generated by
+workload.py
+
+Trace users are mapped to the perf test users in order of their first request and send the
+same requests at the same time into the run as recorded. Spawn all users at once, the run
+ends when the last request is sent.
+"""
+
+import os
+import time
+from threading import Lock
+
+from locust import HttpUser, constant, events, task
+from locust.exception import StopUser
+from perftest_util import (
+    perftest_user_token_map_from_file,
+    perftest_users_from_user_file,
+)
+from workload import read_trace, send
+
+replays = []
+replays_lock = Lock()
+perftest_users_token_map = {}
+start_time = 0.0
+remaining = 0
+
+
+@events.test_start.add_listener
+def start_of_test(environment, **kwargs):
+    global start_time, remaining
+    trace = read_trace(os.environ["WORKLOAD_TRACE"])
+    usernames = perftest_users_from_user_file()
+    if len(usernames) < len(trace):
+        raise ValueError(f"Trace has {len(trace)} users, only {len(usernames)} seeded")
+    first_sent = sorted(trace.values(), key=lambda requests: requests[0]["t"])
+    # Popped from the end, so first user of the trace is replayed first
+    replays.extend(reversed(list(zip(usernames, first_sent))))
+    remaining = len(replays)
+    perftest_users_token_map.update(perftest_user_token_map_from_file())
+    start_time = time.monotonic()
+
+
+class ReplayUser(HttpUser):
+    wait_time = constant(0)
+
+    @task
+    def replay(self):
+        global remaining
+        for request in self.requests:
+            delay = request["t"] - (time.monotonic() - start_time)
+            if delay > 0:
+                time.sleep(delay)
+            send(self.client, request, self.txn_ids)
+        with replays_lock:
+            remaining -= 1
+            if remaining == 0:
+                self.environment.runner.quit()
+        raise StopUser()
+
+    def on_start(self):
+        with replays_lock:
+            if not replays:
+                raise StopUser("Every trace user is already replayed")
+            self.username, self.requests = replays.pop()
+        self.txn_ids = {}
+        access = perftest_users_token_map[self.username]["access"]
+        self.client.headers.update({"Authorization": f"Bearer {access}"})
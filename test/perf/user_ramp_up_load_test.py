@@ -15,7 +15,7 @@ class SimulatedUser(HttpUser):
 
     @task(5)
     def get_tokens(self):
-        get_token_url = "/token/?"
+        get_token_url = "/token/"
         get_token_resp = self.client.post(
             get_token_url,
             json={
@@ -81,7 +81,8 @@ class SimulatedUser(HttpUser):
         txn_id = self.txn_id_posted.pop()
         del_txn_url = f"/txn/{txn_id}/"
         del_txn_resp = self.client.delete(
-            del_txn_url
+            del_txn_url,
+            name="/txn/[id]/"
         )
         if del_txn_resp.status_code == 401:
             self.refresh_token()
@@ -96,6 +97,7 @@ class SimulatedUser(HttpUser):
         patch_txn_url = f"/txn/{txn_id}/"
         patch_txn_resp = self.client.patch(
             patch_txn_url,
+            name="/txn/[id]/",
             json={
                 "date": "2025-04-11",
                 "description": "New",
@@ -112,7 +114,7 @@ class SimulatedUser(HttpUser):
     def get_txn_list(self):
         if not self.txn_id_posted:
             return
-        txn_list_url = f"/txn/?start_date=2025-04-01&end_date=2025-04-12"
+        txn_list_url = f"/txn/?date__gte=2025-04-01&date__lte=2025-04-12"
         txn_list_resp = self.client.get(
             txn_list_url,
         )
@@ -0,0 +1,245 @@
+"""
+Realistic workload for the load tests, generated from workload_config.json
+
+Each user gets their own generator seeded from the config seed and their username, so the
+same config always produces the same requests per user. Dates are spread over the config's
+years with a bias to recent ones, txn follow the category shares and amounts of the config
+and summaries and txn lists are over a mix of calendar and custom ranges, so popular ranges
+are cached and the rest take the miss path.
+
+Requests are recorded as JSONL traces, one request per line with its time since the start
+of the run. Txn are referred to by the order they were created by the user rather than by
+id, so traces replay against any database. Generate a trace offline with:
+    python test/perf/workload.py --users 50 --duration 600 --out trace.jsonl
+"""
+
+import argparse
+import calendar
+import json
+import math
+import os
+import random
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Optional
+
+PERF_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILE = os.getenv(
+    "WORKLOAD_CONFIG", os.path.join(PERF_DIR, "workload_config.json")
+)
+# Requests are grouped by these names in the locust stats
+NAMES = {
+    "summary": "/summary/[start]/[end]",
+    "list": "/txn/?[range]",
+    "create": "/txn/",
+    "update": "/txn/[id]/",
+    "delete": "/txn/[id]/",
+}
+
+
+def load_config(path: str = CONFIG_FILE) -> dict:
+    """Return workload config"""
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+class WorkloadGenerator:
+    """
+    Deterministic stream of requests of a single user
+
+    Method:
+        Public:
+            - generate next request
+            - generate time to wait before next request
+        Private:
+            - pick weighted choice from config
+            - generate date biased to recent
+            - generate date range
+            - generate txn
+    """
+
+    def __init__(self, config: dict, username: str):
+        """
+        Initialize WorkloadGenerator
+
+        Attribute:
+            config (dict): Workload config
+            username (str): User the requests are for, seeds the generator
+        """
+        self.config = config
+        self.rng = random.Random(f"{config['seed']}:{username}")
+        self.start = date.fromisoformat(config["dates"]["start"])
+        self.end = date.fromisoformat(config["dates"]["end"])
+        self.decay = math.log(2) / config["dates"]["recency_half_life_days"]
+        self.categories = list(config["categories"])
+        self.category_weights = [
+            category["share"] for category in config["categories"].values()
+        ]
+        # Refs of txn created and not yet deleted
+        self.refs: list[int] = []
+        self.created = 0
+
+    def _choice(self, weights: dict) -> str:
+        """Pick key of weights dict by weight"""
+        return self.rng.choices(list(weights), list(weights.values()))[0]
+
+    def _date(self) -> date:
+        """Generate date, exponentially more likely the more recent it is"""
+        span = (self.end - self.start).days
+        days_ago = min(int(self.rng.expovariate(self.decay)), span)
+        return self.end - timedelta(days=days_ago)
+
+    def _date_range(self) -> tuple[date, date]:
+        """Generate range of configured kind around a recent biased date"""
+        kind = self._choice(self.config["ranges"])
+        anchor = self._date()
+        if kind == "week":
+            start = anchor - timedelta(days=anchor.weekday())
+            return start, start + timedelta(days=6)
+        if kind == "month":
+            last_day = calendar.monthrange(anchor.year, anchor.month)[1]
+            return anchor.replace(day=1), anchor.replace(day=last_day)
+        if kind == "quarter":
+            first_month = (anchor.month - 1) // 3 * 3 + 1
+            last_day = calendar.monthrange(anchor.year, first_month + 2)[1]
+            return (
+                date(anchor.year, first_month, 1),
+                date(anchor.year, first_month + 2, last_day),
+            )
+        if kind == "year":
+            return date(anchor.year, 1, 1), date(anchor.year, 12, 31)
+        return anchor, anchor + timedelta(days=self.rng.randint(1, 90))
+
+    def _txn(self) -> dict[str, Any]:
+        """Generate txn of a category by share, amount spread around its median"""
+        category = self.rng.choices(self.categories, self.category_weights)[0]
+        config = self.config["categories"][category]
+        amount = Decimal(config["median"] * self.rng.lognormvariate(0, 0.5))
+        return {
+            "date": self._date().isoformat(),
+            "description": self.rng.choice(config["merchants"]),
+            "amount": str(amount.quantize(Decimal("0.01"))),
+            "category": category,
+        }
+
+    def next_request(self) -> dict[str, Any]:
+        """Generate next request, update and delete refer to a txn created before"""
+        op = self._choice(self.config["mix"])
+        if op in ("update", "delete") and not self.refs:
+            op = "create"
+        request = {"op": op, "json": None, "ref": None}
+        if op in ("summary", "list"):
+            start_date, end_date = self._date_range()
+            request["method"] = "GET"
+            request["path"] = (
+                f"/summary/{start_date}/{end_date}"
+                if op == "summary"
+                else f"/txn/?date__gte={start_date}&date__lte={end_date}"
+            )
+        elif op == "create":
+            request.update(method="POST", path="/txn/", json=self._txn())
+            request["ref"] = self.created
+            self.refs.append(self.created)
+            self.created += 1
+        elif op == "update":
+            request.update(method="PATCH", path="/txn/{id}/", json=self._txn())
+            request["ref"] = self.rng.choice(self.refs)
+        else:
+            ref = self.refs.pop(self.rng.randrange(len(self.refs)))
+            request.update(method="DELETE", path="/txn/{id}/", ref=ref)
+        return request
+
+    def think_time(self) -> float:
+        """Generate seconds until next request, exponential so arrivals are Poisson"""
+        return self.rng.expovariate(1 / self.config["think_time_seconds"])
+
+
+def send(client: Any, request: dict, txn_ids: dict) -> Optional[int]:
+    """
+    Send request with locust client, return status or None if its txn doesn't exist
+
+    txn_ids maps refs of the user's created txn to their ids in this run.
+    """
+    path = request["path"]
+    if request["op"] in ("update", "delete"):
+        if request["ref"] not in txn_ids:
+            return None
+        path = path.format(id=txn_ids[request["ref"]])
+    resp = client.request(
+        request["method"], path, json=request["json"], name=NAMES[request["op"]]
+    )
+    if request["op"] == "create" and resp.status_code == 201:
+        txn_ids[request["ref"]] = resp.json()["id"]
+    elif request["op"] == "delete":
+        txn_ids.pop(request["ref"], None)
+    return resp.status_code
+
+
+class TraceWriter:
+    """
+    Write requests to JSONL trace
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize TraceWriter
+        """
+        self.file = open(path, "w")
+
+    def write(
+        self, t: float, user: str, request: dict, status: Optional[int] = None
+    ) -> None:
+        """Write request sent t seconds into the run"""
+        line = {"t": round(t, 3), "user": user, **request, "status": status}
+        self.file.write(json.dumps(line) + "\n")
+
+    def close(self) -> None:
+        """Close trace file"""
+        self.file.close()
+
+
+def read_trace(path: str) -> dict[str, list[dict]]:
+    """Return requests of trace by user, in order sent"""
+    requests_by_user = defaultdict(list)
+    with open(path, "r") as file:
+        for line in file:
+            request = json.loads(line)
+            requests_by_user[request["user"]].append(request)
+    for requests in requests_by_user.values():
+        requests.sort(key=lambda request: request["t"])
+    return dict(requests_by_user)
+
+
+def generate_trace(config: dict, users: list[str], duration: float, path: str) -> int:
+    """Write trace of users sending requests for duration seconds, return requests"""
+    lines = []
+    for user in users:
+        generator = WorkloadGenerator(config, user)
+        t = generator.think_time()
+        while t < duration:
+            lines.append((t, user, generator.next_request()))
+            t += generator.think_time()
+    lines.sort(key=lambda line: line[0])
+    writer = TraceWriter(path)
+    try:
+        for t, user, request in lines:
+            writer.write(t, user, request)
+    finally:
+        writer.close()
+    return len(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate workload trace offline")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=600, help="Seconds")
+    parser.add_argument("--config", default=CONFIG_FILE)
+    parser.add_argument("--out", default="trace.jsonl")
+    args = parser.parse_args()
+    # Users are placeholders, replay maps them to seeded users in order
+    trace_users = [f"user_{i}" for i in range(args.users)]
+    num_of_requests = generate_trace(
+        load_config(args.config), trace_users, args.duration, args.out
+    )
+    print(f"Wrote {num_of_requests} requests to {args.out}")
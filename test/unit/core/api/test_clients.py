@@ -0,0 +1,163 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+import openai
+import pytest
+from core.api.clients import (
+    CircuitBreaker,
+    ProviderUnavailableError,
+    RateLimiter,
+    ResilientOpenAIClient,
+)
+
+COMPLETION = {
+    "id": "chatcmpl-test",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "[]"},
+            "finish_reason": "stop",
+        }
+    ],
+}
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Fake chat completion endpoint replying with the server's queued status codes"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append(self.client_address)
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        body = json.dumps(COMPLETION if status == 200 else {"error": {}}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def fake_server() -> Iterator[ThreadingHTTPServer]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+    server.requests = []
+    server.statuses = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(fake_server: ThreadingHTTPServer) -> Iterator[ResilientOpenAIClient]:
+    client = ResilientOpenAIClient(
+        api_key="test",
+        base_url=f"http://127.0.0.1:{fake_server.server_port}/v1",
+        max_retries=2,
+        backoff_base=0,
+        failure_threshold=3,
+    )
+    yield client
+    client.close()
+
+
+def chat(client: ResilientOpenAIClient) -> str:
+    response = client.chat_completion(
+        model="gpt-4o-mini", messages=[{"role": "user", "content": "hi"}]
+    )
+    return response.choices[0].message.content
+
+
+def test_connection_reused(
+    fake_server: ThreadingHTTPServer, client: ResilientOpenAIClient
+) -> None:
+    """Test keep-alive connection is reused across calls"""
+    assert chat(client) == "[]"
+    assert chat(client) == "[]"
+    assert len(fake_server.requests) == 2
+    assert len(set(fake_server.requests)) == 1
+
+
+def test_retry_server_error(
+    fake_server: ThreadingHTTPServer, client: ResilientOpenAIClient
+) -> None:
+    """Test server errors are retried until success"""
+    fake_server.statuses = [500, 503]
+    assert chat(client) == "[]"
+    assert len(fake_server.requests) == 3
+    assert client.circuit_breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retries_exhausted(
+    fake_server: ThreadingHTTPServer, client: ResilientOpenAIClient
+) -> None:
+    """Test error is raised once retries are exhausted"""
+    fake_server.statuses = [500, 500, 500]
+    with pytest.raises(ProviderUnavailableError):
+        chat(client)
+    assert len(fake_server.requests) == 3
+
+
+def test_circuit_open_fails_fast(
+    fake_server: ThreadingHTTPServer, client: ResilientOpenAIClient
+) -> None:
+    """Test calls fail fast without reaching provider once circuit is open"""
+    fake_server.statuses = [500, 500, 500]
+    with pytest.raises(ProviderUnavailableError):
+        chat(client)
+    assert client.circuit_breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(ProviderUnavailableError) as exc_info:
+        chat(client)
+    assert exc_info.value.retry_after > 0
+    assert len(fake_server.requests) == 3
+
+
+def test_circuit_half_open_closes_on_success() -> None:
+    """Test circuit closes after successful trial call"""
+    circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    circuit_breaker.record_failure()
+    assert circuit_breaker.state == CircuitBreaker.OPEN
+    circuit_breaker.before_call()
+    assert circuit_breaker.state == CircuitBreaker.HALF_OPEN
+    circuit_breaker.record_success()
+    assert circuit_breaker.state == CircuitBreaker.CLOSED
+
+
+def test_circuit_half_open_released_on_other_error(
+    fake_server: ThreadingHTTPServer, client: ResilientOpenAIClient
+) -> None:
+    """Test trial call failing with a non retryable error doesn't leave circuit half open"""
+    client.circuit_breaker.reset_timeout = 0
+    fake_server.statuses = [500, 500, 500, 400]
+    with pytest.raises(ProviderUnavailableError):
+        chat(client)
+    with pytest.raises(openai.BadRequestError):
+        chat(client)
+    assert client.circuit_breaker.state == CircuitBreaker.OPEN
+    client.rate_limiter = RateLimiter(rate=0.1, burst=0)
+    with pytest.raises(ProviderUnavailableError):
+        chat(client)
+    assert client.circuit_breaker.state == CircuitBreaker.OPEN
+    client.rate_limiter = RateLimiter(rate=5, burst=10)
+    assert chat(client) == "[]"
+    assert client.circuit_breaker.state == CircuitBreaker.CLOSED
+
+
+def test_rate_limiter_rejects_when_empty() -> None:
+    """Test rate limiter raises when a token can't be taken within max wait"""
+    rate_limiter = RateLimiter(rate=0.1, burst=1)
+    rate_limiter.acquire(max_wait=0)
+    with pytest.raises(ProviderUnavailableError) as exc_info:
+        rate_limiter.acquire(max_wait=0)
+    assert exc_info.value.retry_after > 0
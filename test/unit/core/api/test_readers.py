@@ -0,0 +1,125 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from core.api.readers import (
+    CsvTxnReader,
+    OfxTxnReader,
+    QifTxnReader,
+    TxnFileFormatError,
+)
+
+
+def test_csv_signed_amount() -> None:
+    """Test CSV with signed amount column, spending is negated to positive"""
+    text = io.StringIO(
+        "Date,Description,Amount,Category\n"
+        "04/10/2025,  Coffee   Shop ,-4.50,Restaurants\n"
+        '04/11/2025,Paycheck,"1,000.00",\n'
+    )
+    assert list(CsvTxnReader().read(text)) == [
+        {
+            "date": date(2025, 4, 10),
+            "description": "Coffee Shop",
+            "amount": Decimal("4.50"),
+            "category": "Restaurants",
+        },
+        {
+            "date": date(2025, 4, 11),
+            "description": "Paycheck",
+            "amount": Decimal("-1000.00"),
+            "category": "Uncategorized",
+        },
+    ]
+
+
+def test_csv_debit_credit() -> None:
+    """Test CSV with separate debit and credit columns"""
+    text = io.StringIO(
+        "Posted Date,Payee,Debit,Credit\n2025-04-10,Rent,1200.00,\n2025-04-11,Refund,,$20\n"
+    )
+    amounts = [txn["amount"] for txn in CsvTxnReader().read(text)]
+    assert amounts == [Decimal("1200.00"), Decimal("-20.00")]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Date,Amount\n2025-04-10,1.00\n",  # missing description column
+        "Date,Description,Amount\n2025-13-45,Coffee,1.00\n",  # invalid date
+        "Date,Description,Amount\n2025-04-10,Coffee,abc\n",  # invalid amount
+        "Date,Description,Amount\n2025-04-10\n",  # missing column
+    ],
+)
+def test_csv_invalid(text: str) -> None:
+    """Test invalid CSV raises format error"""
+    with pytest.raises(TxnFileFormatError):
+        list(CsvTxnReader().read(io.StringIO(text)))
+
+
+def test_ofx_sgml_single_line() -> None:
+    """Test OFX 1.x SGML without closing leaf tags, all on one line"""
+    text = io.StringIO(
+        "OFXHEADER:100\nDATA:OFXSGML\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>"
+        "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250410120000.000[-5:EST]<TRNAMT>-4.50"
+        "<NAME>COFFEE &amp; CO</STMTTRN>"
+        "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250411<TRNAMT>100.00<MEMO>Refund</STMTTRN>"
+        "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>"
+    )
+    reader = OfxTxnReader()
+    reader.CHUNK_SIZE = 16  # split tags and values across chunks
+    assert list(reader.read(text)) == [
+        {
+            "date": date(2025, 4, 10),
+            "description": "COFFEE & CO",
+            "amount": Decimal("4.50"),
+            "category": "Uncategorized",
+        },
+        {
+            "date": date(2025, 4, 11),
+            "description": "Refund",
+            "amount": Decimal("-100.00"),
+            "category": "Uncategorized",
+        },
+    ]
+
+
+def test_ofx_xml() -> None:
+    """Test OFX 2.x XML with closing tags"""
+    text = io.StringIO(
+        '<?xml version="1.0"?>\n<OFX>\n<STMTTRN>\n<DTPOSTED>20250410</DTPOSTED>\n'
+        "<TRNAMT>-12.00</TRNAMT>\n<NAME>Gas</NAME>\n</STMTTRN>\n</OFX>\n"
+    )
+    txns = list(OfxTxnReader().read(text))
+    assert [(txn["description"], txn["amount"]) for txn in txns] == [
+        ("Gas", Decimal("12.00"))
+    ]
+
+
+def test_qif() -> None:
+    """Test QIF records including Quicken year format"""
+    text = io.StringIO(
+        "!Type:Bank\nD04/10'25\nT-4.50\nPCoffee\nLRestaurants\n^\n"
+        "D4/11/2025\nU-1,200.00\nMRent\n^\n"
+    )
+    assert list(QifTxnReader().read(text)) == [
+        {
+            "date": date(2025, 4, 10),
+            "description": "Coffee",
+            "amount": Decimal("4.50"),
+            "category": "Restaurants",
+        },
+        {
+            "date": date(2025, 4, 11),
+            "description": "Rent",
+            "amount": Decimal("1200.00"),
+            "category": "Uncategorized",
+        },
+    ]
+
+
+def test_qif_missing_amount() -> None:
+    """Test QIF record without amount raises format error"""
+    with pytest.raises(TxnFileFormatError):
+        list(QifTxnReader().read(io.StringIO("!Type:Bank\nD04/10/2025\nPCoffee\n^\n")))
@@ -1,9 +1,19 @@
+import asyncio
+import json
 from datetime import date
+from decimal import Decimal
 from types import SimpleNamespace
-from unittest.mock import MagicMock, patch
+from typing import Iterator
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from core.api.services import SummaryCache
+from core.api.services import (
+    CategoryMap,
+    OpenAIParser,
+    SummaryCache,
+    previous_period,
+    previous_year_period,
+)
 
 
 @pytest.fixture
@@ -16,16 +26,23 @@ def user() -> SimpleNamespace:
     return SimpleNamespace(username="hello")
 
 
-# Case 1: summary_cache_map is empty
+@pytest.fixture(autouse=True)
+def on_commit() -> Iterator[MagicMock]:
+    """Capture callbacks run on commit, such as publishing summary events"""
+    with patch("core.api.services.transaction.on_commit") as mock_on_commit:
+        yield mock_on_commit
+
+
+# Case 1: user's summary keys are empty
 @patch("core.api.services.cache.set")
 @patch("core.api.services.cache.get")
-def test_update_user_not_in_cache_map(
+def test_update_user_has_no_summary_keys(
     mock_get: MagicMock,
     mock_set: MagicMock,
     user: SimpleNamespace,
     summary_cache: SummaryCache,
 ) -> None:
-    """Test user is not in summary cache map"""
+    """Test user has no cached summary keys"""
     mock_get.return_value = {}
     summary_cache.update(user, date(2025, 4, 10), 10.00, "Food")
     mock_set.assert_not_called()
@@ -41,8 +58,8 @@ def test_update_txn_date_after_range(
     summary_cache: SummaryCache,
 ) -> None:
     """Test update txn date is greater than date range"""
-    # Cached summary cache map
-    mock_get.return_value = {"hello": {"hello:summary:2025-04-01:2025-04-30"}}
+    # Cached summary keys
+    mock_get.return_value = {"hello:summary:2025-04-01:2025-04-30"}
     summary_cache.update(user, date(2025, 5, 1), 10.00, "Food")
     assert mock_get.call_count == 1
     mock_set.assert_not_called()
@@ -58,8 +75,8 @@ def test_update_txn_date_before_range(
     summary_cache: SummaryCache,
 ) -> None:
     """Test update txn date is less than date range"""
-    # Cached summary cache map
-    mock_get.return_value = {"hello": {"hello:summary:2025-04-01:2025-04-30"}}
+    # Cached summary keys
+    mock_get.return_value = {"hello:summary:2025-04-01:2025-04-30"}
     summary_cache.update(user, date(2025, 3, 1), 10.00, "Food")
     assert mock_get.call_count == 1
     mock_set.assert_not_called()
@@ -76,7 +93,7 @@ def test_update_inside_range_existing_category(
 ) -> None:
     """Test update when txn is in date"""
     mock_get.side_effect = [
-        {"hello": {"hello:summary:2025-04-01:2025-04-30"}},  # summary key map
+        {"hello:summary:2025-04-01:2025-04-30"},  # user's summary keys
         {  # summary resulting from cache
             "date_range": ["2025-04-01", "2025-04-30"],
             "total": 100.12,
@@ -104,7 +121,7 @@ def test_update_new_category_added(
     summary_cache: SummaryCache,
 ) -> None:
     mock_get.side_effect = [
-        {"hello": {"hello:summary:2025-04-01:2025-04-30"}},  # summary key map
+        {"hello:summary:2025-04-01:2025-04-30"},  # user's summary keys
         {  # summary resulting from cache
             "date_range": ["2025-04-01", "2025-04-30"],
             "total": 100.00,
@@ -132,7 +149,7 @@ def test_update_category_drops_to_zero(
     summary_cache: SummaryCache,
 ) -> None:
     mock_get.side_effect = [
-        {"hello": {"hello:summary:2025-04-01:2025-04-30"}},  # summary key map
+        {"hello:summary:2025-04-01:2025-04-30"},  # user's summary keys
         {  # summary resulting from cache
             "date_range": ["2025-04-01", "2025-04-30"],
             "total": 50.24,
@@ -148,3 +165,148 @@ def test_update_category_drops_to_zero(
     mock_set.assert_called_with(
         "hello:summary:2025-04-01:2025-04-30", expected, timeout=1800
     )
+
+
+# Case 7: cached summary expired
+@patch("core.api.services.cache.set")
+@patch("core.api.services.cache.get")
+def test_update_removes_expired_summary_key(
+    mock_get: MagicMock,
+    mock_set: MagicMock,
+    user: SimpleNamespace,
+    summary_cache: SummaryCache,
+) -> None:
+    """Test key of expired summary is removed from user's summary keys"""
+    mock_get.side_effect = [
+        {"hello:summary:2025-04-01:2025-04-30", "hello:summary:2025-05-01:2025-05-31"},
+        None,  # summary expired
+    ]
+    summary_cache.update(user, date(2025, 4, 10), 10.00, "Food")
+    mock_set.assert_called_once_with(
+        "hello:summary_keys", {"hello:summary:2025-05-01:2025-05-31"}, timeout=1800
+    )
+
+
+# Case 8: summary event published once committed
+@patch("core.api.services.publish")
+@patch("core.api.services.cache.set")
+@patch("core.api.services.cache.get")
+def test_update_publishes_on_commit(
+    mock_get: MagicMock,
+    mock_set: MagicMock,
+    mock_publish: MagicMock,
+    on_commit: MagicMock,
+    user: SimpleNamespace,
+    summary_cache: SummaryCache,
+) -> None:
+    """Test txn delta and changed summaries are published to user's channel on commit"""
+    mock_get.side_effect = [
+        {"hello:summary:2025-04-01:2025-04-30", "hello:summary:2025-05-01:2025-05-31"},
+        {
+            "date_range": [date(2025, 4, 1), date(2025, 4, 30)],
+            "total": Decimal("5.00"),
+            "total_by_cat": {"Food": Decimal("5.00")},
+        },
+    ]
+    summary_cache.update(user, date(2025, 4, 10), Decimal("10.00"), "Food")
+    mock_publish.assert_not_called()
+    on_commit.call_args.args[0]()
+    channel, event = mock_publish.call_args.args
+    assert channel == "hello:summary_events"
+    assert json.loads(event) == {
+        "txns": [{"date": "2025-04-10", "amount": "10.00", "category": "Food"}],
+        "summaries": [
+            {
+                "date_range": ["2025-04-01", "2025-04-30"],
+                "total": "15.00",
+                "total_by_cat": {"Food": "15.00"},
+            }
+        ],
+    }
+
+
+@patch("core.api.services.async_cache.set", new_callable=AsyncMock)
+@patch("core.api.services.async_cache.get", new_callable=AsyncMock)
+def test_aget_cache_hit(
+    mock_get: AsyncMock,
+    mock_set: AsyncMock,
+    user: SimpleNamespace,
+    summary_cache: SummaryCache,
+) -> None:
+    """Test async get returns cached summary without touching the database"""
+    cached = {"date_range": [], "total": Decimal("1.00"), "total_by_cat": {}}
+    mock_get.return_value = cached
+    summary = asyncio.run(summary_cache.aget(user, date(2025, 4, 1), date(2025, 4, 30)))
+    assert summary == cached
+    mock_get.assert_awaited_once_with("hello:summary:2025-04-01:2025-04-30")
+    mock_set.assert_not_called()
+
+
+@patch("core.api.services.async_cache.set", new_callable=AsyncMock)
+@patch("core.api.services.async_cache.get", new_callable=AsyncMock)
+def test_aget_cache_miss(
+    mock_get: AsyncMock,
+    mock_set: AsyncMock,
+    user: SimpleNamespace,
+    summary_cache: SummaryCache,
+) -> None:
+    """Test async get calculates, caches summary and records its key"""
+    mock_get.return_value = None
+    start, end = date(2025, 4, 1), date(2025, 4, 30)
+    calculated = {"date_range": [start, end], "total": Decimal("0"), "total_by_cat": {}}
+    with patch.object(
+        summary_cache, "_acalc_summary", AsyncMock(return_value=calculated)
+    ):
+        summary = asyncio.run(summary_cache.aget(user, start, end))
+    assert summary == calculated
+    mock_set.assert_any_await(
+        "hello:summary:2025-04-01:2025-04-30", calculated, timeout=1800
+    )
+    mock_set.assert_any_await(
+        "hello:summary_keys", {"hello:summary:2025-04-01:2025-04-30"}, timeout=1800
+    )
+
+
+@pytest.mark.parametrize(
+    "name, normalized",
+    [
+        ("Restaurants", "Restaurants"),
+        ("Restuarants", "Restaurants"),
+        ("  household   items ", "Household Items"),
+        ("Coffee  Shops", "Coffee Shops"),
+    ],
+)
+def test_normalize_category_name(name: str, normalized: str) -> None:
+    """Test category names are matched to default categories"""
+    assert CategoryMap().normalize(name) == normalized
+
+
+@pytest.mark.parametrize(
+    "start, end, previous_start, previous_end",
+    [
+        (date(2025, 3, 1), date(2025, 3, 31), date(2025, 2, 1), date(2025, 2, 28)),
+        (date(2025, 1, 1), date(2025, 3, 31), date(2024, 10, 1), date(2024, 12, 31)),
+        (date(2025, 1, 1), date(2025, 12, 31), date(2024, 1, 1), date(2024, 12, 31)),
+        (date(2025, 4, 8), date(2025, 4, 14), date(2025, 4, 1), date(2025, 4, 7)),
+        (date(2025, 3, 15), date(2025, 3, 31), date(2025, 2, 26), date(2025, 3, 14)),
+    ],
+)
+def test_previous_period(
+    start: date, end: date, previous_start: date, previous_end: date
+) -> None:
+    """Test whole months compare with previous months, other ranges by days"""
+    assert previous_period(start, end) == (previous_start, previous_end)
+
+
+def test_previous_year_period_leap_day() -> None:
+    """Test Feb 29 a year before is Feb 28"""
+    assert previous_year_period(date(2024, 2, 29), date(2024, 3, 31)) == (
+        date(2023, 2, 28),
+        date(2023, 3, 31),
+    )
+
+
+@patch("core.api.services.get_openai_client")
+def test_parser_fields_exclude_internal(mock_get_openai_client: MagicMock) -> None:
+    """Test prompt only asks for txn fields read from the statement"""
+    assert OpenAIParser().fields == "user, date, description, amount, category"
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from core.api.throttling import IpTokenBucketThrottle, parse_rate
+from django.test import override_settings
+from redis.exceptions import ConnectionError
+
+BUCKETS = {"scope": {"IP": {"RATE": "60/minute", "BURST": 5}}}
+
+
+@pytest.mark.parametrize(
+    "rate, expected", [("1/second", 1.0), ("60/minute", 1.0), ("36/hour", 0.01)]
+)
+def test_parse_rate(rate: str, expected: float) -> None:
+    assert parse_rate(rate) == pytest.approx(expected)
+
+
+@override_settings(THROTTLE_BUCKETS=BUCKETS)
+@patch("core.api.throttling.TokenBucketThrottle.script")
+def test_cost_capped_at_burst(script: MagicMock) -> None:
+    """Test cost over the bucket size is capped so the request can be allowed"""
+    script.return_value.return_value = [1, b"0"]
+    view = SimpleNamespace(throttle_scope="scope", get_throttle_cost=lambda _: 50)
+    request = SimpleNamespace(META={"REMOTE_ADDR": "10.0.0.1"})
+
+    assert IpTokenBucketThrottle().allow_request(request, view)
+    assert script.return_value.call_args.kwargs["args"] == [1.0, 5, 5]
+
+
+@override_settings(THROTTLE_BUCKETS=BUCKETS)
+@patch("core.api.throttling.TokenBucketThrottle.script")
+def test_rejected_wait(script: MagicMock) -> None:
+    """Test rejected request waits the seconds returned by the script"""
+    script.return_value.return_value = [0, b"0.25"]
+    view = SimpleNamespace(throttle_scope="scope")
+    request = SimpleNamespace(META={"REMOTE_ADDR": "10.0.0.1"})
+
+    throttle = IpTokenBucketThrottle()
+    assert not throttle.allow_request(request, view)
+    assert throttle.wait() == 0.25
+
+
+@override_settings(THROTTLE_BUCKETS=BUCKETS)
+@patch("core.api.throttling.TokenBucketThrottle.script")
+def test_redis_unavailable_allows(script: MagicMock) -> None:
+    """Test requests are allowed when Redis is unavailable"""
+    script.return_value.side_effect = ConnectionError("down")
+    view = SimpleNamespace(throttle_scope="scope")
+    request = SimpleNamespace(META={"REMOTE_ADDR": "10.0.0.1"})
+
+    assert IpTokenBucketThrottle().allow_request(request, view)
+
+
+@override_settings(THROTTLE_BUCKETS=BUCKETS)
+def test_unconfigured_scope_not_limited() -> None:
+    """Test views without a bucket for their scope are not limited"""
+    view = SimpleNamespace(throttle_scope="other")
+    assert IpTokenBucketThrottle().allow_request(SimpleNamespace(META={}), view)
@@ -0,0 +1,122 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from core.db.pool import ConnectionPool, PoolTimeoutError, get_pool
+
+
+class FakeConnection(SimpleNamespace):
+    pass
+
+
+def make_pool(**kwargs) -> ConnectionPool:
+    options = {
+        "check": lambda conn: conn.usable,
+        "reset": lambda conn: not conn.closed,
+        "close": lambda conn: setattr(conn, "closed", True),
+        "max_size": 2,
+    }
+    options.update(kwargs)
+    return ConnectionPool(**options)
+
+
+def connect() -> FakeConnection:
+    return FakeConnection(closed=False, usable=True)
+
+
+def test_reuse_returned_connection() -> None:
+    """Test returned connection is checked out again instead of opening one"""
+    pool = make_pool()
+    conn = pool.getconn(connect)
+    pool.putconn(conn)
+    assert pool.getconn(connect) is conn
+    stats = pool.stats()
+    assert stats["size"] == 1
+    assert stats["in_use"] == 1
+    assert stats["checkouts"] == 2
+
+
+def test_timeout_when_exhausted() -> None:
+    """Test checkout waits up to timeout and raises when pool stays exhausted"""
+    pool = make_pool(max_size=1, timeout=0.05)
+    pool.getconn(connect)
+    with pytest.raises(PoolTimeoutError):
+        pool.getconn(connect)
+    stats = pool.stats()
+    assert stats["timeouts"] == 1
+    assert stats["size"] == 1
+
+
+def test_wait_for_returned_connection() -> None:
+    """Test waiting checkout gets connection returned by another thread"""
+    pool = make_pool(max_size=1, timeout=5)
+    conn = pool.getconn(connect)
+    threading.Timer(0.05, pool.putconn, args=[conn]).start()
+    assert pool.getconn(connect) is conn
+    stats = pool.stats()
+    assert stats["waits"] == 1
+    assert stats["wait_time"] > 0
+    assert stats["max_wait_time"] == stats["wait_time"]
+
+
+def test_discard_connection_that_cannot_reset() -> None:
+    """Test closed connection is not returned to the pool and frees its slot"""
+    pool = make_pool(max_size=1)
+    conn = pool.getconn(connect)
+    conn.closed = True
+    pool.putconn(conn)
+    new_conn = pool.getconn(connect)
+    assert new_conn is not conn
+    assert pool.stats()["discarded"] == 1
+
+
+def test_check_idle_connection() -> None:
+    """Test connection idle longer than check after is replaced if check fails"""
+    pool = make_pool(check_after=0)
+    conn = pool.getconn(connect)
+    pool.putconn(conn)
+    conn.usable = False
+    time.sleep(0.01)
+    new_conn = pool.getconn(connect)
+    assert new_conn is not conn
+    assert conn.closed
+    assert pool.stats()["size"] == 1
+
+
+def test_close_expired_idle_connection() -> None:
+    """Test connections idle longer than max idle are closed"""
+    pool = make_pool(max_idle=0.01)
+    first, second = pool.getconn(connect), pool.getconn(connect)
+    pool.putconn(first)
+    time.sleep(0.02)
+    pool.putconn(second)
+    assert first.closed
+    assert not second.closed
+    assert pool.stats()["idle"] == 1
+
+
+def test_failed_connect_frees_slot() -> None:
+    """Test slot is freed when opening a connection fails"""
+    pool = make_pool(max_size=1)
+
+    def fail() -> None:
+        raise OSError("connection refused")
+
+    with pytest.raises(OSError):
+        pool.getconn(fail)
+    assert pool.stats()["size"] == 0
+    assert pool.getconn(connect) is not None
+
+
+def test_get_pool_replaced_when_database_changes() -> None:
+    """Test pool of alias is replaced and idle connections closed when its database changes"""
+    pool = get_pool("switch_test", "db", make_pool)
+    conn = pool.getconn(connect)
+    pool.putconn(conn)
+    assert get_pool("switch_test", "db", make_pool) is pool
+
+    new_pool = get_pool("switch_test", "test_db", make_pool)
+    assert new_pool is not pool
+    assert conn.closed
+    assert get_pool("switch_test", "test_db") is new_pool
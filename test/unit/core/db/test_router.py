@@ -0,0 +1,161 @@
+import asyncio
+import math
+from typing import Iterator
+from unittest.mock import MagicMock, patch
+
+import pytest
+from core.db.router import (
+    ReplicaRouter,
+    areplica_reads,
+    mark_written,
+    replica_reads,
+)
+from django.db import DatabaseError
+
+
+def make_connection(lag: object = 0) -> MagicMock:
+    """Connection whose lag query returns lag, or raises it if it's an exception"""
+    connection = MagicMock(in_atomic_block=False)
+    cursor = connection.cursor.return_value.__enter__.return_value
+    if isinstance(lag, Exception):
+        cursor.execute.side_effect = lag
+    cursor.fetchone.return_value = (lag,)
+    return connection
+
+
+@pytest.fixture(autouse=True)
+def replicas(settings) -> None:
+    settings.DATABASE_REPLICAS = ["replica_0", "replica_1"]
+    settings.DATABASE_REPLICA_ROUTING = {
+        "STICKY_SECONDS": 5,
+        "MAX_LAG_SECONDS": 1.0,
+        "LAG_CHECK_SECONDS": 60.0,
+    }
+
+
+@pytest.fixture
+def router() -> Iterator[ReplicaRouter]:
+    ReplicaRouter._lags.clear()
+    yield ReplicaRouter()
+    ReplicaRouter._lags.clear()
+
+
+@pytest.fixture
+def cache() -> Iterator[MagicMock]:
+    with patch("core.db.router.cache") as mock_cache:
+        mock_cache.get.return_value = None
+        yield mock_cache
+
+
+@pytest.fixture
+def connections() -> Iterator[dict]:
+    connections = {
+        "default": make_connection(),
+        "replica_0": make_connection(0.5),
+        "replica_1": make_connection(None),
+    }
+    with patch("core.db.router.connections", connections):
+        yield connections
+
+
+def test_reads_outside_block_not_routed(
+    router: ReplicaRouter, cache: MagicMock, connections: dict
+) -> None:
+    """Test only reads of replica_reads blocks are routed"""
+    assert router.db_for_read(object) is None
+    assert router.db_for_write(object) == "default"
+
+
+def test_reads_routed_to_replica(
+    router: ReplicaRouter, cache: MagicMock, connections: dict
+) -> None:
+    """Test reads of a block go to one replica, lag is checked once per process"""
+    with replica_reads(1):
+        alias = router.db_for_read(object)
+        assert alias in ("replica_0", "replica_1")
+        assert router.db_for_read(object) == alias
+    with replica_reads(2):
+        router.db_for_read(object)
+    cache.get.assert_called_with("2:db_sticky")
+    cursor = connections["replica_0"].cursor.return_value.__enter__.return_value
+    assert cursor.execute.call_count == 1
+
+
+def test_async_reads_picked_up_front(
+    router: ReplicaRouter, cache: MagicMock, connections: dict
+) -> None:
+    """Test async blocks pick the replica before any query, outside the event loop"""
+
+    async def picked() -> str:
+        async with areplica_reads(1) as reads:
+            return reads["alias"]
+
+    assert asyncio.run(picked()) in ("replica_0", "replica_1")
+
+
+def test_reads_of_recent_writer_on_default(
+    router: ReplicaRouter, cache: MagicMock, connections: dict
+) -> None:
+    """Test user's reads stay on default during the sticky window after a write"""
+    mark_written(1)
+    cache.set.assert_called_once_with("1:db_sticky", True, timeout=5)
+    cache.get.return_value = True
+    with replica_reads(1):
+        assert router.db_for_read(object) == "default"
+
+
+def test_reads_in_transaction_on_default(
+    router: ReplicaRouter, cache: MagicMock, connections: dict
+) -> None:
+    """Test reads inside a transaction of default stay on it"""
+    connections["default"].in_atomic_block = True
+    with replica_reads(1):
+        assert router.db_for_read(object) == "default"
+
+
+@pytest.mark.parametrize(
+    "lag, routed",
+    [
+        (0.5, "replica_0"),
+        (5.0, "default"),
+        (DatabaseError("could not connect to server"), "default"),
+    ],
+)
+def test_lagging_replicas_skipped(
+    router: ReplicaRouter,
+    cache: MagicMock,
+    connections: dict,
+    settings,
+    lag: object,
+    routed: str,
+) -> None:
+    """Test replicas lagging too far or unreachable aren't read from"""
+    settings.DATABASE_REPLICAS = ["replica_0"]
+    connections["replica_0"] = make_connection(lag)
+    with replica_reads(1):
+        assert router.db_for_read(object) == routed
+
+
+def test_unreachable_replica_lag(router: ReplicaRouter, connections: dict) -> None:
+    """Test unreachable replica lags infinitely, caught up replica doesn't lag"""
+    connections["replica_0"] = make_connection(DatabaseError())
+    assert router.replica_lag("replica_0") == math.inf
+    assert router.replica_lag("replica_1") == 0
+
+
+def test_lag_checked_by_one_caller(router: ReplicaRouter, connections: dict) -> None:
+    """Test replica being checked is skipped by other callers instead of checked again"""
+    cursor = connections["replica_0"].cursor.return_value.__enter__.return_value
+    lags = []
+    cursor.execute.side_effect = lambda sql: lags.append(
+        router.replica_lag("replica_0")
+    )
+    assert router.replica_lag("replica_0") == 0.5
+    assert lags == [math.inf]
+    assert cursor.execute.call_count == 1
+
+
+def test_replicas_not_migrated(router: ReplicaRouter) -> None:
+    """Test migrations only run on default"""
+    assert router.allow_migrate("default", "core")
+    assert not router.allow_migrate("replica_0", "core")
@@ -0,0 +1,100 @@
+import asyncio
+import pickle
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+import redis.asyncio as aioredis
+from core.cache import (
+    AsyncInstrumentedConnection,
+    AsyncRedisCache,
+    MsgpackSerializer,
+    ThresholdZlibCompressor,
+)
+from django_redis.exceptions import CompressorError
+
+
+@pytest.fixture
+def serializer() -> MsgpackSerializer:
+    return MsgpackSerializer(options={})
+
+
+@pytest.fixture
+def summary() -> dict:
+    return {
+        "date_range": [date(2025, 4, 1), date(2025, 4, 30)],
+        "total": Decimal("123.45"),
+        "total_by_cat": {"Food": Decimal("100.00"), "Gas": Decimal("23.45")},
+    }
+
+
+def test_summary_round_trip(serializer: MsgpackSerializer, summary: dict) -> None:
+    """Test summary decodes to equal values of the same types"""
+    decoded = serializer.loads(serializer.dumps(summary))
+    assert decoded == summary
+    assert str(decoded["total"]) == "123.45"
+    assert type(decoded["date_range"][0]) is date
+
+
+def test_summary_smaller_than_pickle(
+    serializer: MsgpackSerializer, summary: dict
+) -> None:
+    """Test summary encodes to fewer bytes than pickle"""
+    assert len(serializer.dumps(summary)) < len(pickle.dumps(summary)) / 2
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        Decimal("0.00"),
+        Decimal("-12.30"),
+        Decimal("1.5"),
+        Decimal("0.001"),
+        {"a:summary:2025-04-01:2025-04-30", "a:summary:2025-05-01:2025-05-31"},
+        ("tuple", 1),
+        datetime(2025, 4, 1, 12, 30, tzinfo=timezone.utc),
+        {"id": 1, "username": "test", "is_active": True},
+    ],
+)
+def test_round_trip(serializer: MsgpackSerializer, value: object) -> None:
+    """Test values decode to equal values of the same type"""
+    decoded = serializer.loads(serializer.dumps(value))
+    assert decoded == value
+    assert type(decoded) is type(value)
+    if isinstance(value, Decimal):
+        assert str(decoded) == str(value)
+
+
+def test_compress_above_threshold() -> None:
+    """Test only values longer than threshold are compressed"""
+    compressor = ThresholdZlibCompressor(options={"COMPRESS_MIN_LENGTH": 100})
+    small, large = b"a" * 100, b"a" * 101
+    assert compressor.compress(small) == small
+    assert len(compressor.compress(large)) < len(large)
+    assert compressor.decompress(compressor.compress(large)) == large
+    with pytest.raises(CompressorError):
+        compressor.decompress(small)
+
+
+def test_async_client_uses_cache_options(settings) -> None:
+    """Test async client connects with the same options as the django-redis client"""
+    settings.CACHES = {
+        "default": {
+            "LOCATION": "redis://cache:6379/1",
+            "OPTIONS": {
+                "PASSWORD": "secret",
+                "SOCKET_TIMEOUT": 2,
+                "CONNECTION_POOL_KWARGS": {"max_connections": 5},
+            },
+        }
+    }
+
+    async def connection_pool() -> aioredis.ConnectionPool:
+        return AsyncRedisCache()._client().connection_pool
+
+    pool = asyncio.run(connection_pool())
+    assert pool.connection_class is AsyncInstrumentedConnection
+    assert pool.connection_kwargs["password"] == "secret"
+    assert pool.connection_kwargs["socket_timeout"] == 2
+    assert pool.connection_kwargs["db"] == 1
+    assert pool.max_connections == 5
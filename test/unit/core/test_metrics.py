@@ -0,0 +1,36 @@
+import json
+import os
+
+from core.metrics import archive_worker_metrics
+from prometheus_client.mmap_dict import MmapedDict
+
+
+def write_metrics(path: str, values: dict[str, float]) -> None:
+    metrics = MmapedDict(path)
+    for key, value in values.items():
+        metrics.write_value(key, value, 0.0)
+    metrics.close()
+
+
+def read_metrics(path: str) -> dict[str, float]:
+    return {
+        key: value for key, value, _, _ in MmapedDict.read_all_values_from_file(path)
+    }
+
+
+def test_archive_worker_metrics(tmp_path) -> None:
+    """Test metrics of exited workers are summed into archive and their files removed"""
+    requests = json.dumps(["requests", "requests_total", {}, "Requests"])
+    errors = json.dumps(["errors", "errors_total", {}, "Errors"])
+    write_metrics(tmp_path / "counter_101.db", {requests: 3.0})
+    write_metrics(tmp_path / "counter_102.db", {requests: 4.0, errors: 1.0})
+    write_metrics(tmp_path / "counter_103.db", {requests: 5.0})
+
+    archive_worker_metrics(101, str(tmp_path))
+    archive_worker_metrics(102, str(tmp_path))
+
+    assert sorted(os.listdir(tmp_path)) == ["counter_103.db", "counter_archive.db"]
+    assert read_metrics(tmp_path / "counter_archive.db") == {
+        requests: 7.0,
+        errors: 1.0,
+    }